@@ -0,0 +1,132 @@
+# data_context.py
+
+# Frame name -> db_functions query that loads it. The database layer (and pandas) are only
+# imported once a frame is first needed, so creating a context is free.
+LOADERS = {
+    "company_info": "retrieve_company_info",
+    "disclosure_dates": "retrieve_company_disclosure_dates",
+    "stock_data": "retrieve_stock_data",
+    "dow_jones": "retrieve_dow_jones_data",
+}
+
+class AnalysisContext:
+    """
+    Loads each input frame at most once per run and shares it between reports.
+
+    Frames are loaded on first use. A frame that could not be retrieved is an empty
+    DataFrame, so callers only need an `.empty` check. Reports must not modify the
+    shared frames in place; take a .copy() before reshaping one.
+    """
+
+    def __init__(self):
+        self._frames = {}
+        self._indicator_cache = None
+
+    def _load(self, name):
+        if name not in self._frames:
+            import pandas as pd
+            from database import db_functions
+
+            try:
+                df = getattr(db_functions, LOADERS[name])()
+            except Exception as e:
+                print(f"Error retrieving {name}:", e)
+                df = None
+            self._frames[name] = df if df is not None else pd.DataFrame()
+        return self._frames[name]
+
+    @property
+    def company_info(self):
+        return self._load("company_info")
+
+    @property
+    def disclosure_dates(self):
+        return self._load("disclosure_dates")
+
+    @property
+    def stock_data(self):
+        return self._load("stock_data")
+
+    @property
+    def dow_jones(self):
+        return self._load("dow_jones")
+
+    @property
+    def indicators(self):
+        """
+        Rolling indicators per (CompanyID, Date). The per-company results outlive clear() and, with
+        the database cache enabled, the run (see indicators.cache_directory()), so after new bars
+        are stored only the new sessions are computed.
+        """
+        if "indicators" not in self._frames:
+            from analysis import indicators
+
+            if self._indicator_cache is None:
+                self._indicator_cache = indicators.IndicatorCache(directory=indicators.cache_directory())
+            if self.stock_data.empty:
+                self._frames["indicators"] = self._indicator_cache.frame()
+            else:
+                self._frames["indicators"] = self._indicator_cache.update(self.stock_data, self.dow_jones)
+        return self._frames["indicators"]
+
+    def prefetch(self, names=None):
+        """
+        Load the named frames (default: all of LOADERS) at the same time, one thread and one
+        pooled connection per query, so the wait is about the slowest query rather than the sum.
+        Frames that are already loaded are not fetched again.
+        """
+        missing = [name for name in dict.fromkeys(names or LOADERS) if name not in self._frames]
+        if len(missing) < 2:
+            for name in missing:
+                self._load(name)
+            return self
+
+        from concurrent.futures import ThreadPoolExecutor
+        # Imported here (db_functions brings in pandas) rather than racing the first imports in the worker threads
+        from database import db_config, db_functions
+
+        workers = max(1, min(len(missing), db_config.DB_PREFETCH_MAX_WORKERS, db_config.DB_POOL_SIZE))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch") as executor:
+            # Each name is loaded by exactly one thread; list() waits for all of them
+            list(executor.map(self._load, missing))
+        return self
+
+    def loaded(self, names):
+        """Whether every named frame is already loaded (so using it costs no query)."""
+        return all(name in self._frames for name in names)
+
+    def iter_stock_price_and_dow_jones(self, company_ids=None, chunk_size=None):
+        """
+        The stock + Dow Jones join built from the loaded frames, in chunks of at most chunk_size
+        rows: the same columns and row order as db_functions.iter_stock_price_and_dow_jones_data,
+        without reading the tables again.
+        """
+        from database import db_config, db_types
+
+        chunk_size = chunk_size or db_config.DB_STREAM_CHUNK_SIZE
+        if self.company_info.empty or self.stock_data.empty or self.dow_jones.empty:
+            return
+
+        stock = self.stock_data
+        if company_ids:
+            stock = stock[stock['CompanyID'].isin(company_ids)]
+        stock = stock.rename(columns={'CompanyID': 'Company ID', 'Open': 'Stock Open', 'High': 'Stock High',
+                                      'Close': 'Stock Close', 'Volume': 'Stock Volume'})
+        companies = self.company_info[['CompanyID', 'CompanyName']].rename(
+            columns={'CompanyID': 'Company ID', 'CompanyName': 'Company Name'})
+        dow = self.dow_jones.rename(columns={'Price': 'Dow Jones Price', 'Open': 'Dow Jones Open',
+                                             'High': 'Dow Jones High', 'Low': 'Dow Jones Low',
+                                             'Volume': 'Dow Jones Volume', 'Change_Percent': 'Dow Jones Change %'})
+
+        df = stock.merge(companies, on='Company ID').merge(dow, on='Date')
+        df = df.sort_values(['Date', 'Company ID'], kind='mergesort')[list(db_types.STOCK_PRICE_AND_DOW_JONES_TYPES)]
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size].reset_index(drop=True)
+
+    def clear(self):
+        """Drop every loaded frame, e.g. after the stored data changed."""
+        self._frames.clear()
+
+    def load_all(self):
+        """Load every input frame up front (batch runs pay the load cost once)."""
+        return self.prefetch()
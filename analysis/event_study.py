@@ -0,0 +1,147 @@
+# event_study.py
+
+import numpy as np
+import pandas as pd
+
+from utils import app_config, trading_calendar
+from . import event_window
+
+def market_returns(df_dow_jones, calendar=None):
+    """Dow Jones return of every calendar session (NaN when that session or the one before has no price)."""
+    calendar = calendar or trading_calendar.get_calendar()
+    prices = np.full(len(calendar.sessions), np.nan)
+    sessions = calendar.session_positions(df_dow_jones['Date'])
+    on_session = sessions >= 0
+    prices[sessions[on_session]] = df_dow_jones['Price'].to_numpy(dtype=np.float64)[on_session]
+
+    returns = np.full(len(prices), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns[1:] = prices[1:] / prices[:-1] - 1.0
+    return returns
+
+def build_return_series(df_stock_data, df_dow_jones, price_column='AdjClose'):
+    """
+    Sorts the stock rows by (CompanyID, Date) and attaches each row's return from the previous NYSE
+    session and the Dow Jones return over that same session. A return is NaN when the company (or the
+    index) has no price for the previous session, so no return ever spans a gap in the data.
+    """
+    calendar = trading_calendar.get_calendar()
+    stock_sorted = event_window.prepare_stock_data(df_stock_data, columns=(price_column,))
+    company_ids = stock_sorted['CompanyID'].to_numpy(dtype=np.int64)
+    sessions = stock_sorted['Session'].to_numpy(dtype=np.int64)
+
+    prices = stock_sorted[price_column].to_numpy(dtype=np.float64)
+    previous = event_window.lookup_sessions(stock_sorted, company_ids, np.where(sessions > 0, sessions - 1, -1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stock_sorted['Return'] = prices / event_window.gather_matrix(prices, previous) - 1.0
+    stock_sorted['Market Return'] = market_returns(df_dow_jones, calendar)[sessions]
+    return stock_sorted
+
+def fit_market_model(stock_returns, market_returns, min_obs):
+    """
+    Batched OLS of R = alpha + beta * Rm for every event row at once.
+
+    Solves the stacked 2x2 normal equations with one np.linalg.solve call, ignoring NaN cells.
+    Returns alpha, beta, residual sigma and the number of observations per event.
+    """
+    valid = np.isfinite(stock_returns) & np.isfinite(market_returns)
+    r = np.where(valid, stock_returns, 0.0)
+    m = np.where(valid, market_returns, 0.0)
+
+    n = valid.sum(axis=1).astype(np.float64)
+    sum_m = m.sum(axis=1)
+    sum_mm = (m * m).sum(axis=1)
+    sum_r = r.sum(axis=1)
+    sum_mr = (m * r).sum(axis=1)
+
+    gram = np.empty((len(n), 2, 2))
+    gram[:, 0, 0] = n
+    gram[:, 0, 1] = gram[:, 1, 0] = sum_m
+    gram[:, 1, 1] = sum_mm
+    rhs = np.stack([sum_r, sum_mr], axis=1)
+
+    # Events without enough data (or with a flat market series) are left as NaN
+    determinant = n * sum_mm - sum_m * sum_m
+    solvable = (n >= max(min_obs, 3)) & (determinant > 1e-18)
+
+    alpha = np.full(len(n), np.nan)
+    beta = np.full(len(n), np.nan)
+    if solvable.any():
+        params = np.linalg.solve(gram[solvable], rhs[solvable][..., None])[..., 0]
+        alpha[solvable] = params[:, 0]
+        beta[solvable] = params[:, 1]
+
+    residuals = np.where(valid, stock_returns - (alpha[:, None] + beta[:, None] * market_returns), 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt((residuals * residuals).sum(axis=1) / (n - 2))
+    sigma[~solvable] = np.nan
+
+    return alpha, beta, sigma, n.astype(np.int64)
+
+def compute_event_study(df_disclosure_dates, df_stock_data, df_dow_jones,
+                        estimation_window=app_config.EVENT_STUDY_ESTIMATION_WINDOW,
+                        car_windows=app_config.EVENT_STUDY_CAR_WINDOWS,
+                        min_obs=app_config.EVENT_STUDY_MIN_OBS,
+                        price_column='AdjClose'):
+    """
+    Market-model event study for every disclosure at once.
+
+    Fits alpha/beta against the Dow Jones over the estimation window (NYSE sessions relative to the
+    effective event day), then reports the abnormal return for each day spanned by car_windows and
+    the cumulative abnormal return (CAR) with its t-statistic for each window.
+
+    Events with fewer than min_obs estimation returns fall back to market-adjusted returns
+    (alpha 0, beta 1, no t-statistic); the Model column says which one was used.
+    """
+    stock_returns = build_return_series(df_stock_data, df_dow_jones, price_column)
+
+    disclosure_dates = pd.to_datetime(df_disclosure_dates['Disclosure Date']).dt.normalize().reset_index(drop=True)
+    company_ids = df_disclosure_dates['ID'].to_numpy()
+    event_sessions = event_window.resolve_event_sessions(stock_returns, company_ids, disclosure_dates)
+
+    returns = stock_returns['Return'].to_numpy()
+    market = stock_returns['Market Return'].to_numpy()
+
+    # Estimation window: one (events x days) matrix per series, fitted in a single batch
+    est_offsets = np.arange(estimation_window[0], estimation_window[1] + 1)
+    est_matrix = event_window.window_positions(stock_returns, company_ids, event_sessions, est_offsets)
+    alpha, beta, sigma, n_obs = fit_market_model(event_window.gather_matrix(returns, est_matrix),
+                                                 event_window.gather_matrix(market, est_matrix), min_obs)
+    fitted = np.isfinite(beta)
+    model = np.where(fitted, 'Market model', np.where(event_sessions >= 0, 'Market adjusted', ''))
+    alpha = np.where(fitted, alpha, 0.0)
+    beta = np.where(fitted, beta, 1.0)
+
+    # Event windows: abnormal returns over the union of all CAR windows
+    first = min(start for start, _ in car_windows)
+    last = max(end for _, end in car_windows)
+    event_offsets = np.arange(first, last + 1)
+    event_matrix = event_window.window_positions(stock_returns, company_ids, event_sessions, event_offsets)
+    expected = alpha[:, None] + beta[:, None] * event_window.gather_matrix(market, event_matrix)
+    abnormal = event_window.gather_matrix(returns, event_matrix) - expected
+
+    df_study = pd.DataFrame({
+        'ID': company_ids,
+        'Name': df_disclosure_dates['Name'].to_numpy(dtype=object),
+        'Symbol': df_disclosure_dates['Symbol'].to_numpy(dtype=object),
+        'Disclosure Date': disclosure_dates.dt.date,
+        'Event Date': event_window.event_dates(event_sessions),
+        'Model': model,
+        'Alpha': np.where(fitted, alpha, np.nan),
+        'Beta': np.where(fitted, beta, np.nan),
+        'Sigma': sigma,
+        'Estimation Obs': n_obs
+    })
+
+    columns = {f"AR {offset:+d}": abnormal[:, i] for i, offset in enumerate(event_offsets)}
+    for start, end in car_windows:
+        in_window = (event_offsets >= start) & (event_offsets <= end)
+        window_ar = abnormal[:, in_window]
+        days = np.isfinite(window_ar).sum(axis=1)
+        car = np.where(days > 0, np.nansum(window_ar, axis=1), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_stat = car / (sigma * np.sqrt(days))
+        columns[f"CAR [{start:+d},{end:+d}]"] = car
+        columns[f"t CAR [{start:+d},{end:+d}]"] = t_stat
+
+    return pd.concat([df_study, pd.DataFrame(columns)], axis=1)
@@ -0,0 +1,182 @@
+# event_window.py
+
+import numpy as np
+import pandas as pd
+
+from utils import app_config, trading_calendar, utils_func
+
+# Composite (CompanyID, session) keys pack the NYSE session index into the low digits of the company ID
+_SESSION_SPAN = 1_000_000
+
+def _composite_keys(company_ids, sessions):
+    return np.asarray(company_ids, dtype=np.int64) * _SESSION_SPAN + np.asarray(sessions, dtype=np.int64)
+
+def prepare_stock_data(df_stock_data, columns=('Open', 'Close')):
+    """
+    Sorts the stock rows by (CompanyID, Date) once and attaches each row's session index and the
+    composite key used for lookups. Rows on dates that are not NYSE sessions are dropped.
+    """
+    df = df_stock_data[['CompanyID', 'Date', *columns]].copy()
+    df['Date'] = pd.to_datetime(df['Date']).dt.normalize()
+    df['Session'] = trading_calendar.get_calendar().session_positions(df['Date'])
+    df = df[df['Session'] >= 0].dropna(subset=['CompanyID'])
+    df = df.sort_values(['CompanyID', 'Date'], kind='mergesort').reset_index(drop=True)
+    df['Key'] = _composite_keys(df['CompanyID'].to_numpy(), df['Session'].to_numpy())
+    return df
+
+def lookup_sessions(df_stock_sorted, company_ids, sessions):
+    """
+    Exact (CompanyID, session) lookup. `sessions` is one session index per company ID, or an
+    (events x offsets) matrix of them; returns the matching stock row indices in the same shape,
+    -1 where the company has no row for that session (or the session is -1).
+    """
+    company_ids = np.asarray(company_ids, dtype=np.int64)
+    sessions = np.asarray(sessions, dtype=np.int64)
+    if sessions.ndim == 2:
+        company_ids = company_ids[:, None]
+    keys = _composite_keys(company_ids, np.maximum(sessions, 0))
+
+    stock_keys = df_stock_sorted['Key'].to_numpy()
+    if len(stock_keys) == 0:
+        return np.full(sessions.shape, -1, dtype=np.int64)
+    positions = np.searchsorted(stock_keys, keys, side='left')
+    clipped = np.minimum(positions, len(stock_keys) - 1)
+    found = (sessions >= 0) & (positions < len(stock_keys)) & (stock_keys[clipped] == keys)
+    return np.where(found, positions, -1)
+
+def resolve_event_sessions(df_stock_sorted, company_ids, disclosure_dates,
+                           max_lag=app_config.EVENT_MAX_LAG_SESSIONS):
+    """
+    Session index of each disclosure's effective trading day, -1 when there is none.
+
+    The disclosure date rolls forward to the next session; the event day is the company's first
+    stored session from there, as long as it is at most `max_lag` sessions later. A company with
+    no prices around the disclosure gets -1 instead of a match months or years away.
+    """
+    company_ids = np.asarray(company_ids, dtype=np.int64)
+    effective = trading_calendar.get_calendar().next_session_positions(disclosure_dates)
+
+    stock_keys = df_stock_sorted['Key'].to_numpy()
+    stock_sessions = df_stock_sorted['Session'].to_numpy(dtype=np.int64)
+    if len(stock_keys) == 0:
+        return np.full(len(company_ids), -1, dtype=np.int64)
+
+    positions = np.searchsorted(stock_keys, _composite_keys(company_ids, np.maximum(effective, 0)), side='left')
+    clipped = np.minimum(positions, len(stock_keys) - 1)
+    lag = stock_sessions[clipped] - effective
+    found = ((effective >= 0) & (positions < len(stock_keys)) &
+             (df_stock_sorted['CompanyID'].to_numpy(dtype=np.int64)[clipped] == company_ids) & (lag <= max_lag))
+    return np.where(found, stock_sessions[clipped], -1)
+
+def window_positions(df_stock_sorted, company_ids, event_sessions, offsets):
+    """
+    Expands event sessions into an (events x offsets) matrix of stock row indices. Offsets count
+    NYSE sessions, so a session the company has no row for is -1 rather than the next stored row.
+    """
+    event_sessions = np.asarray(event_sessions, dtype=np.int64)
+    sessions = event_sessions[:, None] + np.asarray(offsets, dtype=np.int64)[None, :]
+    sessions = np.where(event_sessions[:, None] >= 0, sessions, -1)
+    return lookup_sessions(df_stock_sorted, company_ids, sessions)
+
+def event_dates(event_sessions):
+    """Event Date column values: the session date of each event (NaT when unresolved)."""
+    return pd.to_datetime(trading_calendar.get_calendar().session_dates(event_sessions)).date
+
+def gather(values, positions, fill):
+    """Picks values[positions] as an object array, using fill wherever the position is -1."""
+    values = np.asarray(values, dtype=object)
+    result = np.full(len(positions), fill, dtype=object)
+    hit = positions >= 0
+    result[hit] = values[positions[hit]]
+    return result
+
+def gather_matrix(values, matrix):
+    """Gathers float values into a matrix of row indices, NaN where the index is -1."""
+    padded = np.append(np.asarray(values, dtype=np.float64), np.nan)
+    return padded[np.where(matrix >= 0, matrix, len(padded) - 1)]
+
+def build_disclosure_sheet(df_disclosure_dates, df_stock_data):
+    """
+    Builds the 'Disclosure Dates' sheet in one pass: disclosures on closed market days get a
+    closure row followed by a 'Market reopen' row, the rest get the open/close of that day.
+    """
+    columns = ['Name', 'Disclosure Date', 'Market Closed', 'Reason', 'Opening Price', 'Closing Price']
+    if df_disclosure_dates.empty:
+        return pd.DataFrame(columns=columns)
+
+    disclosure_dates = pd.to_datetime(df_disclosure_dates['Disclosure Date']).dt.normalize().reset_index(drop=True)
+    company_ids = df_disclosure_dates['ID'].to_numpy()
+    names = df_disclosure_dates['Name'].to_numpy(dtype=object)
+    order = np.arange(len(disclosure_dates))
+
+    reasons = utils_func.market_closed_reasons(disclosure_dates)
+    closed = reasons != ''
+
+    # Open market days: exact (CompanyID, session) lookup
+    stock_sorted = prepare_stock_data(df_stock_data)
+    sessions = trading_calendar.get_calendar().session_positions(disclosure_dates)
+    rows = lookup_sessions(stock_sorted, company_ids, np.where(closed, -1, sessions))
+    hit = rows >= 0
+    opening = gather(stock_sorted['Open'], rows, 'N/A')
+    closing = gather(stock_sorted['Close'], rows, 'N/A')
+
+    df_days = pd.DataFrame({
+        'Order': order,
+        'Step': 0,
+        'Name': names,
+        'Disclosure Date': disclosure_dates,
+        'Market Closed': closed,
+        'Reason': np.where(closed, reasons, np.where(hit, '', 'No stock data available')),
+        'Opening Price': opening,
+        'Closing Price': closing
+    })
+
+    # Closed market days: one extra row for the day the market reopens
+    reopen_dates = utils_func.roll_to_open_market_dates(disclosure_dates[closed] + pd.Timedelta(days=1))
+    df_reopen = pd.DataFrame({
+        'Order': order[closed],
+        'Step': 1,
+        'Name': names[closed],
+        'Disclosure Date': reopen_dates.to_numpy(),
+        'Market Closed': False,
+        'Reason': 'Market reopen',
+        'Opening Price': 'N/A',
+        'Closing Price': 'N/A'
+    })
+
+    # An empty frame would turn the text columns to object, so it is only added when there are rows
+    df_sheet = pd.concat([df_days, df_reopen] if closed.any() else [df_days], ignore_index=True)
+    df_sheet = df_sheet.sort_values(['Order', 'Step'], kind='mergesort').reset_index(drop=True)
+    df_sheet['Disclosure Date'] = df_sheet['Disclosure Date'].dt.date
+    return df_sheet[columns]
+
+def build_event_window(df_disclosure_dates, df_stock_data, pre=5, post=10):
+    """
+    Resolves each disclosure to its effective trading day (see resolve_event_sessions) and attaches
+    the open/close for every NYSE session from -pre to +post around it (NaN where no row is stored).
+    """
+    offsets = np.arange(-pre, post + 1)
+    disclosure_dates = pd.to_datetime(df_disclosure_dates['Disclosure Date']).dt.normalize().reset_index(drop=True)
+    company_ids = df_disclosure_dates['ID'].to_numpy()
+
+    stock_sorted = prepare_stock_data(df_stock_data)
+    event_sessions = resolve_event_sessions(stock_sorted, company_ids, disclosure_dates)
+    matrix = window_positions(stock_sorted, company_ids, event_sessions, offsets)
+
+    df_window = pd.DataFrame({
+        'ID': company_ids,
+        'Name': df_disclosure_dates['Name'].to_numpy(dtype=object),
+        'Disclosure Date': disclosure_dates.dt.date,
+        'Event Date': event_dates(event_sessions)
+    })
+
+    # Gather every (event, offset) cell at once; missing cells become NaN
+    window_columns = {}
+    for field in ('Open', 'Close'):
+        gathered = gather_matrix(stock_sorted[field], matrix)
+        for i, offset in enumerate(offsets):
+            window_columns[f"{field} {offset:+d}"] = gathered[:, i]
+
+    # Interleave the columns as Open/Close per trading day
+    ordered = [f"{field} {offset:+d}" for offset in offsets for field in ('Open', 'Close')]
+    return pd.concat([df_window, pd.DataFrame(window_columns)[ordered]], axis=1)
@@ -0,0 +1,171 @@
+# gap_detection.py
+
+"""
+Finds the trading sessions missing from stock_data and backfills only those from Polygon.
+
+Each company's stored dates are mapped to positions in the NYSE session array with one
+binary search; a gap is any jump of more than one position between consecutive stored
+sessions, plus the leading edge (from `start`) and the trailing edge (up to the last
+completed session). Runs of missing sessions become the date ranges to fetch.
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils import trading_calendar
+
+GAP_COLUMNS = ["CompanyID", "StockSymbol", "From", "To", "Sessions", "Edge"]
+
+def _to_day(date):
+    return np.datetime64(pd.Timestamp(date).date(), 'D')
+
+def last_completed_session(calendar=None):
+    """The latest session before today (today's bar may still be forming)."""
+    calendar = calendar or trading_calendar.get_calendar()
+    return calendar.previous_session(datetime.date.today(), inclusive=False)
+
+def find_gaps(df_stock, df_companies, start=None, end=None, max_gap=0, calendar=None):
+    """
+    Missing sessions per company as the fewest date ranges.
+
+    df_stock needs CompanyID and Date; df_companies (CompanyID, StockSymbol) lists the companies
+    to check. Without `start` each company is checked from its first stored session, and a
+    company with no rows at all is only reported when `start` is given. Ranges separated by at
+    most `max_gap` stored sessions are merged, trading a few re-fetched days for fewer API calls.
+    """
+    calendar = calendar or trading_calendar.get_calendar()
+    sessions = calendar.sessions
+    end = end or last_completed_session(calendar)
+    hi = int(np.searchsorted(sessions, _to_day(end), side='right')) - 1
+
+    company_ids = df_companies['CompanyID'].to_numpy(dtype=np.int64)
+    stock = df_stock[df_stock['CompanyID'].isin(company_ids)].dropna(subset=['CompanyID', 'Date'])
+    days = pd.to_datetime(stock['Date']).to_numpy(dtype='datetime64[D]')
+    positions = np.searchsorted(sessions, days)
+    on_session = positions < len(sessions)
+    on_session[on_session] = sessions[positions[on_session]] == days[on_session]
+
+    stored = pd.DataFrame({'CompanyID': stock['CompanyID'].to_numpy(dtype=np.int64)[on_session],
+                           'Position': positions[on_session]}).drop_duplicates()
+
+    # Where each company's check starts: `start`, or its first stored session
+    if start is not None:
+        lo = pd.Series(int(np.searchsorted(sessions, _to_day(start), side='left')), index=company_ids)
+    else:
+        lo = stored.groupby('CompanyID')['Position'].min()
+    lo = lo[lo.index.isin(company_ids) & (lo <= hi)]
+    stored = stored[stored['CompanyID'].isin(lo.index)]
+    stored = stored[stored['Position'].between(lo.reindex(stored['CompanyID']).to_numpy(), hi)]
+
+    # Sentinels just outside [lo, hi] turn the edges into ordinary gaps
+    companies = np.concatenate([lo.index.to_numpy(), stored['CompanyID'].to_numpy(), lo.index.to_numpy()])
+    points = np.concatenate([lo.to_numpy() - 1, stored['Position'].to_numpy(), np.full(len(lo), hi + 1)])
+    order = np.lexsort((points, companies))
+    companies, points = companies[order], points[order]
+
+    same_company = companies[1:] == companies[:-1]
+    is_gap = same_company & (points[1:] - points[:-1] > 1)
+    gaps = pd.DataFrame({
+        'CompanyID': companies[1:][is_gap],
+        'First': points[:-1][is_gap] + 1,
+        'Last': points[1:][is_gap] - 1,
+    })
+    company_lo = lo.reindex(gaps['CompanyID']).to_numpy()
+    gaps['Leading'] = gaps['First'] == company_lo
+    gaps['Trailing'] = gaps['Last'] == hi
+    gaps['Sessions'] = gaps['Last'] - gaps['First'] + 1
+
+    if gaps.empty:
+        return pd.DataFrame(columns=GAP_COLUMNS)
+
+    # Merge ranges that are at most max_gap stored sessions apart
+    previous_last = gaps.groupby('CompanyID')['Last'].shift()
+    gaps['Group'] = (previous_last.isna() | (gaps['First'] - previous_last - 1 > max_gap)).cumsum()
+    merged = gaps.groupby('Group').agg(CompanyID=('CompanyID', 'first'), First=('First', 'min'),
+                                       Last=('Last', 'max'), Sessions=('Sessions', 'sum'),
+                                       Leading=('Leading', 'any'), Trailing=('Trailing', 'any'))
+
+    merged['Edge'] = np.select([merged['Leading'] & merged['Trailing'], merged['Leading'], merged['Trailing']],
+                               ['all', 'leading', 'trailing'], default='interior')
+    merged['From'] = sessions[merged['First'].to_numpy()].astype(datetime.date)
+    merged['To'] = sessions[merged['Last'].to_numpy()].astype(datetime.date)
+    symbols = df_companies.drop_duplicates('CompanyID').set_index('CompanyID')['StockSymbol']
+    merged['StockSymbol'] = symbols.reindex(merged['CompanyID']).to_numpy()
+    return merged[GAP_COLUMNS].reset_index(drop=True)
+
+def detect_gaps(company_ids=None, start=None, end=None, max_gap=0, context=None):
+    """find_gaps over the stored data (through the AnalysisContext when one is given)."""
+    if context is not None:
+        context.prefetch(("company_info", "stock_data"))
+        df_companies, df_stock = context.company_info, context.stock_data
+    else:
+        from database import db_functions
+        df_companies, df_stock = db_functions.retrieve_company_info(), db_functions.retrieve_stock_data()
+
+    if df_companies is None or df_companies.empty:
+        print("[Error] No company information retrieved.")
+        return None
+    if df_stock is None:
+        df_stock = pd.DataFrame(columns=['CompanyID', 'Date'])
+    if company_ids:
+        df_companies = df_companies[df_companies['CompanyID'].isin(company_ids)]
+
+    return find_gaps(df_stock, df_companies, start, end, max_gap)
+
+def print_gap_report(gaps):
+    if gaps.empty:
+        print("No missing trading sessions found.")
+        return
+
+    print(f"{len(gaps)} missing range(s), {int(gaps['Sessions'].sum())} session(s) across "
+          f"{gaps['CompanyID'].nunique()} company(ies):")
+    print(gaps.to_string(index=False))
+
+def backfill(gaps, dry_run=False, api_key=None, base_url=None):
+    """
+    Fetch each missing range from Polygon and load it into stock_data.
+
+    A range counts as filled only when its whole fetch succeeded. When a page fails partway, the
+    bars loaded before it stay stored but the range is reported as failed (and its rows are not
+    counted), so the next detect_gaps run finds whatever is still missing.
+
+    Returns the totals (ranges, failed, rows, inserted, updated) plus the unfilled ranges as
+    (StockSymbol, From, To) tuples under "failed_ranges", or None when nothing could start.
+    """
+    totals = {"ranges": 0, "failed": 0, "rows": 0, "inserted": 0, "updated": 0, "failed_ranges": []}
+    if gaps.empty or dry_run:
+        return totals
+
+    from api_requests import polygon_requests
+    from database import db_functions, db_ingest
+
+    api_key = api_key or db_functions.get_polygon_api_key()
+    if not api_key:
+        print("[Error] No Polygon API key available.")
+        return None
+
+    for gap in gaps.itertuples(index=False):
+        totals["ranges"] += 1
+        if not isinstance(gap.StockSymbol, str) or not gap.StockSymbol:
+            print(f"[!!] Company {gap.CompanyID} has no stock symbol; skipping {gap.From} to {gap.To}.")
+            totals["failed"] += 1
+            totals["failed_ranges"].append((gap.StockSymbol, gap.From, gap.To))
+            continue
+
+        print(f"\nBackfilling {gap.StockSymbol} (Company {gap.CompanyID}) {gap.From} to {gap.To} "
+              f"({gap.Sessions} sessions)")
+        batches = polygon_requests.iter_api_data(gap.StockSymbol, gap.From.isoformat(), gap.To.isoformat(),
+                                                 api_key=api_key, base_url=base_url or polygon_requests.BASE_URL)
+        # A failed page raises inside the stream, which load_polygon_bars reports as None
+        result = db_ingest.load_polygon_bars(gap.StockSymbol, batches, company_id=int(gap.CompanyID))
+        if result is None:
+            print(f"[!!] {gap.StockSymbol} {gap.From} to {gap.To} was not filled.")
+            totals["failed"] += 1
+            totals["failed_ranges"].append((gap.StockSymbol, gap.From, gap.To))
+            continue
+        for key in ("rows", "inserted", "updated"):
+            totals[key] += result[key]
+
+    return totals
@@ -0,0 +1,450 @@
+# indicators.py
+
+"""
+Rolling indicators for every company at once: moving averages, volatility, beta against the
+Dow Jones and drawdown from the rolling high.
+
+Prices are laid out as one (companies x sessions) matrix on the NYSE calendar, so a window is
+always the same number of trading sessions and a missing bar leaves a hole instead of
+stretching the window. Sums over windows come from cumulative sums (one subtraction per
+cell, whatever the window length); the rolling high uses a strided window view. A window is
+only filled when every session in it has a value.
+
+IndicatorCache keeps the results per company and, when new bars arrive, computes only the
+new sessions (from a lookback tail) instead of the whole history. Given a directory it keeps
+them on disk as per-company parquet parts, so the next run starts from there.
+"""
+
+import glob
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils import app_config, trading_calendar
+from . import event_window
+
+CACHE_FORMAT = 2  # Bump when the cached columns change; older caches are discarded
+CACHE_META_FILE = "indicators.json"
+
+def indicator_columns():
+    """Indicator column names, in output order, for the configured windows."""
+    return ([f"MA {window}" for window in app_config.INDICATOR_MA_WINDOWS] +
+            [f"Volatility {app_config.INDICATOR_VOLATILITY_WINDOW}",
+             f"Beta {app_config.INDICATOR_BETA_WINDOW}",
+             f"Drawdown {app_config.INDICATOR_DRAWDOWN_WINDOW}"])
+
+def lookback_sessions():
+    """Sessions before a date that its indicators depend on (returns reach one session further back)."""
+    return max(*app_config.INDICATOR_MA_WINDOWS, app_config.INDICATOR_VOLATILITY_WINDOW,
+               app_config.INDICATOR_BETA_WINDOW, app_config.INDICATOR_DRAWDOWN_WINDOW) + 1
+
+def _days(dates):
+    """A date column as datetime64[D], skipping the parse when it already holds datetimes."""
+    values = dates.to_numpy()
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[D]')
+    return pd.to_datetime(dates).to_numpy(dtype='datetime64[D]')
+
+def _empty_frame(price_column):
+    columns = [price_column] + indicator_columns()
+    return pd.DataFrame({'CompanyID': pd.Series(dtype=np.int64), 'Date': pd.Series(dtype='datetime64[ns]'),
+                         **{column: pd.Series(dtype=np.float64) for column in columns}})
+
+def cache_directory():
+    """Where IndicatorCache keeps its parts: next to the database cache (None when that is disabled)."""
+    from database import db_cache
+
+    return os.path.join(db_cache.cache_root(), "indicators") if db_cache.enabled() else None
+
+def invalidate_company(company_id, directory=None):
+    """
+    Drop one company's persisted indicator parts (e.g. after its prices were rewritten), without
+    loading the cache; the next IndicatorCache on that directory recomputes the company.
+    """
+    directory = directory or cache_directory()
+    if directory:
+        shutil.rmtree(os.path.join(directory, f"company_{int(company_id)}"), ignore_errors=True)
+
+# ---- Matrix primitives ----
+
+def price_matrix(df_prices, sessions, price_column='AdjClose'):
+    """
+    (company_ids, matrix): one row per company and one column per session, NaN where there is
+    no bar. Rows on non-session dates are ignored.
+    """
+    df = df_prices.dropna(subset=['CompanyID', 'Date', price_column])
+    days = _days(df['Date'])
+    positions = np.searchsorted(sessions, days)
+    on_session = positions < len(sessions)
+    on_session[on_session] = sessions[positions[on_session]] == days[on_session]
+
+    company_ids, rows = np.unique(df['CompanyID'].to_numpy(dtype=np.int64)[on_session], return_inverse=True)
+    matrix = np.full((len(company_ids), len(sessions)), np.nan)
+    matrix[rows, positions[on_session]] = df[price_column].to_numpy(dtype=np.float64)[on_session]
+    return company_ids, matrix
+
+def period_returns(matrix):
+    """Simple returns between consecutive sessions (NaN when either price is missing)."""
+    returns = np.full(matrix.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns[..., 1:] = matrix[..., 1:] / matrix[..., :-1] - 1.0
+    return returns
+
+def rolling_sum(values, window, valid=None):
+    """
+    Sum over the trailing `window` sessions along the last axis, from cumulative sums.
+    NaN unless all `window` cells are valid (default: finite).
+    """
+    valid = np.isfinite(values) if valid is None else valid
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=-1)
+    counts = np.cumsum(valid, axis=-1)
+
+    zeros = np.zeros(values.shape[:-1] + (1,))
+    sums = np.concatenate([zeros, sums], axis=-1)
+    counts = np.concatenate([zeros, counts], axis=-1)
+
+    result = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        window_sums = sums[..., window:] - sums[..., :-window]
+        window_counts = counts[..., window:] - counts[..., :-window]
+        result[..., window - 1:] = np.where(window_counts == window, window_sums, np.nan)
+    return result
+
+def rolling_mean(values, window):
+    return rolling_sum(values, window) / window
+
+def rolling_volatility(returns, window, annualize=True):
+    """Sample standard deviation of returns over the window (annualized with TRADING_DAYS_PER_YEAR)."""
+    total = rolling_sum(returns, window)
+    squares = rolling_sum(returns * returns, window)
+    variance = np.maximum((squares - total * total / window) / (window - 1), 0.0)
+    scale = np.sqrt(app_config.TRADING_DAYS_PER_YEAR) if annualize else 1.0
+    return np.sqrt(variance) * scale
+
+def rolling_beta(returns, market_returns, window):
+    """OLS beta of each row's returns on the market returns over the window (sessions where both exist)."""
+    market = np.broadcast_to(market_returns, returns.shape)
+    valid = np.isfinite(returns) & np.isfinite(market)
+    sum_r = rolling_sum(returns, window, valid)
+    sum_m = rolling_sum(market, window, valid)
+    sum_rm = rolling_sum(returns * market, window, valid)
+    sum_mm = rolling_sum(market * market, window, valid)
+
+    covariance = sum_rm - sum_r * sum_m / window
+    variance = sum_mm - sum_m * sum_m / window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(variance > 0, covariance / variance, np.nan)
+
+def rolling_drawdown(matrix, window):
+    """Price relative to the highest price of the trailing window (0 at a new high, -0.2 = 20% below)."""
+    # Pad the front so the first sessions use the partial history they have
+    padded = np.concatenate([np.full(matrix.shape[:-1] + (window - 1,), np.nan), matrix], axis=-1)
+    peaks = np.fmax.reduce(sliding_window_view(padded, window, axis=-1), axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return matrix / peaks - 1.0
+
+# ---- Indicators ----
+
+def compute_indicators(df_stock_data, df_dow_jones, price_column='AdjClose', calendar=None):
+    """
+    Indicators for every stored (CompanyID, Date): the price column plus indicator_columns().
+    Rows are sorted by CompanyID and Date.
+    """
+    df_prices = df_stock_data[['CompanyID', 'Date', price_column]].dropna()
+    if df_prices.empty:
+        return _empty_frame(price_column)
+
+    calendar = calendar or trading_calendar.get_calendar()
+    days = _days(df_prices['Date'])
+    sessions = calendar.sessions_between(days.min(), days.max())
+
+    company_ids, prices = price_matrix(df_prices, sessions, price_column)
+    returns = period_returns(prices)
+
+    if df_dow_jones is not None and not df_dow_jones.empty:
+        _, dow_prices = price_matrix(df_dow_jones.assign(CompanyID=0), sessions, 'Price')
+        market_returns = period_returns(dow_prices[0]) if len(dow_prices) else np.full(len(sessions), np.nan)
+    else:
+        market_returns = np.full(len(sessions), np.nan)
+
+    values = {f"MA {window}": rolling_mean(prices, window) for window in app_config.INDICATOR_MA_WINDOWS}
+    values[f"Volatility {app_config.INDICATOR_VOLATILITY_WINDOW}"] = rolling_volatility(
+        returns, app_config.INDICATOR_VOLATILITY_WINDOW)
+    values[f"Beta {app_config.INDICATOR_BETA_WINDOW}"] = rolling_beta(
+        returns, market_returns, app_config.INDICATOR_BETA_WINDOW)
+    values[f"Drawdown {app_config.INDICATOR_DRAWDOWN_WINDOW}"] = rolling_drawdown(
+        prices, app_config.INDICATOR_DRAWDOWN_WINDOW)
+
+    # Back to one row per stored bar
+    rows, cols = np.nonzero(np.isfinite(prices))
+    df = pd.DataFrame({
+        'CompanyID': company_ids[rows],
+        'Date': sessions[cols].astype('datetime64[ns]'),
+        price_column: prices[rows, cols],
+    })
+    for name, matrix in values.items():
+        df[name] = matrix[rows, cols]
+    return df
+
+def event_values(df_values, column, company_ids, event_sessions, offsets, calendar=None):
+    """
+    (events x offsets) values of `column` at each event session plus the offsets, sliced from the
+    session-aligned matrix over the sessions the events span. NaN where the company has no row
+    for that session or the event was not resolved (-1).
+    """
+    calendar = calendar or trading_calendar.get_calendar()
+    offsets = np.asarray(offsets, dtype=np.int64)
+    company_ids = np.asarray(company_ids, dtype=np.int64)
+    values = np.full((len(event_sessions), len(offsets)), np.nan)
+    resolved = event_sessions >= 0
+    if not resolved.any():
+        return values
+
+    first = max(int(event_sessions[resolved].min() + offsets.min()), 0)
+    last = min(int(event_sessions[resolved].max() + offsets.max()), len(calendar.sessions) - 1)
+    matrix_ids, matrix = price_matrix(df_values, calendar.sessions[first:last + 1], column)
+    if not len(matrix_ids):
+        return values
+
+    rows = np.minimum(np.searchsorted(matrix_ids, company_ids), len(matrix_ids) - 1)
+    cols = event_sessions[:, None] + offsets[None, :] - first
+    inside = (resolved & (matrix_ids[rows] == company_ids))[:, None] & (cols >= 0) & (cols < matrix.shape[1])
+    values[inside] = matrix[np.broadcast_to(rows[:, None], cols.shape)[inside], cols[inside]]
+    return values
+
+def _resolve_events(df_disclosure_dates, df_stock_data, price_column):
+    # The event day is resolved the same way as in the other sheets (event_window)
+    disclosure_dates = pd.to_datetime(df_disclosure_dates['Disclosure Date']).dt.normalize().reset_index(drop=True)
+    company_ids = df_disclosure_dates['ID'].to_numpy()
+    stock_sorted = event_window.prepare_stock_data(df_stock_data, columns=(price_column,))
+    return disclosure_dates, company_ids, event_window.resolve_event_sessions(stock_sorted, company_ids, disclosure_dates)
+
+def _drawdown_frame(prices, offsets):
+    peaks = np.fmax.accumulate(prices, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdowns = prices / peaks - 1.0
+
+    has_value = np.isfinite(drawdowns).any(axis=1)
+    trough = np.argmin(np.where(np.isfinite(drawdowns), drawdowns, np.inf), axis=1)
+    return pd.DataFrame({
+        'Event Max Drawdown': np.where(has_value, drawdowns[np.arange(len(trough)), trough], np.nan),
+        'Trough Offset': pd.Series(offsets[trough], dtype='Int64').where(has_value),
+    })
+
+def event_drawdowns(df_disclosure_dates, df_stock_data, pre=app_config.EVENT_WINDOW_PRE,
+                    post=app_config.EVENT_WINDOW_POST, price_column='AdjClose'):
+    """
+    Deepest fall from the running high within [-pre, +post] trading sessions of each disclosure's
+    event day, and the offset of that low. One row per disclosure, in input order.
+    """
+    offsets = np.arange(-pre, post + 1)
+    _, company_ids, event_sessions = _resolve_events(df_disclosure_dates, df_stock_data, price_column)
+    prices = event_values(df_stock_data, price_column, company_ids, event_sessions, offsets)
+    return _drawdown_frame(prices, offsets)
+
+def event_indicators(df_disclosure_dates, df_stock_data, df_indicators, price_column='AdjClose',
+                     pre=app_config.EVENT_WINDOW_PRE, post=app_config.EVENT_WINDOW_POST):
+    """
+    Indicators on the session before each disclosure's event day (so the event itself does not
+    move them) plus the drawdown around the event. One row per disclosure, in input order.
+    """
+    calendar = trading_calendar.get_calendar()
+    disclosure_dates, company_ids, event_sessions = _resolve_events(df_disclosure_dates, df_stock_data, price_column)
+
+    df_events = pd.DataFrame({
+        'ID': company_ids,
+        'Name': df_disclosure_dates['Name'].to_numpy(dtype=object),
+        'Symbol': df_disclosure_dates['Symbol'].to_numpy(dtype=object),
+        'Disclosure Date': disclosure_dates.dt.date,
+        'Event Date': event_window.event_dates(event_sessions),
+    })
+    for column in indicator_columns():
+        df_events[column] = event_values(df_indicators, column, company_ids, event_sessions, [-1], calendar)[:, 0]
+
+    offsets = np.arange(-pre, post + 1)
+    prices = event_values(df_stock_data, price_column, company_ids, event_sessions, offsets, calendar)
+    return pd.concat([df_events, _drawdown_frame(prices, offsets)], axis=1)
+
+class IndicatorCache:
+    """
+    Indicator rows per company, extended incrementally.
+
+    update() computes only the sessions after each company's last cached date, from a tail of
+    lookback_sessions() earlier bars, which gives the same values as a full recompute. A company
+    whose cached history changed (bars gained or lost, e.g. a backfill, or prices corrected in
+    place, seen as a different price sum) is recomputed from scratch.
+
+    With a directory (see cache_directory()) the rows are also written there as parquet parts,
+    one directory per company, next to a metadata file holding each company's watermark (last
+    cached date, the stored bars up to it and their price sum); a new cache on the same directory
+    picks them up.
+    """
+
+    def __init__(self, price_column='AdjClose', directory=None):
+        self.price_column = price_column
+        self.directory = directory
+        self._reset()
+        if directory:
+            self._load()
+
+    def _reset(self):
+        self._frame = _empty_frame(self.price_column)
+        self._last = pd.Series(dtype='datetime64[ns]')       # CompanyID -> last cached date
+        self._row_counts = pd.Series(dtype=np.int64)          # CompanyID -> stored bars up to that date
+        self._price_sums = pd.Series(dtype=np.float64)        # CompanyID -> sum of their prices
+
+    def _signature(self):
+        return {'format': CACHE_FORMAT, 'price_column': self.price_column, 'columns': indicator_columns()}
+
+    def _company_dir(self, company_id):
+        return os.path.join(self.directory, f"company_{int(company_id)}")
+
+    def _load(self):
+        path = os.path.join(self.directory, CACHE_META_FILE)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[!!] Ignoring unreadable indicator cache '{path}': {e}")
+            meta = {}
+        if meta.get('signature') != self._signature():
+            # Other windows or price column: start over rather than mixing results
+            shutil.rmtree(self.directory, ignore_errors=True)
+            return
+
+        files = sorted(glob.glob(os.path.join(self.directory, "company_*", "*.parquet")))
+        if not files or not meta['companies']:
+            return
+
+        import pyarrow.dataset as ds
+
+        df = ds.dataset(files, format="parquet").to_table().to_pandas()
+        df = df.astype(_empty_frame(self.price_column).dtypes.to_dict())
+        companies = meta['companies']
+        last = pd.Series({int(k): v['last'] for k, v in companies.items()}).astype('datetime64[ns]')
+
+        # Rows past the saved watermark come from a run that stopped before saving it
+        cutoff = last.reindex(df['CompanyID']).to_numpy(dtype='datetime64[ns]')
+        df = df[df['Date'].to_numpy() <= cutoff]
+        df = df.drop_duplicates(['CompanyID', 'Date'], keep='last')
+        df = df.sort_values(['CompanyID', 'Date'], kind='mergesort').reset_index(drop=True)
+
+        # Companies whose parts do not reach their watermark (or miss rows, e.g. after
+        # invalidate_company() removed their parts) are left out and recomputed
+        rows = pd.Series({int(k): v['rows'] for k, v in companies.items()}, dtype=np.int64)
+        frame_last = df.groupby('CompanyID')['Date'].max()
+        frame_rows = df.groupby('CompanyID').size()
+        complete = frame_last.index[(frame_last.to_numpy() == last.reindex(frame_last.index).to_numpy()) &
+                                    (frame_rows.to_numpy() == rows.reindex(frame_last.index).to_numpy())]
+        self._frame = df[df['CompanyID'].isin(complete)].reset_index(drop=True)
+        self._last = last.reindex(complete)
+        self._row_counts = rows.reindex(complete)
+        self._price_sums = pd.Series({int(k): v['price_sum'] for k, v in companies.items()},
+                                     dtype=np.float64).reindex(complete)
+
+    def _save(self, df_new, full):
+        """Write the new rows (replacing the parts of recomputed companies) and then the watermarks."""
+        for company_id in full:
+            shutil.rmtree(self._company_dir(company_id), ignore_errors=True)
+        for company_id, part in df_new.groupby('CompanyID'):
+            company_dir = self._company_dir(company_id)
+            os.makedirs(company_dir, exist_ok=True)
+            if len(os.listdir(company_dir)) >= app_config.INDICATOR_CACHE_MAX_PARTS:
+                # Merge the accumulated daily parts into one file
+                shutil.rmtree(company_dir)
+                os.makedirs(company_dir)
+                part = self._frame[self._frame['CompanyID'] == company_id]
+            part.to_parquet(os.path.join(company_dir, f"part-{time.time_ns()}.parquet"), index=False)
+        self._save_meta()
+
+    def _save_meta(self):
+        companies = {str(company_id): {'last': str(last.date()), 'rows': int(self._row_counts.get(company_id, 0)),
+                                       'price_sum': float(self._price_sums.get(company_id, 0.0))}
+                     for company_id, last in self._last.items()}
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, CACHE_META_FILE)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({'signature': self._signature(), 'companies': companies}, f)
+        os.replace(temp_path, path)
+
+    def update(self, df_stock_data, df_dow_jones):
+        """Bring every company up to date with df_stock_data; returns the full indicator frame."""
+        calendar = trading_calendar.get_calendar()
+        df_prices = df_stock_data[['CompanyID', 'Date', self.price_column]].dropna()
+        company_ids = df_prices['CompanyID'].to_numpy(dtype=np.int64)
+        dates = _days(df_prices['Date']).astype('datetime64[ns]')
+        df_prices = df_prices.assign(CompanyID=company_ids, Date=dates)
+
+        # Bars on or before each company's last cached date must match what was cached
+        prices = df_prices[self.price_column].to_numpy(dtype=np.float64)
+        last = self._last.reindex(company_ids).to_numpy(dtype='datetime64[ns]')
+        cached = dates <= last
+        cached_rows = pd.Series(cached).groupby(company_ids).sum()
+        cached_sums = pd.Series(np.where(cached, prices, 0.0)).groupby(company_ids).sum()
+        has_new = pd.Series(np.isnat(last) | (dates > last)).groupby(company_ids).any()
+        same_prices = np.isclose(cached_sums.to_numpy(), self._price_sums.reindex(cached_sums.index, fill_value=0.0),
+                                 rtol=1e-12, atol=0.0)
+        changed = cached_rows.index[(cached_rows.to_numpy() != self._row_counts.reindex(cached_rows.index, fill_value=0))
+                                    | ~same_prices]
+        stale = has_new.index[has_new.to_numpy()]
+        if changed.empty and stale.empty:
+            return self._frame
+
+        # Extended companies restart lookback_sessions() before their last cached date
+        extend = stale.difference(changed).intersection(self._last.index)
+        sessions = calendar.sessions
+        tail = np.searchsorted(sessions, self._last.reindex(extend).to_numpy(dtype='datetime64[D]')) - lookback_sessions()
+        full = changed.union(stale.difference(extend)).union(extend[tail < 0])
+        extend = extend[tail >= 0]
+        starts = pd.Series(sessions[tail[tail >= 0]].astype('datetime64[ns]'), index=extend)
+
+        work = df_prices[np.isin(company_ids, full.union(extend))]
+        tail_start = starts.reindex(work['CompanyID']).to_numpy()
+        work = work[np.isnat(tail_start) | (work['Date'].to_numpy() >= tail_start)]
+        df_new = compute_indicators(work, df_dow_jones, self.price_column, calendar)
+
+        # Keep only the sessions after the cached ones for extended companies
+        new_ids = df_new['CompanyID'].to_numpy(dtype=np.int64)
+        cutoff = self._last.reindex(new_ids).to_numpy(dtype='datetime64[ns]')
+        in_full = np.isin(new_ids, full)
+        df_new = df_new[in_full | (df_new['Date'].to_numpy(dtype='datetime64[ns]') > cutoff)]
+
+        df_frame = pd.concat([self._frame[~self._frame['CompanyID'].isin(full)], df_new], ignore_index=True)
+        self._frame = df_frame.sort_values(['CompanyID', 'Date'], kind='mergesort').reset_index(drop=True)
+
+        self._last = self._frame.groupby('CompanyID')['Date'].max()
+        cached = dates <= self._last.reindex(company_ids).to_numpy(dtype='datetime64[ns]')
+        self._row_counts = pd.Series(cached).groupby(company_ids).sum()
+        self._price_sums = pd.Series(np.where(cached, prices, 0.0)).groupby(company_ids).sum()
+        if self.directory:
+            self._save(df_new, full)
+        return self._frame
+
+    def frame(self):
+        return self._frame
+
+    def get(self, company_id):
+        return self._frame[self._frame['CompanyID'] == company_id].reset_index(drop=True)
+
+    def invalidate(self, company_id=None):
+        """Forget one company's rows (or every company's), on disk too, so the next update recomputes them."""
+        if company_id is None:
+            self._reset()
+            if self.directory:
+                shutil.rmtree(self.directory, ignore_errors=True)
+        else:
+            self._frame = self._frame[self._frame['CompanyID'] != company_id].reset_index(drop=True)
+            self._last = self._last.drop(company_id, errors='ignore')
+            self._row_counts = self._row_counts.drop(company_id, errors='ignore')
+            self._price_sums = self._price_sums.drop(company_id, errors='ignore')
+            if self.directory:
+                shutil.rmtree(self._company_dir(company_id), ignore_errors=True)
+                self._save_meta()
@@ -0,0 +1,222 @@
+# parallel_executor.py
+
+"""
+Runs the per-disclosure analyses across a process pool, partitioned by CompanyID.
+
+Every analysis only looks at a company's own stock rows (and the Dow Jones), so the
+disclosures are split into partitions of whole companies and each partition is analysed
+independently. The stock and Dow Jones columns are published once in shared memory; workers
+attach to them when they start and slice out their companies' rows, so no worker receives a
+pickled copy of the stock frame. Partition results are merged back into the original
+disclosure order, which makes the output identical to a single-process run.
+
+    results = parallel_executor.run_analyses(df_disclosure_dates, df_stock_data, df_dow_jones)
+    results["event_study"]
+"""
+
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from utils import app_config
+from . import process_disclosure_dates
+
+# Columns the analyses read (anything else stays in the parent process)
+STOCK_COLUMNS = ("CompanyID", "Date", "Open", "Close", "AdjClose")
+DOW_JONES_COLUMNS = ("Date", "Price")
+
+def _disclosure_rows(df_result):
+    # 'Disclosure Dates' adds a 'Market reopen' row after each closed-market disclosure
+    return np.cumsum(df_result['Reason'].to_numpy() != 'Market reopen') - 1
+
+# Analysis name -> (function, needs the Dow Jones, result row -> disclosure position in the partition)
+ANALYSES = {
+    "disclosure_dates": (process_disclosure_dates.perform_analysis, False, _disclosure_rows),
+    "event_window": (process_disclosure_dates.perform_event_window_analysis, False, None),
+    "event_study": (process_disclosure_dates.perform_event_study, True, None),
+}
+
+# Arrays attached in each worker process: {"stock": {column: array}, "dow_jones": {...}}
+_worker_tables = None
+_worker_blocks = []
+
+# ---- Shared memory ----
+
+def shareable(df, columns):
+    """The columns as fixed-width arrays: Date as datetime64[ns], CompanyID as int64, the rest float64."""
+    data = {}
+    for column in columns:
+        if column == "Date":
+            data[column] = pd.to_datetime(df[column]).to_numpy(dtype='datetime64[ns]')
+        elif column == "CompanyID":
+            data[column] = df[column].to_numpy(dtype=np.int64)
+        else:
+            data[column] = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.DataFrame(data)
+
+def publish(df, columns):
+    """
+    Copy frame columns into shared memory blocks.
+
+    Returns (spec, blocks): spec maps each column to (block name, dtype, length) and is what
+    workers receive; blocks must be closed and unlinked by the caller when the run is over.
+    """
+    spec, blocks = {}, []
+    for column in columns:
+        values = df[column].to_numpy()
+        if values.dtype == object:
+            raise ValueError(f"Column '{column}' has no fixed-width dtype and cannot be shared")
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        blocks.append(block)
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        spec[column] = (block.name, values.dtype.str, len(values))
+    return spec, blocks
+
+def release(blocks):
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+def _attach(name):
+    # The parent owns (and unlinks) the block. Before Python 3.13 attaching always registers it with
+    # the resource tracker, which is harmless here: pool workers share the parent's tracker.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def attach(spec):
+    """Read-only NumPy views of published columns, plus the blocks that back them."""
+    arrays, blocks = {}, []
+    for column, (name, dtype, length) in spec.items():
+        block = _attach(name)
+        blocks.append(block)
+        array = np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        arrays[column] = array
+    return arrays, blocks
+
+def _init_worker(specs):
+    global _worker_tables, _worker_blocks
+    _worker_tables = {}
+    for table, spec in specs.items():
+        _worker_tables[table], blocks = attach(spec)
+        _worker_blocks.extend(blocks)
+
+# ---- Partitioning ----
+
+def _company_slices(company_ids):
+    """{CompanyID: (start, stop)} for rows already sorted by CompanyID."""
+    boundaries = np.flatnonzero(np.diff(company_ids)) + 1
+    starts = np.concatenate([[0], boundaries])
+    stops = np.concatenate([boundaries, [len(company_ids)]])
+    return {int(company_ids[start]): (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+def partition_companies(row_counts, partitions):
+    """
+    Spread companies over partitions with balanced row counts (largest first onto the lightest
+    partition). Deterministic for the same input; empty partitions are dropped.
+    """
+    heap = [(0, index, []) for index in range(max(1, partitions))]
+    for company_id, rows in sorted(row_counts.items(), key=lambda item: (-item[1], item[0])):
+        load, index, companies = heapq.heappop(heap)
+        companies.append(company_id)
+        heapq.heappush(heap, (load + rows, index, companies))
+    return [sorted(companies) for _, _, companies in sorted(heap, key=lambda item: item[1]) if companies]
+
+def _rows_frame(arrays, slices):
+    if not slices:
+        return pd.DataFrame({column: values[:0] for column, values in arrays.items()})
+    return pd.DataFrame({column: np.concatenate([values[start:stop] for start, stop in slices])
+                         for column, values in arrays.items()})
+
+# ---- Execution ----
+
+def _run_partition(names, df_disclosures, slices):
+    """Run the named analyses on one partition in a worker; returns {name: result frame}."""
+    df_stock = _rows_frame(_worker_tables["stock"], slices)
+    df_dow_jones = pd.DataFrame(_worker_tables["dow_jones"]) if "dow_jones" in _worker_tables else None
+
+    results = {}
+    for name in names:
+        function, needs_dow_jones, _ = ANALYSES[name]
+        if needs_dow_jones:
+            results[name] = function(df_disclosures, df_stock, df_dow_jones)
+        else:
+            results[name] = function(df_disclosures, df_stock)
+    return results
+
+def _merge(name, partition_results, partition_positions):
+    """Concatenate partition results in the original disclosure order."""
+    _, _, disclosure_rows = ANALYSES[name]
+    frames, order = [], []
+    for df_result, positions in zip(partition_results, partition_positions):
+        rows = disclosure_rows(df_result) if disclosure_rows else np.arange(len(df_result))
+        frames.append(df_result)
+        order.append(positions[rows])
+
+    df_merged = pd.concat(frames, ignore_index=True)
+    # Stable sort keeps each disclosure's own rows in their original sequence
+    return df_merged.iloc[np.argsort(np.concatenate(order), kind='stable')].reset_index(drop=True)
+
+def run_analyses(df_disclosure_dates, df_stock_data, df_dow_jones=None, names=None, max_workers=None,
+                 partitions_per_worker=None):
+    """
+    Run the named analyses (default: all of ANALYSES) for every disclosure.
+
+    The event study is skipped when no Dow Jones data is given. Small inputs and a single
+    worker run in this process, without shared memory.
+    """
+    names = [name for name in (names or ANALYSES)
+             if not (ANALYSES[name][1] and (df_dow_jones is None or df_dow_jones.empty))]
+    workers = max_workers or app_config.ANALYSIS_MAX_WORKERS or os.cpu_count() or 1
+    if workers == 1 or len(df_stock_data) < app_config.ANALYSIS_PARALLEL_MIN_ROWS:
+        results = {}
+        for name in names:
+            function, needs_dow_jones, _ = ANALYSES[name]
+            args = (df_disclosure_dates, df_stock_data, df_dow_jones) if needs_dow_jones else \
+                   (df_disclosure_dates, df_stock_data)
+            results[name] = function(*args)
+        return results
+
+    df_disclosures = df_disclosure_dates.reset_index(drop=True)
+    disclosure_ids = df_disclosures['ID'].to_numpy(dtype=np.int64)
+
+    # Only companies with disclosures are needed; sorting makes each company one contiguous slice
+    df_stock = shareable(df_stock_data[df_stock_data['CompanyID'].isin(np.unique(disclosure_ids))], STOCK_COLUMNS)
+    df_stock = df_stock.sort_values(['CompanyID', 'Date'], kind='mergesort')
+    slices = _company_slices(df_stock['CompanyID'].to_numpy(dtype=np.int64))
+
+    row_counts = {int(company_id): 0 for company_id in np.unique(disclosure_ids)}
+    row_counts.update({company_id: stop - start for company_id, (start, stop) in slices.items()})
+    per_worker = partitions_per_worker or app_config.ANALYSIS_PARTITIONS_PER_WORKER
+    partitions = partition_companies(row_counts, workers * per_worker)
+
+    specs, blocks = {}, []
+    try:
+        specs["stock"], stock_blocks = publish(df_stock, STOCK_COLUMNS)
+        blocks.extend(stock_blocks)
+        if df_dow_jones is not None and not df_dow_jones.empty:
+            specs["dow_jones"], dow_blocks = publish(shareable(df_dow_jones, DOW_JONES_COLUMNS), DOW_JONES_COLUMNS)
+            blocks.extend(dow_blocks)
+
+        jobs = []
+        for companies in partitions:
+            positions = np.flatnonzero(np.isin(disclosure_ids, companies))
+            company_slices = [slices[company_id] for company_id in companies if company_id in slices]
+            jobs.append((positions, df_disclosures.iloc[positions].reset_index(drop=True), company_slices))
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker,
+                                 initargs=(specs,)) as executor:
+            futures = [executor.submit(_run_partition, names, df_partition, company_slices)
+                       for _, df_partition, company_slices in jobs]
+            partition_results = [future.result() for future in futures]
+    finally:
+        release(blocks)
+
+    positions = [job[0] for job in jobs]
+    return {name: _merge(name, [result[name] for result in partition_results], positions) for name in names}
@@ -0,0 +1,141 @@
+# polygon_async.py
+
+# Python Libraries
+import asyncio
+import collections
+import time
+
+import aiohttp
+
+# Custom Libraries
+from database import db_functions
+from utils import instrumentation
+from . import polygon_requests
+
+# Constants
+MAX_CONCURRENCY = 8  # Requests allowed in flight at once
+REQUESTS_PER_MINUTE = 5  # Global request budget shared by all jobs (free Polygon tier)
+REQUEST_TIMEOUT_SECONDS = 30
+
+# A single (ticker, range) request
+FetchJob = collections.namedtuple('FetchJob', ['ticker', 'from_date', 'to_date', 'multiplier', 'timespan'],
+                                  defaults=(1, 'day'))
+
+class RateLimiter:
+    """Sliding one-minute window shared by every request of a bulk fetch."""
+
+    def __init__(self, requests_per_minute, period=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.period = period
+        self._sent = collections.deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so slots are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= self.period:
+                    self._sent.popleft()
+                if len(self._sent) < self.requests_per_minute:
+                    self._sent.append(now)
+                    return
+                await asyncio.sleep(self.period - (now - self._sent[0]))
+
+def _retry_delay(response, attempt):
+    """Honors Retry-After when the server sends it, otherwise backs off exponentially."""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return polygon_requests.RETRY_WAIT_SECONDS * (2 ** attempt)
+
+async def fetch_json(session, url, limiter, ticker=None):
+    """GETs a URL within the rate budget, retrying on 429/503. Returns the JSON body or None."""
+    # Timed from the first attempt, so rate-limit waits and retries count towards the call
+    started = time.perf_counter() if instrumentation.enabled else None
+    caller = "api_requests.polygon_async.fetch_results"
+
+    for attempt in range(polygon_requests.MAX_RETRIES + 1):
+        await limiter.acquire()
+        async with session.get(url) as response:
+            if response.status == 200:
+                body = await response.read()
+                if started is not None:
+                    polygon_requests.record_call(ticker, started, 200, len(body), attempt, caller)
+                return await response.json()
+
+            if response.status in polygon_requests.RETRY_STATUS_CODES:
+                delay = _retry_delay(response, attempt)
+                print(f"Error {response.status}: Retrying in {delay:.0f} seconds...")
+                await asyncio.sleep(delay)
+                continue
+
+            text = await response.text()
+            polygon_requests.handle_error_status(response.status, text)
+            if started is not None:
+                polygon_requests.record_call(ticker, started, response.status, len(text), attempt, caller)
+            return None
+
+    if started is not None:
+        polygon_requests.record_call(ticker, started, response.status, None, polygon_requests.MAX_RETRIES, caller)
+    return None
+
+async def _fetch_job(session, job, api_key, base_url, limiter, semaphore):
+    async with semaphore:
+        # Each job may span several chunks and next_url pages; they are merged into one response
+        results = []
+        try:
+            for chunk_from, chunk_to in polygon_requests.chunk_date_ranges(job.from_date, job.to_date,
+                                                                           job.multiplier, job.timespan):
+                url = polygon_requests.build_request_url(job.ticker, chunk_from, chunk_to, job.multiplier,
+                                                         job.timespan, api_key=api_key, base_url=base_url)
+                while url:
+                    data = await fetch_json(session, url, limiter, job.ticker)
+                    if data is None:
+                        print(f"Failed to fetch data for {job.ticker}.")
+                        return job, None
+
+                    results.extend(data.get('results', []))
+                    next_url = data.get('next_url')
+                    url = polygon_requests.build_next_url(next_url, api_key) if next_url else None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Request failed for {job.ticker}: {e}")
+            return job, None
+
+        return job, polygon_requests.build_response(job.ticker, results)
+
+async def fetch_results(jobs, api_key=None, base_url=polygon_requests.BASE_URL,
+                        concurrency=MAX_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE):
+    """
+    Async generator over (job, data) pairs, yielded as each request completes.
+
+    All jobs share one HTTP session, at most `concurrency` requests are in flight and the whole
+    batch stays within `requests_per_minute`. `data` is None for jobs that failed.
+    """
+    jobs = [job if isinstance(job, FetchJob) else FetchJob(*job) for job in jobs]
+    if not jobs:
+        return
+
+    api_key = api_key or db_functions.get_polygon_api_key()
+    limiter = RateLimiter(requests_per_minute)
+    semaphore = asyncio.Semaphore(concurrency)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        tasks = [asyncio.ensure_future(_fetch_job(session, job, api_key, base_url, limiter, semaphore))
+                 for job in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Stop outstanding requests if the caller abandons the generator early
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+def fetch_many(jobs, **kwargs):
+    """Blocking wrapper around fetch_results; returns the (job, data) pairs in completion order."""
+    async def collect():
+        return [result async for result in fetch_results(jobs, **kwargs)]
+
+    return asyncio.run(collect())
@@ -0,0 +1,236 @@
+# polygon_cache.py
+
+"""
+On-disk cache of Polygon aggregate bars that only asks the API for what it has not seen.
+
+Bars are stored per (ticker, multiplier, timespan, adjusted) as append-only part files, one per
+fetched range, listed in an index together with the date intervals they cover. A request is
+split into the sub-ranges missing from that coverage, only those are fetched (as a new part),
+and the result is read back from the parts that overlap the request. Days from today on are
+never marked as covered, since their bars can still change; the part holding them is replaced
+when they are fetched again.
+
+    from api_requests import polygon_cache
+    data = polygon_cache.get_api_data("VZ", "2023-01-01", "2023-06-30")   # same shape as polygon_requests
+"""
+
+# Python Libraries
+import datetime
+import gzip
+import json
+import os
+import re
+import threading
+import time
+import zoneinfo
+
+import requests
+
+# Custom Libraries
+from . import polygon_requests
+
+# Constants
+CACHE_DIR = os.path.join('cache', 'polygon')
+INDEX_FILE = 'index.json'
+MARKET_TIMEZONE = zoneinfo.ZoneInfo('America/New_York')  # Polygon's date ranges are in exchange time
+
+# Guards the index files only; fetching and reading parts happen outside it
+_lock = threading.Lock()
+
+def _ticker_dir(ticker, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, re.sub(r'[^A-Za-z0-9.\-]', '_', ticker))
+
+def cache_path(ticker, multiplier=1, timespan='day', adjusted=True, cache_dir=CACHE_DIR):
+    """Directory holding one (ticker, multiplier, timespan, adjusted) series: the index and its parts."""
+    adjustment = 'adjusted' if adjusted else 'raw'
+    return os.path.join(_ticker_dir(ticker, cache_dir), f"{multiplier}-{timespan}-{adjustment}")
+
+def _write_atomic(path, write):
+    # Written to a temporary file first so an interrupted run never leaves a truncated file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f"{path}.partial"
+    write(partial)
+    os.replace(partial, path)
+
+def _load_index(path):
+    """Part entries ({'file', 'from', 'to', 'covered'}) in the order they were written."""
+    index_path = os.path.join(path, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return []
+    try:
+        with open(index_path, encoding='utf-8') as f:
+            return json.load(f)['parts']
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[!!] Ignoring unreadable Polygon cache index '{index_path}': {e}")
+        return []
+
+def _save_index(path, parts):
+    def write(partial):
+        with open(partial, 'w', encoding='utf-8') as f:
+            json.dump({'parts': parts}, f, separators=(',', ':'))
+    _write_atomic(os.path.join(path, INDEX_FILE), write)
+
+def _load_part(path, entry):
+    if not entry['file']:
+        return []
+    part_path = os.path.join(path, entry['file'])
+    try:
+        with gzip.open(part_path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[!!] Ignoring unreadable Polygon cache part '{part_path}': {e}")
+        return []
+
+def _save_part(path, bars):
+    """Write one fetched range as a new part file; returns its name (None when there are no bars)."""
+    if not bars:
+        return None
+    name = f"part-{time.time_ns()}.json.gz"
+
+    def write(partial):
+        with gzip.open(partial, 'wt', encoding='utf-8') as f:
+            json.dump(bars, f, separators=(',', ':'))
+    _write_atomic(os.path.join(path, name), write)
+    return name
+
+def _date(value):
+    return datetime.date.fromisoformat(str(value)[:10])
+
+def _bar_date(bar):
+    return datetime.datetime.fromtimestamp(bar['t'] / 1000, MARKET_TIMEZONE).date()
+
+def merge_intervals(intervals):
+    """Sorted, non-overlapping (from, to) date pairs; touching intervals are joined."""
+    merged = []
+    for start, end in sorted((_date(start), _date(end)) for start, end in intervals):
+        if merged and start <= merged[-1][1] + datetime.timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+def missing_ranges(intervals, from_date, to_date):
+    """The parts of [from_date, to_date] not covered by `intervals`, as (from, to) dates."""
+    start, end = _date(from_date), _date(to_date)
+    missing = []
+    for covered_start, covered_end in merge_intervals(intervals):
+        if covered_end < start or covered_start > end:
+            continue
+        if covered_start > start:
+            missing.append((start, covered_start - datetime.timedelta(days=1)))
+        start = max(start, covered_end + datetime.timedelta(days=1))
+    if start <= end:
+        missing.append((start, end))
+    return missing
+
+def covered_intervals(parts):
+    return [entry['covered'] for entry in parts if entry['covered']]
+
+def _replace_uncovered(parts, entries):
+    """
+    Append new part entries, dropping earlier uncovered parts (days from today on) that lie inside
+    a new entry's range, since it fetched those days again. Returns the index and the dropped files.
+    """
+    def replaced(entry):
+        return entry['covered'] is None and any(
+            _date(new['from']) <= _date(entry['from']) and _date(entry['to']) <= _date(new['to']) for new in entries)
+
+    kept = [entry for entry in parts if not replaced(entry)]
+    dropped = [entry['file'] for entry in parts if replaced(entry) and entry['file']]
+    return kept + entries, dropped
+
+def fetch_range(ticker, from_date, to_date, multiplier=1, timespan='day', api_key=None,
+                base_url=polygon_requests.BASE_URL):
+    """Every bar in one range, or None if any page failed (so a partial range is never cached)."""
+    bars = []
+    try:
+        for batch in polygon_requests.iter_api_data(ticker, from_date, to_date, multiplier, timespan,
+                                                    api_key=api_key, base_url=base_url):
+            bars.extend(batch)
+    except (polygon_requests.PolygonRequestError, requests.RequestException) as e:
+        print(e)
+        return None
+    return bars
+
+def get_bars(ticker, from_date, to_date, multiplier=1, timespan='day', api_key=None,
+             base_url=polygon_requests.BASE_URL, cache_dir=CACHE_DIR):
+    """
+    Bars for the range, fetching only the sub-ranges the cache does not cover yet.
+
+    Returns None when a missing range could not be fetched; ranges fetched before the failure
+    stay cached.
+    """
+    # build_request_url always asks for split-adjusted bars
+    path = cache_path(ticker, multiplier, timespan, adjusted=True, cache_dir=cache_dir)
+    start, end = _date(from_date), _date(to_date)
+    today = datetime.datetime.now(MARKET_TIMEZONE).date()
+
+    with _lock:
+        missing = missing_ranges(covered_intervals(_load_index(path)), start, end)
+
+    # Network I/O happens outside the lock, so other tickers are never held up
+    fetched, failed = [], False
+    if missing:
+        from database import db_functions
+
+        api_key = api_key or db_functions.get_polygon_api_key()
+        for missing_from, missing_to in missing:
+            print(f"Fetching {ticker} {missing_from} to {missing_to} from Polygon...")
+            bars = fetch_range(ticker, missing_from.isoformat(), missing_to.isoformat(), multiplier, timespan,
+                               api_key=api_key, base_url=base_url)
+            if bars is None:
+                failed = True
+                break
+            # Today's (and later) bars are still forming, so they are fetched again next time
+            covered_to = min(missing_to, today - datetime.timedelta(days=1))
+            covered = [missing_from.isoformat(), covered_to.isoformat()] if covered_to >= missing_from else None
+            fetched.append({'from': missing_from.isoformat(), 'to': missing_to.isoformat(), 'covered': covered,
+                            'bars': bars})
+
+    parts = None
+    if fetched:
+        # Parts are written first; the lock is only taken to add them to the (re-read) index
+        entries = [{'file': _save_part(path, entry.pop('bars')), **entry} for entry in fetched]
+        with _lock:
+            parts, dropped = _replace_uncovered(_load_index(path), entries)
+            _save_index(path, parts)
+        for name in dropped:
+            try:
+                os.remove(os.path.join(path, name))
+            except FileNotFoundError:
+                pass
+
+    if failed:
+        print(f"Failed to fetch {ticker} bars; the ranges fetched so far are cached.")
+        return None
+
+    if parts is None:
+        with _lock:
+            parts = _load_index(path)
+
+    # Later parts win, so a re-fetched (still forming) day replaces the older bar
+    bars = {}
+    for entry in parts:
+        if _date(entry['from']) <= end and _date(entry['to']) >= start:
+            bars.update((bar['t'], bar) for bar in _load_part(path, entry))
+    return [bars[t] for t in sorted(bars) if start <= _bar_date(bars[t]) <= end]
+
+def get_api_data(ticker, from_date, to_date, multiplier=1, timespan='day', api_key=None,
+                 base_url=polygon_requests.BASE_URL, cache_dir=CACHE_DIR):
+    """Cached drop-in for polygon_requests.get_api_data (same aggregates response shape)."""
+    results = get_bars(ticker, from_date, to_date, multiplier, timespan, api_key=api_key, base_url=base_url,
+                       cache_dir=cache_dir)
+    if not results:
+        if results is not None:
+            print(f"No data returned for {ticker}.")
+        return None
+    return polygon_requests.build_response(ticker, results)
+
+def clear(ticker=None, cache_dir=CACHE_DIR):
+    """Delete the cached bars of one ticker (or every ticker)."""
+    import shutil
+
+    target = _ticker_dir(ticker, cache_dir) if ticker else cache_dir
+    with _lock:
+        if os.path.isdir(target):
+            shutil.rmtree(target)
@@ -1,27 +1,70 @@
 # Python Libraries
+import datetime
+import math
 import requests
 import time
 
 # Custom Libraries
 from database import db_functions
+from utils import instrumentation
 
 # Constants
 BASE_URL = 'https://api.polygon.io'
 RETRY_STATUS_CODES = [429, 503]  # Status codes that trigger a retry
 MAX_RETRIES = 3  # Number of retry attempts
 RETRY_WAIT_SECONDS = 5  # Wait time between retries in seconds
+MAX_LIMIT = 50000  # Maximum number of base bars Polygon returns per aggregates request
+REQUEST_TIMEOUT_SECONDS = 30  # Connect/read timeout per page, so a stalled connection cannot hang a fetch
+
+# Upper bound on bars per calendar day for each timespan (minute bars include pre/post market, 4:00-20:00)
+BARS_PER_DAY = {
+    'second': 16 * 60 * 60,
+    'minute': 16 * 60,
+    'hour': 16,
+    'day': 1,
+    'week': 1 / 7,
+    'month': 1 / 28,
+    'quarter': 1 / 90,
+    'year': 1 / 365
+}
+
+class PolygonRequestError(Exception):
+    """A page of a Polygon request failed, so the bars streamed so far are incomplete."""
 
 # Function to build the Polygon API URL
-def build_request_url(ticker, from_date, to_date, multiplier=1, timespan='day'):
+def build_request_url(ticker, from_date, to_date, multiplier=1, timespan='day', api_key=None, base_url=BASE_URL,
+                      limit=MAX_LIMIT):
     """Builds the API request URL for Polygon API."""
-    API_KEY = db_functions.get_polygon_api_key()
-    return f"{BASE_URL}/v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/{from_date}/{to_date}?adjusted=true&sort=asc&limit=120&apiKey={API_KEY}"
+    API_KEY = api_key or db_functions.get_polygon_api_key()
+    return f"{base_url}/v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/{from_date}/{to_date}?adjusted=true&sort=asc&limit={limit}&apiKey={API_KEY}"
+
+def build_next_url(next_url, api_key):
+    """Polygon's next_url cursors do not carry the API key, so it has to be appended again."""
+    separator = '&' if '?' in next_url else '?'
+    return f"{next_url}{separator}apiKey={api_key}"
+
+def chunk_date_ranges(from_date, to_date, multiplier=1, timespan='day'):
+    """
+    Splits a date range into the fewest sub-ranges that each stay under the per-request bar limit.
+    Yields (from_date, to_date) pairs as 'YYYY-MM-DD' strings.
+    """
+    start = datetime.date.fromisoformat(str(from_date))
+    end = datetime.date.fromisoformat(str(to_date))
+    bars_per_day = BARS_PER_DAY.get(timespan, 1) / multiplier
+    chunk_days = max(1, math.floor(MAX_LIMIT / bars_per_day))
+
+    while start <= end:
+        chunk_end = min(end, start + datetime.timedelta(days=chunk_days - 1))
+        yield start.isoformat(), chunk_end.isoformat()
+        start = chunk_end + datetime.timedelta(days=1)
 
 # Function to handle error responses from the API
 def handle_error(response):
     """Handles API errors based on status codes."""
-    status_code = response.status_code
+    handle_error_status(response.status_code, response.text)
 
+def handle_error_status(status_code, text=""):
+    """Prints a message for an API error status code."""
     if status_code == 400:
         print(f"Bad Request (400): Invalid parameters provided. Please check your inputs.")
     elif status_code == 401:
@@ -37,19 +80,27 @@ def handle_error(response):
     elif status_code == 503:
         print(f"Service Unavailable (503): The service is temporarily unavailable. Please try again later.")
     else:
-        print(f"Unexpected Error ({status_code}): {response.text}")
+        print(f"Unexpected Error ({status_code}): {text}")
 
-# Function to fetch aggregate data from Polygon API
-def get_api_data(ticker, from_date, to_date, multiplier=1, timespan='day'):
-    """Fetches stock data from the Polygon API with retry mechanism for certain errors."""
-    url = build_request_url(ticker, from_date, to_date, multiplier, timespan)
+def record_call(ticker, started, status_code, nbytes=None, retries=0, caller=None):
+    """Records one Polygon request with the instrumentation registry (the URL is left out, it holds the key)."""
+    instrumentation.record("http", f"GET aggs/{ticker}", time.perf_counter() - started,
+                           caller=caller or instrumentation.caller_name(skip=(__file__,)), nbytes=nbytes,
+                           retries=retries, status="ok" if status_code == 200 else f"http {status_code}")
+
+# Function to GET one page from the Polygon API
+def request_json(url, ticker):
+    """Fetches one page from the Polygon API with retry mechanism for certain errors."""
     retries = 0
+    started = time.perf_counter() if instrumentation.enabled else None
 
     while retries <= MAX_RETRIES:
-        response = requests.get(url)
+        response = requests.get(url, timeout=REQUEST_TIMEOUT_SECONDS)
 
         # Handle successful response
         if response.status_code == 200:
+            if started is not None:
+                record_call(ticker, started, 200, len(response.content), retries)
             return response.json()  # Return the API response in JSON format
 
         # Handle specific response codes
@@ -61,7 +112,64 @@ def get_api_data(ticker, from_date, to_date, multiplier=1, timespan='day'):
         else:
             # For other errors, handle them and break
             handle_error(response)
-            break
+            if started is not None:
+                record_call(ticker, started, response.status_code, len(response.content), retries)
+            return None
 
     print(f"Max retries reached. Failed to fetch data for {ticker}.")
-    return None
\ No newline at end of file
+    if started is not None:
+        record_call(ticker, started, response.status_code, len(response.content), retries - 1)
+    return None
+
+# Function to stream aggregate bars from Polygon API
+def iter_api_data(ticker, from_date, to_date, multiplier=1, timespan='day', api_key=None, base_url=BASE_URL):
+    """
+    Generator over batches (lists) of aggregate bars for the whole range.
+
+    Long ranges are split into chunks under the bar limit and every next_url cursor is followed,
+    so callers can persist each batch as it arrives. Raises PolygonRequestError when a page
+    fails, so a failed stream is never mistaken for the end of the data.
+    """
+    api_key = api_key or db_functions.get_polygon_api_key()
+
+    for chunk_from, chunk_to in chunk_date_ranges(from_date, to_date, multiplier, timespan):
+        url = build_request_url(ticker, chunk_from, chunk_to, multiplier, timespan, api_key=api_key, base_url=base_url)
+        while url:
+            data = request_json(url, ticker)
+            if data is None:
+                raise PolygonRequestError(f"Failed to fetch {ticker} bars for {chunk_from} to {chunk_to}.")
+
+            if data.get('results'):
+                yield data['results']
+
+            next_url = data.get('next_url')
+            url = build_next_url(next_url, api_key) if next_url else None
+
+# Function to fetch aggregate data from Polygon API
+def get_api_data(ticker, from_date, to_date, multiplier=1, timespan='day', api_key=None, base_url=BASE_URL):
+    """Fetches every bar in the range from the Polygon API as a single aggregates response (None on failure)."""
+    results = []
+    try:
+        for batch in iter_api_data(ticker, from_date, to_date, multiplier, timespan, api_key=api_key,
+                                   base_url=base_url):
+            results.extend(batch)
+    except (PolygonRequestError, requests.RequestException) as e:
+        print(e)
+        return None
+
+    if not results:
+        print(f"No data returned for {ticker}.")
+        return None
+
+    return build_response(ticker, results)
+
+def build_response(ticker, results, adjusted=True):
+    """Wraps merged bars in the shape of a single Polygon aggregates response."""
+    return {
+        'ticker': ticker,
+        'queryCount': len(results),
+        'resultsCount': len(results),
+        'adjusted': adjusted,
+        'status': 'OK',
+        'results': results
+    }
@@ -0,0 +1,63 @@
+# compare.py
+#
+# Compares two benchmark result files (from run_benchmarks.py) by median time and exits
+# non-zero when any benchmark got slower than the threshold.
+#
+#   python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json --threshold 0.10
+
+import argparse
+import json
+import sys
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def compare(base, new, threshold):
+    """Rows of (name, base median, new median, relative change, regressed) for the shared benchmarks."""
+    rows = []
+    for name, result in new["results"].items():
+        if name not in base["results"]:
+            continue
+        before, after = base["results"][name]["median"], result["median"]
+        change = (after - before) / before if before > 0 else 0.0
+        rows.append((name, before, after, change, change > threshold))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base", help="results of the baseline commit")
+    parser.add_argument("new", help="results to check")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown that counts as a regression (default 0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    base, new = load(args.base), load(args.new)
+    print(f"Base: {base['meta']['commit']} ({base['meta']['timestamp']})   "
+          f"New: {new['meta']['commit']} ({new['meta']['timestamp']})")
+    for key in ("backend", "scale", "platform"):
+        if base["meta"].get(key) != new["meta"].get(key):
+            print(f"[!!] Runs differ in {key}: {base['meta'].get(key)} vs {new['meta'].get(key)}")
+
+    rows = compare(base, new, args.threshold)
+    print(f"\n{'Benchmark':<48} {'Base (s)':>10} {'New (s)':>10} {'Change':>9}")
+    for name, before, after, change, regressed in rows:
+        flag = "  [!!]" if regressed else ""
+        print(f"{name:<48} {before:>10.4f} {after:>10.4f} {change:>+8.1%}{flag}")
+
+    only_base = sorted(set(base["results"]) - set(new["results"]))
+    only_new = sorted(set(new["results"]) - set(base["results"]))
+    if only_base:
+        print(f"\nOnly in base: {', '.join(only_base)}")
+    if only_new:
+        print(f"Only in new: {', '.join(only_new)}")
+
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"\n[!!] {len(regressions)} benchmark(s) slower than the {args.threshold:.0%} threshold.")
+        return 1
+    print(f"\n[OK] No benchmark slower than the {args.threshold:.0%} threshold.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+# run_benchmarks.py
+#
+# Times the analysis and data-access hot paths on deterministic synthetic data and stores the
+# results as JSON under benchmarks/results/, so runs can be compared across commits with
+# benchmarks/compare.py.
+#
+#   python -m benchmarks.run_benchmarks                          in-memory stand-in (no database)
+#   python -m benchmarks.run_benchmarks --backend mysql          also the retrieve_* functions and
+#                                                                duplicate removal on a scratch MySQL database
+#   python -m benchmarks.run_benchmarks --backend sqlite         the same on a scratch SQLite file
+#   python -m benchmarks.run_benchmarks --companies 200 --years 10 --disclosures 3 --repeat 5
+#
+# The memory backend builds the typed frames straight from row tuples (the same conversion the
+# retrieve_* functions run on cursor results) and times the analysis and exports on them.
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from analysis import indicators, parallel_executor, process_disclosure_dates
+from benchmarks import synthetic_data
+from database import db_config, db_types
+from utils import export_func
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+SCHEMA_FILE = os.path.join(ROOT, "sql", "database_scheme.sql")
+BACKENDS = ("memory", "mysql", "sqlite")
+
+def measure(function, repeat, setup=None):
+    """Run function `repeat` times (after an untimed setup each time) and summarize the wall times."""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        # Keep the functions' progress messages out of the timings and the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            function()
+            runs.append(time.perf_counter() - started)
+    return {"runs": runs, "min": min(runs), "median": statistics.median(runs), "mean": statistics.fmean(runs)}
+
+def bench(results, name, function, repeat, setup=None):
+    results[name] = measure(function, repeat, setup)
+    print(f"  {name:<48} median {results[name]['median']:>9.4f}s   min {results[name]['min']:>9.4f}s")
+
+def memory_benchmarks(tables, repeat, results, export_formats):
+    stock_rows = synthetic_data.table_rows(tables["stock_data"])
+    dow_rows = synthetic_data.table_rows(tables["dow_jones"])
+    bench(results, "to_frame stock_data", lambda: db_types.to_frame(stock_rows, db_types.STOCK_DATA_TYPES), repeat)
+    bench(results, "to_frame dow_jones", lambda: db_types.to_frame(dow_rows, db_types.DOW_JONES_TYPES), repeat)
+
+    frames = synthetic_data.analysis_frames(tables)
+    disclosures, stock, dow = frames["disclosure_dates"], frames["stock_data"], frames["dow_jones"]
+    bench(results, "perform_analysis", lambda: process_disclosure_dates.perform_analysis(disclosures, stock), repeat)
+    bench(results, "perform_event_window_analysis",
+          lambda: process_disclosure_dates.perform_event_window_analysis(disclosures, stock), repeat)
+    bench(results, "perform_event_study",
+          lambda: process_disclosure_dates.perform_event_study(disclosures, stock, dow), repeat)
+    # All three through the process pool (in-process below ANALYSIS_PARALLEL_MIN_ROWS or with one CPU)
+    bench(results, "run_analyses (parallel executor)",
+          lambda: parallel_executor.run_analyses(disclosures, stock, dow), repeat)
+
+    bench(results, "compute_indicators", lambda: indicators.compute_indicators(stock, dow), repeat)
+    # Indicators cached up to a week ago, then extended with the last five sessions
+    cutoff = sorted(stock['Date'].unique())[-5]
+    cache = indicators.IndicatorCache()
+    bench(results, "IndicatorCache.update (5 new sessions)", lambda: cache.update(stock, dow), repeat,
+          setup=lambda: (cache.invalidate(), cache.update(stock[stock['Date'] < cutoff], dow)))
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for fmt in export_formats:
+            bench(results, f"export stock_data ({fmt})",
+                  lambda: export_func.export(stock, f"stock_data.{fmt}", fmt, output_dir), repeat)
+
+def load_mysql(tables, database):
+    """Create a scratch database from sql/database_scheme.sql and bulk load the synthetic tables."""
+    import mysql.connector
+
+    connection = mysql.connector.connect(host=db_config.DB_HOST, user=db_config.DB_USER,
+                                         password=db_config.DB_PASSWORD)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+        cursor.execute(f"CREATE DATABASE `{database}`")
+        cursor.execute(f"USE `{database}`")
+        with open(SCHEMA_FILE) as f:
+            for statement in f.read().split(";"):
+                if statement.strip():
+                    cursor.execute(statement)
+
+        for table in synthetic_data.TABLE_ORDER:
+            columns = synthetic_data.TABLE_COLUMNS[table]
+            query = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                     f"VALUES ({', '.join(['%s'] * len(columns))})")
+            rows = synthetic_data.table_rows(tables[table][columns])
+            for start in range(0, len(rows), db_config.DB_INGEST_BATCH_SIZE):
+                cursor.executemany(query, rows[start:start + db_config.DB_INGEST_BATCH_SIZE])
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
+
+def load_sqlite(tables, path):
+    """Create a scratch SQLite file from sql/database_scheme.sql and bulk load the synthetic tables."""
+    import sqlite3
+    from database import db_sqlite
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    connection = sqlite3.connect(path)
+    try:
+        with open(SCHEMA_FILE) as f:
+            for statement in db_sqlite.translate_dump(f.read(), rows=False):
+                connection.execute(statement)
+        for table in synthetic_data.TABLE_ORDER:
+            columns = synthetic_data.TABLE_COLUMNS[table]
+            query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+            connection.executemany(query, synthetic_data.table_rows(tables[table][columns]))
+        connection.commit()
+    finally:
+        connection.close()
+
+def _drop_stock_keys_mysql(cursor):
+    # The foreign key relies on the primary key's index, so it goes first
+    cursor.execute("""
+        SELECT CONSTRAINT_NAME, CONSTRAINT_TYPE FROM information_schema.TABLE_CONSTRAINTS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'stock_data'
+          AND CONSTRAINT_TYPE IN ('PRIMARY KEY', 'UNIQUE', 'FOREIGN KEY')
+        ORDER BY CONSTRAINT_TYPE = 'FOREIGN KEY' DESC
+    """)
+    for name, kind in cursor.fetchall():
+        if kind == "FOREIGN KEY":
+            cursor.execute(f"ALTER TABLE stock_data DROP FOREIGN KEY `{name}`")
+        elif kind == "PRIMARY KEY":
+            cursor.execute("ALTER TABLE stock_data DROP PRIMARY KEY")
+        else:
+            cursor.execute(f"ALTER TABLE stock_data DROP INDEX `{name}`")
+
+def _drop_stock_keys_sqlite(cursor):
+    # SQLite cannot drop a primary key, so the table is rebuilt without keys (column types kept)
+    cursor.execute("ALTER TABLE stock_data RENAME TO stock_data_keyed")
+    cursor.execute("""
+        CREATE TABLE stock_data (CompanyID int(11), Date date, Open decimal(15,6), High decimal(15,6),
+                                 Low decimal(15,6), Close decimal(15,6), AdjClose decimal(15,6), Volume int(11))
+    """)
+    cursor.execute("INSERT INTO stock_data SELECT * FROM stock_data_keyed")
+    cursor.execute("DROP TABLE stock_data_keyed")
+
+def database_benchmarks(tables, repeat, results, backend, database):
+    from database import db_check_stock_records, db_functions
+    from database import db_connection as db
+
+    started = time.perf_counter()
+    if backend == "sqlite":
+        path = os.path.abspath(database if database.endswith(".sqlite3") else database + ".sqlite3")
+        load_sqlite(tables, path)
+        print(f"  Loaded synthetic data into '{path}' in {time.perf_counter() - started:.1f}s")
+        db_config.DB_SQLITE_PATH = path
+    else:
+        if database == db_config.DB_DATABASE:
+            raise SystemExit(f"Refusing to benchmark against the application database '{database}'.")
+        load_mysql(tables, database)
+        print(f"  Loaded synthetic data into '{database}' in {time.perf_counter() - started:.1f}s")
+        db_config.DB_DATABASE = database
+
+    # Everything below goes through the normal db_connection checkout, pointed at the scratch database
+    db_config.DB_BACKEND = backend
+    db_config.DB_CACHE_ENABLED = False
+    db_config.DB_QUERY_CACHE_ENABLED = False  # Time the queries themselves, not the memoized copies
+
+    bench(results, "retrieve_company_info", db_functions.retrieve_company_info, repeat)
+    bench(results, "retrieve_company_disclosure_dates", db_functions.retrieve_company_disclosure_dates, repeat)
+    bench(results, "retrieve_stock_data", db_functions.retrieve_stock_data, repeat)
+    bench(results, "retrieve_dow_jones_data", db_functions.retrieve_dow_jones_data, repeat)
+    bench(results, "retrieve_stock_price_and_dow_jones_data",
+          db_functions.retrieve_stock_price_and_dow_jones_data, repeat)
+    bench(results, "iter_stock_price_and_dow_jones_data",
+          lambda: sum(len(chunk) for chunk in db_functions.iter_stock_price_and_dow_jones_data()), repeat)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        db_config.DB_CACHE_ENABLED = True
+        db_config.DB_CACHE_DIR = cache_dir
+        db_config.DB_CACHE_REFRESH_SECONDS = 3600
+        bench(results, "retrieve_stock_data (cache cold)", db_functions.retrieve_stock_data, 1)
+        bench(results, "retrieve_stock_data (cache warm)", db_functions.retrieve_stock_data, repeat)
+
+        # Duplicate removal: each run starts from the same number of exact copies, without the key
+        duplicates = synthetic_data.table_rows(synthetic_data.duplicate_rows(tables["stock_data"]))
+        columns = synthetic_data.TABLE_COLUMNS["stock_data"]
+        insert = f"INSERT INTO stock_data ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+
+        drop_keys = _drop_stock_keys_sqlite if backend == "sqlite" else _drop_stock_keys_mysql
+
+        def add_duplicates():
+            with db.pooled_connection() as connection:
+                cursor = connection.cursor()
+                drop_keys(cursor)
+                cursor.executemany(insert, duplicates)
+                connection.commit()
+                cursor.close()
+
+        def remove_duplicates():
+            with db.pooled_connection() as connection:
+                db_check_stock_records.remove_duplicate_rows(connection)
+
+        bench(results, f"remove_duplicate_rows ({len(duplicates)} copies)", remove_duplicates, repeat,
+              setup=add_duplicates)
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Tauronix hot paths on synthetic data.")
+    parser.add_argument("--backend", choices=BACKENDS, default="memory")
+    parser.add_argument("--companies", type=int, default=20)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--disclosures", type=int, default=2, help="disclosures per company")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark")
+    parser.add_argument("--exports", nargs="*", choices=export_func.FORMATS, default=list(export_func.FORMATS),
+                        help="export formats to time")
+    parser.add_argument("--database", help="scratch MySQL database or SQLite file (dropped and recreated; default: "
+                                           f"'{db_config.DB_BENCHMARK_DATABASE}', a temporary file for SQLite)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    scale = {"companies": args.companies, "years": args.years, "disclosures": args.disclosures, "seed": args.seed}
+    started = time.perf_counter()
+    tables = synthetic_data.generate(**scale)
+    print(f"Generated {len(tables['stock_data'])} stock rows, {len(tables['dow_jones'])} Dow Jones rows and "
+          f"{len(tables['data_breach_disclosures'])} disclosures in {time.perf_counter() - started:.1f}s")
+
+    results = {}
+    print("\nIn-memory benchmarks:")
+    memory_benchmarks(tables, args.repeat, results, args.exports)
+    if args.backend == "sqlite" and not args.database:
+        # The scratch file lives in a temporary directory, so no copy is left in the working directory
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            print("\nSQLite benchmarks:")
+            database_benchmarks(tables, args.repeat, results, args.backend,
+                                os.path.join(scratch_dir, db_config.DB_BENCHMARK_DATABASE))
+    elif args.backend != "memory":
+        print(f"\n{'SQLite' if args.backend == 'sqlite' else 'MySQL'} benchmarks:")
+        database_benchmarks(tables, args.repeat, results, args.backend, args.database or db_config.DB_BENCHMARK_DATABASE)
+
+    commit, dirty = git_revision()
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "backend": args.backend,
+            "scale": scale,
+            "rows": {table: len(df) for table, df in tables.items()},
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to '{output}'.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
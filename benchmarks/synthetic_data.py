@@ -0,0 +1,122 @@
+# synthetic_data.py
+#
+# Deterministic synthetic data for the benchmarks: N companies x Y years of daily bars on the
+# NYSE calendar, a Dow Jones series that drives them through a market model, and D breach
+# disclosures per company. The same arguments always produce the same tables.
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from database import db_types
+from utils import trading_calendar
+
+# Table columns in database order (see sql/database_scheme.sql)
+TABLE_COLUMNS = {
+    "company_info": ["CompanyID", "CompanyName", "Location", "StockSymbol"],
+    "data_breach_disclosures": ["DisclosureID", "CompanyID", "DisclosureDate"],
+    "dow_jones": ["Date", "Price", "Open", "High", "Low", "Volume", "Change_Percent"],
+    "stock_data": ["CompanyID", "Date", "Open", "High", "Low", "Close", "AdjClose", "Volume"],
+}
+TABLE_ORDER = ("company_info", "data_breach_disclosures", "dow_jones", "stock_data")
+
+LOCATIONS = ["New York, New York, USA", "Austin, Texas, USA", "Atlanta, Georgia, USA",
+             "San Francisco, California, USA", "Seattle, Washington, USA", "Chicago, Illinois, USA"]
+
+END_YEAR = 2023  # Fixed so the generated sessions do not depend on today's date
+ESTIMATION_DAYS = 260  # Disclosures leave room for the event study estimation window
+EVENT_DAYS = 15
+
+def _ohlc(rng, close, spread):
+    # Open/High/Low around a close series
+    open_ = close * (1 + rng.normal(0, spread, len(close)))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, spread, len(close))))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, spread, len(close))))
+    return open_, high, low
+
+def generate(companies=20, years=5, disclosures=2, seed=42, end_year=END_YEAR):
+    """Returns {table name: DataFrame} with the columns in TABLE_COLUMNS."""
+    rng = np.random.default_rng(seed)
+    sessions = trading_calendar.get_calendar().sessions_between(
+        datetime.date(end_year - years + 1, 1, 1), datetime.date(end_year, 12, 31))
+    days = len(sessions)
+
+    # Dow Jones: geometric random walk
+    market_returns = rng.normal(0.0003, 0.01, days)
+    dow_close = 30000 * np.exp(np.cumsum(market_returns))
+    dow_open, dow_high, dow_low = _ohlc(rng, dow_close, 0.004)
+    dow_jones = pd.DataFrame({
+        "Date": sessions.astype(datetime.date),
+        "Price": dow_close.round(2),
+        "Open": dow_open.round(2),
+        "High": dow_high.round(2),
+        "Low": dow_low.round(2),
+        "Volume": [f"{volume:.2f}M" for volume in rng.uniform(200, 450, days)],
+        "Change_Percent": np.concatenate([[0.0], np.diff(dow_close) / dow_close[:-1] * 100]).round(2),
+    })
+
+    company_ids = np.arange(1, companies + 1)
+    company_info = pd.DataFrame({
+        "CompanyID": company_ids,
+        "CompanyName": [f"Synthetic Company {company_id:04d} Inc." for company_id in company_ids],
+        "Location": [LOCATIONS[company_id % len(LOCATIONS)] for company_id in company_ids],
+        "StockSymbol": [f"S{company_id:04d}" for company_id in company_ids],
+    })
+
+    # Stocks follow a market model: r = alpha + beta * r_market + noise
+    betas = rng.uniform(0.5, 1.5, companies)
+    noise = rng.normal(0, 0.015, (companies, days))
+    returns = betas[:, None] * market_returns[None, :] + noise
+    close = rng.uniform(20, 300, companies)[:, None] * np.exp(np.cumsum(returns, axis=1))
+    stock_open, stock_high, stock_low = _ohlc(rng, close.ravel(), 0.006)
+    stock_data = pd.DataFrame({
+        "CompanyID": np.repeat(company_ids, days),
+        "Date": np.tile(sessions.astype(datetime.date), companies),
+        "Open": stock_open.round(6),
+        "High": stock_high.round(6),
+        "Low": stock_low.round(6),
+        "Close": close.ravel().round(6),
+        "AdjClose": close.ravel().round(6),
+        "Volume": rng.integers(100_000, 20_000_000, companies * days),
+    })
+
+    # Disclosures fall on any calendar day (weekends roll forward) with a full event window around them
+    first = sessions[min(ESTIMATION_DAYS, days - 1)].astype(datetime.date)
+    last = sessions[max(days - EVENT_DAYS, 0)].astype(datetime.date)
+    offsets = rng.integers(0, max((last - first).days, 1), companies * disclosures)
+    disclosure_dates = [first + datetime.timedelta(days=int(offset)) for offset in offsets]
+    data_breach_disclosures = pd.DataFrame({
+        "DisclosureID": np.arange(1, companies * disclosures + 1),
+        "CompanyID": np.repeat(company_ids, disclosures),
+        "DisclosureDate": disclosure_dates,
+    })
+
+    return {
+        "company_info": company_info,
+        "data_breach_disclosures": data_breach_disclosures,
+        "dow_jones": dow_jones,
+        "stock_data": stock_data,
+    }
+
+def duplicate_rows(stock_data, fraction=0.01, seed=42):
+    """A deterministic sample of exact stock_data copies to insert for the dedupe benchmark."""
+    count = max(1, int(len(stock_data) * fraction))
+    return stock_data.sample(n=count, random_state=seed).sort_values(["CompanyID", "Date"])
+
+def table_rows(df):
+    """Plain Python row tuples, as a cursor would return them."""
+    return list(df.astype(object).itertuples(index=False, name=None))
+
+def analysis_frames(tables):
+    """The typed frames the retrieve_* functions return, built without a database."""
+    disclosures = tables["data_breach_disclosures"].merge(tables["company_info"], on="CompanyID")
+    disclosures = disclosures.sort_values(["DisclosureDate", "DisclosureID"])
+    disclosure_rows = disclosures[["CompanyID", "CompanyName", "StockSymbol", "DisclosureDate"]]
+
+    return {
+        "company_info": db_types.to_frame(table_rows(tables["company_info"]), db_types.COMPANY_INFO_TYPES),
+        "disclosure_dates": db_types.to_frame(table_rows(disclosure_rows), db_types.DISCLOSURE_DATE_TYPES),
+        "stock_data": db_types.to_frame(table_rows(tables["stock_data"]), db_types.STOCK_DATA_TYPES),
+        "dow_jones": db_types.to_frame(table_rows(tables["dow_jones"]), db_types.DOW_JONES_TYPES),
+    }
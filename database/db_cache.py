@@ -0,0 +1,213 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+from . import db_config, db_types
+from . import db_connection as db
+
+# Cached tables, their columns and the partition layout on disk. <source> names the database the
+# rows came from (see source_name), so switching databases or backends never serves another one's rows:
+#   cache/<source>/stock_data/company_<CompanyID>/<year>/part-<n>.parquet
+#   cache/<source>/dow_jones/<year>/part-<n>.parquet
+TABLE_TYPES = {
+    "stock_data": db_types.STOCK_DATA_TYPES,
+    "dow_jones": db_types.DOW_JONES_TYPES
+}
+TABLES = {table: list(types) for table, types in TABLE_TYPES.items()}
+WATERMARK_FILE = "watermarks.json"
+CACHE_FORMAT = 2  # Bump when the cached schema changes; older caches are discarded
+
+# Tables can be refreshed from concurrent threads (AnalysisContext.prefetch); the shared
+# watermark file is only ever re-read, changed and saved under this lock
+_watermark_lock = threading.Lock()
+
+def source_name():
+    """Directory name for the configured database: backend, host and database (or the SQLite file)."""
+    if db_config.DB_BACKEND == "sqlite":
+        path = db_config.DB_SQLITE_PATH
+        identity = path if path == ":memory:" else os.path.abspath(path)
+        label = os.path.splitext(os.path.basename(identity))[0] or "memory"
+        digest = hashlib.sha1(identity.encode("utf-8")).hexdigest()[:8]
+        parts = ["sqlite", label, digest]
+    else:
+        parts = ["mysql", db_config.DB_HOST, db_config.DB_DATABASE]
+    return "-".join(re.sub(r"[^A-Za-z0-9_.]", "_", str(part)) for part in parts)
+
+def cache_root():
+    """Cache directory of the configured database."""
+    return os.path.join(db_config.DB_CACHE_DIR, source_name())
+
+def enabled():
+    """Whether reads go through the cache (never for an in-memory SQLite database, which does not outlive the run)."""
+    in_memory = db_config.DB_BACKEND == "sqlite" and db_config.DB_SQLITE_PATH == ":memory:"
+    return db_config.DB_CACHE_ENABLED and not in_memory
+
+def _table_dir(table):
+    return os.path.join(cache_root(), table)
+
+def _company_dir(company_id):
+    return os.path.join(_table_dir("stock_data"), f"company_{int(company_id)}")
+
+def _load_watermarks():
+    path = os.path.join(cache_root(), WATERMARK_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            watermarks = json.load(f)
+        if watermarks.get("format") == CACHE_FORMAT:
+            return watermarks
+
+        # Written with an older schema: start over rather than mixing file schemas
+        shutil.rmtree(_table_dir("stock_data"), ignore_errors=True)
+        shutil.rmtree(_table_dir("dow_jones"), ignore_errors=True)
+    return {"format": CACHE_FORMAT, "stock_data": {}, "dow_jones": None, "refreshed_at": {}}
+
+def _save_watermarks(watermarks):
+    os.makedirs(cache_root(), exist_ok=True)
+    path = os.path.join(cache_root(), WATERMARK_FILE)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(temp_path, path)
+
+def _update_watermarks(table, marks=None):
+    # Record a finished refresh: new per-company dates (stock_data) or the new last date (dow_jones).
+    with _watermark_lock:
+        watermarks = _load_watermarks()
+        if table == "stock_data":
+            watermarks["stock_data"].update(marks or {})
+        elif marks:
+            watermarks["dow_jones"] = marks
+        watermarks["refreshed_at"][table] = time.time()
+        _save_watermarks(watermarks)
+
+def _normalize(table, df):
+    # Fixed column types so every partition file shares one schema.
+    return db_types.normalize_frame(df, TABLE_TYPES[table])
+
+def _write_partitions(table, df):
+    df = _normalize(table, df)
+    if table == "stock_data":
+        groups = df.groupby([df["CompanyID"], df["Date"].dt.year])
+        directories = {key: os.path.join(_company_dir(key[0]), str(key[1])) for key, _ in groups}
+    else:
+        groups = df.groupby(df["Date"].dt.year)
+        directories = {key: os.path.join(_table_dir(table), str(key)) for key, _ in groups}
+
+    for key, part in groups:
+        directory = directories[key]
+        os.makedirs(directory, exist_ok=True)
+        part.to_parquet(os.path.join(directory, f"part-{time.time_ns()}.parquet"), index=False)
+
+def read_table(table):
+    # Read every cached partition of a table (None when nothing is cached).
+    files = sorted(glob.glob(os.path.join(_table_dir(table), "**", "*.parquet"), recursive=True))
+    if not files:
+        return None
+
+    import pyarrow.dataset as ds
+
+    df = _normalize(table, ds.dataset(files, format="parquet").to_table().to_pandas())
+    # Parts are written before the watermark is saved, so a refresh interrupted in between
+    # pulls its rows again; files are read oldest part first, so the newest copy is kept
+    key_columns = ["CompanyID", "Date"] if table == "stock_data" else ["Date"]
+    df = df.drop_duplicates(key_columns, keep="last")
+    return df[TABLES[table]].sort_values(key_columns, kind="mergesort").reset_index(drop=True)
+
+def refresh_stock_data(connection):
+    # Pull only stock rows newer than each company's cached watermark; returns the number of new rows.
+    watermarks = _load_watermarks()
+    company_marks = watermarks["stock_data"]
+
+    conditions, data = [], []
+    for company_id, last_date in company_marks.items():
+        conditions.append("(CompanyID = %s AND Date > %s)")
+        data.extend([int(company_id), last_date])
+    if company_marks:
+        # Companies that have never been cached
+        conditions.append(f"CompanyID NOT IN ({', '.join(['%s'] * len(company_marks))})")
+        data.extend(int(company_id) for company_id in company_marks)
+
+    query = f"SELECT {', '.join(TABLES['stock_data'])} FROM stock_data"
+    if conditions:
+        query += " WHERE " + " OR ".join(conditions)
+
+    result = db.execute_query(connection, query, tuple(data) if data else None)
+    if result is None:
+        return None
+
+    new_marks = {}
+    if result:
+        df = db_types.to_frame(result, TABLE_TYPES["stock_data"])
+        df = df.dropna(subset=["CompanyID", "Date"])
+        _write_partitions("stock_data", df)
+        for company_id, last_date in df.groupby("CompanyID")["Date"].max().items():
+            new_marks[str(int(company_id))] = pd.Timestamp(last_date).strftime("%Y-%m-%d")
+
+    _update_watermarks("stock_data", new_marks)
+    return len(result)
+
+def refresh_dow_jones(connection):
+    # Pull only Dow Jones rows newer than the cached watermark; returns the number of new rows.
+    watermarks = _load_watermarks()
+    query = f"SELECT {', '.join(TABLES['dow_jones'])} FROM dow_jones"
+    data = None
+    if watermarks["dow_jones"]:
+        query += " WHERE Date > %s"
+        data = (watermarks["dow_jones"],)
+
+    result = db.execute_query(connection, query, data)
+    if result is None:
+        return None
+
+    last_date = None
+    if result:
+        df = db_types.to_frame(result, TABLE_TYPES["dow_jones"])
+        _write_partitions("dow_jones", df)
+        last_date = pd.Timestamp(df["Date"].max()).strftime("%Y-%m-%d")
+
+    _update_watermarks("dow_jones", last_date)
+    return len(result)
+
+def refresh(table=None):
+    # Incrementally refresh one cached table (or both) from MySQL.
+    refreshers = {"stock_data": refresh_stock_data, "dow_jones": refresh_dow_jones}
+    tables = [table] if table else list(refreshers)
+    with db.pooled_connection() as connection:
+        if not connection:
+            print("Error: Unable to establish database connection.")
+            return None
+        return {name: refreshers[name](connection) for name in tables}
+
+def invalidate(table=None, company_id=None):
+    # Drop cached data so the next read pulls it again: one company, one table or the whole cache.
+    with _watermark_lock:
+        watermarks = _load_watermarks()
+        if table == "stock_data" and company_id is not None:
+            shutil.rmtree(_company_dir(company_id), ignore_errors=True)
+            watermarks["stock_data"].pop(str(int(company_id)), None)
+        elif table:
+            shutil.rmtree(_table_dir(table), ignore_errors=True)
+            watermarks[table] = {} if table == "stock_data" else None
+            watermarks["refreshed_at"].pop(table, None)
+        else:
+            shutil.rmtree(cache_root(), ignore_errors=True)
+            return
+        # Force the next read to check MySQL again
+        watermarks["refreshed_at"].pop(table, None)
+        _save_watermarks(watermarks)
+
+def read_cached(table):
+    # Cached table, refreshed from MySQL first when the last refresh is older than DB_CACHE_REFRESH_SECONDS.
+    refreshed_at = _load_watermarks()["refreshed_at"].get(table, 0)
+    if time.time() - refreshed_at >= db_config.DB_CACHE_REFRESH_SECONDS:
+        result = refresh(table)
+        if result is None or result.get(table) is None:
+            print(f"Warning: could not refresh the {table} cache; using cached rows.")
+    return read_table(table)
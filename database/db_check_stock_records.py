@@ -1,60 +1,137 @@
 import pandas as pd
+from . import db_cache
 from . import db_connection as db
 
-def analyze_records(connection):
-    try:
-        query = """
-            SELECT *, COUNT(*) AS count 
-            FROM stock_data 
-            GROUP BY CompanyID, Date, Open, High, Low, Close, AdjClose, Volume 
-            HAVING count > 1
-        """
-        result = db.execute_query(connection, query)
-        if result:
-            columns = ["CompanyID", "Date", "Open", "High", "Low", "Close", "AdjClose", "Volume", "Count"]
-            df_duplicates = pd.DataFrame(result, columns=columns)
-            return df_duplicates
-        else:
-            print("No duplicate rows found.")
-            return pd.DataFrame()
-        
-    except Exception as e:
-        print("Error while checking for duplicate rows:", e)
-        return pd.DataFrame()
+STOCK_COLUMNS = ["CompanyID", "Date", "Open", "High", "Low", "Close", "AdjClose", "Volume"]
+UNIQUE_KEY_NAME = "uq_stock_company_date"
+
+def duplicate_report(connection):
+    # Summarize what a dedupe would do without changing anything (dry run).
+    exact_query = """
+        SELECT COUNT(*), COALESCE(SUM(copies - 1), 0)
+        FROM (
+            SELECT COUNT(*) AS copies
+            FROM stock_data
+            GROUP BY CompanyID, Date, Open, High, Low, Close, AdjClose, Volume
+            HAVING copies > 1
+        ) duplicate_groups
+    """
+
+    # (CompanyID, Date) keys that still have differing rows once exact copies are collapsed
+    conflict_query = """
+        SELECT CompanyID, Date, COUNT(*) AS versions
+        FROM (
+            SELECT DISTINCT CompanyID, Date, Open, High, Low, Close, AdjClose, Volume
+            FROM stock_data
+        ) distinct_rows
+        WHERE CompanyID IS NOT NULL AND Date IS NOT NULL
+        GROUP BY CompanyID, Date
+        HAVING versions > 1
+        ORDER BY CompanyID, Date
+    """
+
+    # Either the dedupe's unique key or the primary key added by db_migrate covers (CompanyID, Date)
+    key_query = """
+        SELECT COUNT(*) FROM (
+            SELECT INDEX_NAME FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'stock_data' AND NON_UNIQUE = 0
+            GROUP BY INDEX_NAME
+            HAVING COUNT(*) = 2 AND SUM(COLUMN_NAME IN ('CompanyID', 'Date')) = 2
+        ) unique_keys
+    """
+
+    exact = db.execute_query(connection, exact_query)
+    conflicts = db.execute_query(connection, conflict_query)
+    has_key = db.execute_query(connection, key_query)
+    if exact is None or conflicts is None or has_key is None:
+        return None
+
+    return {
+        "duplicate_groups": int(exact[0][0]),
+        "extra_copies": int(exact[0][1]),
+        "key_conflicts": pd.DataFrame(conflicts, columns=["CompanyID", "Date", "Versions"]),
+        "unique_key_exists": has_key[0][0] > 0
+    }
+
+def print_duplicate_report(report):
+    print(f"Duplicate groups: {report['duplicate_groups']}")
+    print(f"Extra copies to remove: {report['extra_copies']}")
+    print(f"(CompanyID, Date) keys with conflicting values: {len(report['key_conflicts'])}")
+    if not report['key_conflicts'].empty:
+        print(report['key_conflicts'].to_string(index=False))
+    print(f"Unique key on (CompanyID, Date): {'present' if report['unique_key_exists'] else 'missing'}")
+
+def remove_duplicate_rows(connection):
+    # Keep exactly one copy of every duplicated row using a few set-based statements in one transaction.
+    column_list = ", ".join(STOCK_COLUMNS)
+    match = " AND ".join(f"s.{column} <=> d.{column}" for column in STOCK_COLUMNS)
+    statements = [
+        (f"""
+            CREATE TEMPORARY TABLE stock_data_dedupe AS
+            SELECT {column_list} FROM stock_data
+            GROUP BY {column_list}
+            HAVING COUNT(*) > 1
+        """, None),
+        (f"DELETE s FROM stock_data s JOIN stock_data_dedupe d ON {match}", None),
+        (f"INSERT INTO stock_data ({column_list}) SELECT {column_list} FROM stock_data_dedupe", None),
+        ("DROP TEMPORARY TABLE stock_data_dedupe", None)
+    ]
 
-def remove_duplicate_rows(connection, df_duplicates):
     try:
-        if not df_duplicates.empty:
-            print(f"{len(df_duplicates)} duplicate rows found. Removing duplicate rows...")
-            for index, row in df_duplicates.iterrows():
-                delete_query = """
-                    DELETE FROM stock_data 
-                    WHERE CompanyID=%s AND Date=%s AND Open=%s AND High=%s AND Low=%s AND Close=%s AND AdjClose=%s AND Volume=%s
-                """
-                data = (row["CompanyID"], row["Date"], row["Open"], row["High"], row["Low"], row["Close"], row["AdjClose"], row["Volume"])
-                if db.delete_data(connection, delete_query, data):
-                    print(f"Deleted duplicate row: {row['CompanyID']}, {row['Date']}")
-                else:
-                    print(f"Failed to delete duplicate row: {row['CompanyID']}, {row['Date']}")
-            
-            print("Duplicate rows removed successfully.")
-        
-        else:
-            print("No duplicate rows found.")
+        rowcounts = db.execute_transaction(connection, statements)
+        if rowcounts is None:
+            # The temporary table only lives as long as the session; drop it if the transaction failed midway
+            db.execute_transaction(connection, [("DROP TEMPORARY TABLE IF EXISTS stock_data_dedupe", None)])
+            print("Failed to remove duplicate rows.")
+            return None
+
+        removed = rowcounts[1] - rowcounts[2]
+        db_cache.invalidate("stock_data")
+        print(f"Duplicate rows removed successfully ({removed} extra copies deleted).")
+        return removed
 
     except Exception as e:
         print("Error while removing duplicate rows:", e)
+        return None
+
+def enforce_unique_key(connection, report):
+    # Add the (CompanyID, Date) unique key so duplicates cannot be inserted again.
+    if report["unique_key_exists"]:
+        return True
+
+    if not report["key_conflicts"].empty:
+        print(f"[!!] Cannot add unique key: {len(report['key_conflicts'])} (CompanyID, Date) keys have conflicting rows.")
+        return False
+
+    query = f"ALTER TABLE stock_data ADD UNIQUE KEY {UNIQUE_KEY_NAME} (CompanyID, Date)"
+    if db.execute_transaction(connection, [(query, None)]) is None:
+        return False
 
-def check_for_duplicate_rows():
+    print(f"Unique key '{UNIQUE_KEY_NAME}' added on stock_data (CompanyID, Date).")
+    return True
+
+def check_for_duplicate_rows(dry_run=False):
     print("Checking For Duplicate Stock Records..")
-    conn = db.create_connection()
-    if conn:
-        try:
-            df_results = analyze_records(conn)
-            if not df_results.empty:
-                remove_duplicate_rows(conn, df_results)
-            
-        finally:
-            db.close_connection(conn)
-    else:
-        print("Unable to establish database connection.")
\ No newline at end of file
+    with db.pooled_connection() as conn:
+        if conn:
+            report = duplicate_report(conn)
+            if report is None:
+                print("Unable to analyze stock records.")
+                return
+
+            print_duplicate_report(report)
+            if dry_run:
+                print("Dry run: no changes made.")
+                return
+
+            if report["extra_copies"] > 0:
+                remove_duplicate_rows(conn)
+            else:
+                print("No duplicate rows found.")
+
+            # Re-check conflicts after the dedupe before adding the key
+            report = duplicate_report(conn)
+            if report is not None:
+                enforce_unique_key(conn, report)
+        else:
+            print("Unable to establish database connection.")
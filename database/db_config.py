@@ -1,7 +1,46 @@
 # db_config.py
 
+# Backend: "mysql" (the server below) or "sqlite" (embedded, see db_sqlite.py)
+DB_BACKEND = "mysql"
+
 # Database credentials
 DB_HOST = "localhost"
 DB_USER = "root"
 DB_PASSWORD = ""
 DB_DATABASE = "tauronix_dev"
+DB_BENCHMARK_DATABASE = "tauronix_benchmark"  # Scratch database the benchmarks drop and recreate
+
+# Connection pool settings
+DB_POOL_NAME = "tauronix_pool"
+DB_POOL_SIZE = 5                # Connections kept warm in the pool (mysql-connector allows up to 32)
+DB_POOL_TIMEOUT = 10            # Seconds to wait for a free connection before giving up
+DB_POOL_PING = True             # Ping (and reconnect) connections when they are checked out
+DB_POOL_LEAK_SECONDS = 60       # Connections held longer than this are reported as leaked
+DB_PREFETCH_MAX_WORKERS = 4     # Frames AnalysisContext.prefetch loads at once, each on its own connection (<= DB_POOL_SIZE)
+
+# Embedded SQLite backend
+DB_SQLITE_PATH = "tauronix.sqlite3"                 # ":memory:" keeps the database in memory for the run
+DB_SQLITE_DUMP_FILE = "sql/database_full.sql"       # Rows loaded when the database does not exist yet
+DB_SQLITE_SCHEMA_FILE = "sql/database_scheme.sql"   # Table definitions with the migrated keys ("" = the dump's own)
+DB_SQLITE_TIMEOUT = 10                              # Seconds to wait for a locked database
+
+# Bulk loading
+DB_INGEST_BATCH_SIZE = 5000     # Rows per multi-row INSERT statement
+DB_INGEST_COMMIT_BATCHES = 20   # Statements per transaction before committing
+
+# Local columnar cache of stock_data and dow_jones
+DB_CACHE_ENABLED = True
+DB_CACHE_DIR = "cache"           # One subdirectory per database (backend, host and name, or the SQLite file)
+DB_CACHE_REFRESH_SECONDS = 300  # Check MySQL for new rows at most this often (0 = on every read)
+
+# Streaming reads
+DB_STREAM_CHUNK_SIZE = 50000    # Rows per DataFrame chunk for unbuffered, chunked queries
+
+# In-process cache of query results over the reference tables (see db_query_cache.py)
+DB_QUERY_CACHE_ENABLED = True
+DB_QUERY_CACHE_MAX_ENTRIES = 128    # Least recently used results are dropped beyond this
+DB_QUERY_CACHE_DEFAULT_TTL = 60     # Seconds a result stays fresh when its tables have no TTL below
+DB_QUERY_CACHE_TTLS = {             # Per table; a query uses the shortest TTL of the tables it reads
+    "company_info": 3600,
+    "data_breach_disclosures": 600,
+}
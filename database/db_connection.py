@@ -1,31 +1,189 @@
-import mysql.connector
+import atexit
+import contextlib
+import threading
+import time
+
+from utils import instrumentation
 from . import db_config
 
-def create_connection():
+# Shared pool and bookkeeping for connections that are currently checked out
+_pool = None
+_pool_lock = threading.Lock()
+_checked_out = {}  # id(connection) -> (checkout time, calling function)
+_checked_out_lock = threading.Lock()
+
+def database_errors():
+    """Exception types raised by the configured backend's driver."""
+    if db_config.DB_BACKEND == "sqlite":
+        from . import db_sqlite
+        return (db_sqlite.Error,)
+    import mysql.connector
+    return (mysql.connector.Error,)
+
+def get_pool():
+    """Return the shared connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from mysql.connector import pooling
+
+                # Sessions are not reset on return (a reset fails on dropped connections and
+                # silently shrinks the pool); close_connection() rolls back open work instead.
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name=db_config.DB_POOL_NAME,
+                    pool_size=db_config.DB_POOL_SIZE,
+                    pool_reset_session=False,
+                    host=db_config.DB_HOST,
+                    user=db_config.DB_USER,
+                    password=db_config.DB_PASSWORD,
+                    database=db_config.DB_DATABASE
+                )
+    return _pool
+
+def _borrow_sqlite():
+    # SQLite connections are cheap to open, so each checkout gets its own
+    from . import db_sqlite
     try:
-        connection = mysql.connector.connect(
-            host=db_config.DB_HOST,
-            user=db_config.DB_USER,
-            password=db_config.DB_PASSWORD,
-            database=db_config.DB_DATABASE
-        )
-        return connection
-    
+        return db_sqlite.connect()
+    except (OSError, db_sqlite.Error) as e:
+        print("Error opening SQLite database:", e)
+        return None
+
+def _borrow_mysql(started):
+    import mysql.connector
+    from mysql.connector import errors
+
+    try:
+        pool = get_pool()
     except mysql.connector.Error as e:
         print("Error connecting to MySQL database:", e)
         return None
 
+    # Wait for a free connection instead of failing as soon as the pool is exhausted
+    deadline = started + db_config.DB_POOL_TIMEOUT
+    while True:
+        try:
+            connection = pool.get_connection()
+            break
+        except errors.PoolError:
+            if time.monotonic() >= deadline:
+                print("Error: timed out waiting for a pooled MySQL connection.")
+                report_leaks()
+                return None
+            time.sleep(0.05)
+        except mysql.connector.Error as e:
+            print("Error connecting to MySQL database:", e)
+            return None
+
+    # Health check: make sure the warm connection is still alive before handing it out
+    if db_config.DB_POOL_PING:
+        try:
+            connection.ping(reconnect=True, attempts=3, delay=0)
+        except mysql.connector.Error as e:
+            print("Pooled MySQL connection failed health check:", e)
+            connection.close()
+            return None
+    return connection
+
+def create_connection():
+    """Borrow a connection from the pool (or open one for SQLite). Return it with close_connection()."""
+    started = time.monotonic()
+    connection = _borrow_sqlite() if db_config.DB_BACKEND == "sqlite" else _borrow_mysql(started)
+    if connection is None:
+        return None
+
+    caller = instrumentation.caller_name(skip=(__file__,))
+    checked_out = time.monotonic()
+    with _checked_out_lock:
+        _checked_out[id(connection)] = (checked_out, caller)
+
+    if instrumentation.enabled:
+        wait = checked_out - started
+        instrumentation.record("checkout", "connection pool", wait, caller=caller, wait_seconds=wait)
+    return connection
+
 def close_connection(connection):
+    """Return a pooled connection (or close a plain one)."""
+    with _checked_out_lock:
+        _checked_out.pop(id(connection), None)
     try:
         if connection.is_connected():
+            # Drop unread results and end the open transaction so the next borrower starts clean
+            if connection.unread_result:
+                connection.consume_results()
+            if connection.in_transaction:
+                connection.rollback()
+        connection.close()
+    except database_errors() as e:
+        print("Error closing database connection:", e)
+
+def discard_connection(connection):
+    """Close a connection whose session must not be reused, e.g. a stream abandoned with rows unread.
+
+    A pooled MySQL connection drops its socket (and the unread rows with it) instead of draining
+    them; its slot goes back to the pool, which reconnects it on the next checkout.
+    """
+    with _checked_out_lock:
+        _checked_out.pop(id(connection), None)
+    try:
+        session = getattr(connection, "_cnx", None)  # The MySQLConnection behind a PooledMySQLConnection
+        if session is None:
             connection.close()
-    except mysql.connector.Error as e:
-        print("Error closing MySQL connection:", e)
+            return
+        session.disconnect()
+        try:
+            connection.close()
+        except database_errors():
+            pass  # Older connectors try to reset the closed session before returning the slot
+    except database_errors() as e:
+        print("Error closing database connection:", e)
+
+@contextlib.contextmanager
+def pooled_connection():
+    """Context manager that borrows a pooled connection and always returns it.
 
-def execute_query(connection, query, data=None):
+    Yields None when no connection could be established, so callers keep the
+    usual `if connection:` check.
+    """
+    connection = create_connection()
+    try:
+        yield connection
+    finally:
+        if connection is not None:
+            close_connection(connection)
+
+def report_leaks(max_age=None):
+    """Print and return the connections held longer than max_age seconds."""
+    max_age = db_config.DB_POOL_LEAK_SECONDS if max_age is None else max_age
+    now = time.monotonic()
+    with _checked_out_lock:
+        held = list(_checked_out.values())
+
+    leaks = [(caller, now - started) for started, caller in held if now - started >= max_age]
+    for caller, age in leaks:
+        print(f"[!!] Warning: connection checked out by {caller} has not been returned for {age:.1f}s.")
+    return leaks
+
+@atexit.register
+def _report_unreturned_connections():
+    # Anything still checked out at interpreter exit was never returned to the pool
+    report_leaks(max_age=0)
+
+def _record_query(kind, query, started, rows=None, status="ok"):
+    instrumentation.record(kind, instrumentation.describe_query(query), time.perf_counter() - started,
+                           caller=instrumentation.caller_name(skip=(__file__,)), rows=rows, status=status)
+
+def _transaction_label(statements):
+    if not statements:
+        return ""
+    return statements[0][0] + (f" (+{len(statements) - 1} more)" if len(statements) > 1 else "")
+
+def execute_query(connection, query, data=None, dictionary=False):
+    started = time.perf_counter() if instrumentation.enabled else None
     try:
         if connection.is_connected():
-            cursor = connection.cursor()
+            cursor = connection.cursor(dictionary=dictionary)
             if data:
                 cursor.execute(query, data)
             else:
@@ -33,10 +191,14 @@ def execute_query(connection, query, data=None):
 
             result = cursor.fetchall()
             cursor.close()
+            if started is not None:
+                _record_query("query", query, started, rows=len(result))
             return result
-    
-    except mysql.connector.Error as e:
+
+    except database_errors() as e:
         print("Error executing SQL query:", e)
+        if started is not None:
+            _record_query("query", query, started, status="error")
         return None
 
 def delete_data(connection, query, data=None):
@@ -47,16 +209,50 @@ def delete_data(connection, query, data=None):
                 cursor.execute(query, data)
             else:
                 cursor.execute(query)
-            
+
             connection.commit()
             cursor.close()
             return True
-        
+
         else:
             print("Connection is not established.")
             return False
-    
-    except mysql.connector.Error as e:
+
+    except database_errors() as e:
         print("Error deleting data:", e)
         return False
 
+def execute_transaction(connection, statements):
+    # Run several (query, data) statements as a single transaction and return each statement's row count.
+    # Everything is rolled back if any statement fails.
+    started = time.perf_counter() if instrumentation.enabled else None
+    try:
+        if connection.is_connected():
+            cursor = connection.cursor()
+            rowcounts = []
+            for query, data in statements:
+                if data:
+                    cursor.execute(query, data)
+                else:
+                    cursor.execute(query)
+                rowcounts.append(cursor.rowcount)
+
+            connection.commit()
+            cursor.close()
+            if started is not None:
+                _record_query("transaction", _transaction_label(statements), started, rows=sum(max(count, 0) for count in rowcounts))
+            return rowcounts
+
+        else:
+            print("Connection is not established.")
+            return None
+
+    except database_errors() as e:
+        print("Error executing transaction, rolling back:", e)
+        try:
+            connection.rollback()
+        except database_errors():
+            pass
+        if started is not None:
+            _record_query("transaction", _transaction_label(statements), started, status="error")
+        return None
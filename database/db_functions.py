@@ -1,95 +1,98 @@
-import pandas as pd
 import datetime
+import time
 
+from utils import instrumentation
+from . import db_cache, db_config, db_query_cache, db_types
 from . import db_connection as db
 
 def get_polygon_api_key():
     # Retrieve the Polygon API key from the database and update the last_used timestamp.
-    
+
     query_select_key = """
         SELECT api_key FROM polygon_api_keys
         ORDER BY last_used IS NULL DESC, last_used ASC
         LIMIT 1;
     """
-    
+
     query_update_last_used = """
         UPDATE polygon_api_keys
         SET last_used = CURRENT_TIMESTAMP
         WHERE api_key = %s;
     """
-    
+
     try:
-        connection = db.create_connection()
-        if connection:
-            result = db.execute_query(connection, query_select_key)
-            
-            if result:
-                api_key = result[0][0]
-
-                # Update the last_used timestamp for the selected key
-                #cursor_update = db.execute_query(connection, query_update_last_used, api_key)
-                
-                return api_key
-                
+        with db.pooled_connection() as connection:
+            if connection:
+                result = db.execute_query(connection, query_select_key)
+
+                if result:
+                    api_key = result[0][0]
+
+                    # Update the last_used timestamp for the selected key
+                    #cursor_update = db.execute_query(connection, query_update_last_used, api_key)
+
+                    return api_key
+
+                else:
+                    print("No API key found.")
+                    return None
             else:
-                print("No API key found.")
-                db.close_connection(connection)
+                print("Error: Unable to establish database connection.")
                 return None
-        else:
-            print("Error: Unable to establish database connection.")
-            return None
     except Exception as e:
         print(f"Error retrieving API key: {e}")
         return None
 
+@db_query_cache.cached(tables=("company_info",))
 def retrieve_company_info():
     # Retrieve company information from the database.
 
     query = "SELECT CompanyID, CompanyName, Location, StockSymbol FROM company_info ORDER BY CompanyID"
     try:
-        connection = db.create_connection()
-        if connection:
-            result = db.execute_query(connection, query)
-            db.close_connection(connection)
-            if result:
-                columns = ["CompanyID", "CompanyName", "Location", "StockSymbol"]
-                df = pd.DataFrame(result, columns=columns)
-                return df
+        with db.pooled_connection() as connection:
+            if connection:
+                result = db.execute_query(connection, query)
             else:
-                print("No data found.")
+                print("Error: Unable to establish database connection.")
                 return None
+
+        if result:
+            df = db_types.to_frame(result, db_types.COMPANY_INFO_TYPES)
+            return df
         else:
-            print("Error: Unable to establish database connection.")
+            print("No data found.")
             return None
     except Exception as e:
         print("Error:", e)
         return None
 
+COMPANY_DISCLOSURE_DATES_QUERY = """
+    SELECT a.CompanyID AS ID,
+           a.CompanyName AS Name,
+           a.StockSymbol AS Symbol,
+           b.DisclosureDate AS `Disclosure Date`
+    FROM company_info a
+    JOIN data_breach_disclosures b ON b.CompanyID = a.CompanyID
+    ORDER BY b.DisclosureDate
+"""
+
+@db_query_cache.cached(tables=("company_info", "data_breach_disclosures"))
 def retrieve_company_disclosure_dates():
     """Retrieve company disclosure dates from the database."""
-    query = """
-        SELECT a.CompanyID AS ID,
-               a.CompanyName AS Name,
-               a.StockSymbol AS Symbol,
-               b.DisclosureDate AS `Disclosure Date`
-        FROM company_info a
-        JOIN data_breach_disclosures b ON b.CompanyID = a.CompanyID
-        ORDER BY b.DisclosureDate
-    """
+    query = COMPANY_DISCLOSURE_DATES_QUERY
     try:
-        connection = db.create_connection()
-        if connection:
-            result = db.execute_query(connection, query)
-            db.close_connection(connection)
-            if result:
-                columns = ["ID", "Name", "Symbol", "Disclosure Date"]
-                df = pd.DataFrame(result, columns=columns)
-                return df
+        with db.pooled_connection() as connection:
+            if connection:
+                result = db.execute_query(connection, query)
             else:
-                print("No data found.")
+                print("Error: Unable to establish database connection.")
                 return None
+
+        if result:
+            df = db_types.to_frame(result, db_types.DISCLOSURE_DATE_TYPES)
+            return df
         else:
-            print("Error: Unable to establish database connection.")
+            print("No data found.")
             return None
     except Exception as e:
         print("Error:", e)
@@ -97,22 +100,26 @@ def retrieve_company_disclosure_dates():
 
 def retrieve_stock_data():
     # Retrieve all stock data from the database ordered by CompanyID.
+    # Served from the local columnar cache (refreshed incrementally) when it is enabled.
+    if db_cache.enabled():
+        df = db_cache.read_cached("stock_data")
+        if df is not None and not df.empty:
+            return df
 
-    query = "SELECT * FROM stock_data ORDER BY CompanyID, Date"
+    query = "SELECT CompanyID, Date, Open, High, Low, Close, AdjClose, Volume FROM stock_data ORDER BY CompanyID, Date"
     try:
-        connection = db.create_connection()
-        if connection:
-            result = db.execute_query(connection, query)
-            db.close_connection(connection)
-            if result:
-                columns = ["CompanyID", "Date", "Open", "High", "Low", "Close", "AdjClose", "Volume"]
-                df = pd.DataFrame(result, columns=columns)
-                return df
+        with db.pooled_connection() as connection:
+            if connection:
+                result = db.execute_query(connection, query)
             else:
-                print("No data found.")
+                print("Error: Unable to establish database connection.")
                 return None
+
+        if result:
+            df = db_types.to_frame(result, db_types.STOCK_DATA_TYPES)
+            return df
         else:
-            print("Error: Unable to establish database connection.")
+            print("No data found.")
             return None
     except Exception as e:
         print("Error:", e)
@@ -120,29 +127,33 @@ def retrieve_stock_data():
 
 def retrieve_dow_jones_data():
     # Retrieve Dow Jones data from the database.
+    # Served from the local columnar cache (refreshed incrementally) when it is enabled.
+    if db_cache.enabled():
+        df = db_cache.read_cached("dow_jones")
+        if df is not None and not df.empty:
+            return df
 
-    query = "SELECT * FROM dow_jones ORDER BY Date"
+    query = "SELECT Date, Price, Open, High, Low, Volume, Change_Percent FROM dow_jones ORDER BY Date"
     try:
-        connection = db.create_connection()
-        if connection:
-            result = db.execute_query(connection, query)
-            db.close_connection(connection)
-            if result:
-                columns = ["Date", "Price", "Open", "High", "Low", "Volume", "Change_Percent"]
-                df = pd.DataFrame(result, columns=columns)
-                return df
+        with db.pooled_connection() as connection:
+            if connection:
+                result = db.execute_query(connection, query)
             else:
-                print("No data found.")
+                print("Error: Unable to establish database connection.")
                 return None
+
+        if result:
+            df = db_types.to_frame(result, db_types.DOW_JONES_TYPES)
+            return df
         else:
-            print("Error: Unable to establish database connection.")
+            print("No data found.")
             return None
     except Exception as e:
         print("Error:", e)
         return None
 
-def retrieve_stock_price_and_dow_jones_data(company_ids=None):
-    # Retrieve combined data from multiple tables, with an optional filter for specific company IDs.
+def _stock_price_and_dow_jones_query(company_ids=None):
+    # Build the stock + Dow Jones join, with an optional filter for specific company IDs.
 
     # Base query
     query = """
@@ -163,94 +174,155 @@ def retrieve_stock_price_and_dow_jones_data(company_ids=None):
         JOIN stock_data y ON y.CompanyID = x.CompanyID
         JOIN dow_jones z ON z.Date = y.Date
     """
-    
+
     # Add WHERE clause if company_ids are provided
     if company_ids:
         placeholders = ', '.join(['%s'] * len(company_ids))  # Prepare placeholders for IN clause
         query += f" WHERE x.CompanyID IN ({placeholders})"
-    
+
     # Complete query with ORDER BY clause
     query += " ORDER BY y.Date, x.CompanyID;"
-    
+
+    data = tuple(company_ids) if company_ids else None
+    return query, data
+
+def retrieve_stock_price_and_dow_jones_data(company_ids=None):
+    # Retrieve combined data from multiple tables, with an optional filter for specific company IDs.
+    query, data = _stock_price_and_dow_jones_query(company_ids)
+
     try:
-        connection = db.create_connection()
-        if connection:
-            cursor = connection.cursor(dictionary=True)
-            # Execute query with or without company_ids
-            if company_ids:
-                cursor.execute(query, tuple(company_ids))  # Pass company_ids as query parameters
+        with db.pooled_connection() as connection:
+            if connection:
+                # Execute query with or without company_ids
+                result = db.execute_query(connection, query, data)
             else:
-                cursor.execute(query)
-            
-            result = cursor.fetchall()
-            db.close_connection(connection)
-            
-            if result:
-                columns = ["Company ID", "Company Name", "Date", "Stock Open", "Stock High", "Stock Close", "Stock Volume",
-                           "Dow Jones Price", "Dow Jones Open", "Dow Jones High", "Dow Jones Low", "Dow Jones Volume",
-                           "Dow Jones Change %"]
-                df = pd.DataFrame(result, columns=columns)
-                return df
-            else:
-                print("No data found.")
+                print("Error: Unable to establish database connection.")
                 return None
+
+        if result:
+            df = db_types.to_frame(result, db_types.STOCK_PRICE_AND_DOW_JONES_TYPES)
+            return df
         else:
-            print("Error: Unable to establish database connection.")
+            print("No data found.")
             return None
     except Exception as e:
         print(f"Error retrieving data: {e}")
         return None
 
+def iter_stock_price_and_dow_jones_data(company_ids=None, chunk_size=None):
+    # Stream the stock + Dow Jones join as typed DataFrame chunks of at most chunk_size rows
+    # (default DB_STREAM_CHUNK_SIZE). The cursor is unbuffered, so rows are read from the server
+    # as each chunk is built and memory stays bounded by the chunk size instead of the full result.
+    chunk_size = chunk_size or db_config.DB_STREAM_CHUNK_SIZE
+    query, data = _stock_price_and_dow_jones_query(company_ids)
 
+    connection = db.create_connection()
+    if not connection:
+        print("Error: Unable to establish database connection.")
+        return
+
+    finished = False
+    started = time.perf_counter() if instrumentation.enabled else None
+    streamed = 0
+    try:
+        cursor = connection.cursor(buffered=False)
+        cursor.execute(query, data)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            streamed += len(rows)
+            yield db_types.to_frame(rows, db_types.STOCK_PRICE_AND_DOW_JONES_TYPES)
+        finished = True
+    finally:
+        if finished:
+            cursor.close()
+            db.close_connection(connection)
+        else:
+            # Abandoned (or failed) midway: the rest of the result may still be on the wire, so the
+            # session is closed rather than drained row by row and handed back to the pool
+            db.discard_connection(connection)
+        if started is not None:
+            # Wall time of the whole stream, including the time the consumer spent on each chunk
+            instrumentation.record("stream", instrumentation.describe_query(query), time.perf_counter() - started,
+                                   caller=instrumentation.caller_name(skip=(__file__,)), rows=streamed)
+
+
+@db_query_cache.cached(tables=("company_info",))
 def get_company_id_by_name(company_name):
     # Retrieves the CompanyID for a given company name from the company_info table.
-   
+
+    query = "SELECT CompanyID FROM company_info WHERE CompanyName = %s"
     try:
-        connection = db.create_connection()
-        with connection.cursor() as cursor:
-            query = "SELECT CompanyID FROM company_info WHERE CompanyName = %s"
-            cursor.execute(query, (company_name,))
-            result = cursor.fetchone() 
-            return result['CompanyID'] if result else None
+        with db.pooled_connection() as connection:
+            if connection:
+                result = db.execute_query(connection, query, (company_name,))
+                return result[0][0] if result else None
+            else:
+                print("Error: Unable to establish database connection.")
+                return None
     except Exception as e:
         print(f"Error retrieving Company ID: {e}")
         return None
-    finally:
-        if connection:
-            connection.close()
+
+COMPANY_BY_SYMBOL_QUERY = "SELECT CompanyID, CompanyName FROM company_info WHERE StockSymbol = %s"
+COMPANY_SYMBOL_MAP_QUERY = "SELECT StockSymbol, CompanyID, CompanyName FROM company_info ORDER BY CompanyID"
+
+@db_query_cache.cached(tables=("company_info",))
+def retrieve_company_symbol_map():
+    """{StockSymbol: {"CompanyID", "CompanyName"}} for every company (the lowest CompanyID wins a shared symbol)."""
+    try:
+        with db.pooled_connection() as connection:
+            if connection:
+                result = db.execute_query(connection, COMPANY_SYMBOL_MAP_QUERY)
+            else:
+                print("Error: Unable to establish database connection.")
+                return None
+
+        if result is None:
+            return None
+        symbols = {}
+        for stock_symbol, company_id, company_name in result:
+            symbols.setdefault(stock_symbol, {"CompanyID": company_id, "CompanyName": company_name})
+        return symbols
+    except Exception as e:
+        print(f"Error retrieving company symbols: {e}")
+        return None
 
 def get_company_id_and_name_by_symbol(stock_symbol):
     # Retrieve the CompanyID and CompanyName based on the stock symbol.
 
+    # With the query cache on, every ticker is served from one cached company_info read
+    # (only the returned entry is copied, not the whole map)
+    if db_config.DB_QUERY_CACHE_ENABLED:
+        symbols = retrieve_company_symbol_map.shared()
+        if symbols is not None:
+            if stock_symbol in symbols:
+                return dict(symbols[stock_symbol])
+            print(f"No company found for stock symbol: {stock_symbol}")
+            return None
+
+    query = COMPANY_BY_SYMBOL_QUERY
     try:
-        connection = db.create_connection()
-        if connection:
-            with connection.cursor() as cursor:
-                query = "SELECT CompanyID, CompanyName FROM company_info WHERE StockSymbol = %s"
-                cursor.execute(query, (stock_symbol,))
-                result = cursor.fetchone()
+        with db.pooled_connection() as connection:
+            if connection:
+                result = db.execute_query(connection, query, (stock_symbol,))
 
                 if result:
-                    company_id, company_name = result[0], result[1]
+                    company_id, company_name = result[0][0], result[0][1]
                     return {"CompanyID": company_id, "CompanyName": company_name}
                 else:
                     print(f"No company found for stock symbol: {stock_symbol}")
                     return None
+            else:
+                print("Error: Unable to establish database connection.")
+                return None
     except Exception as e:
         print(f"Error retrieving Company ID and Name: {e}")
         return None
-    finally:
-        if connection:
-            connection.close()
-
-def get_company_stock_record_on_date(company_id, date):
-    # Retrieves stock data for a specific company on a given date.
-    
-    if isinstance(date, datetime.datetime):
-        date = date.strftime('%Y-%m-%d')
 
-    query = """
-        SELECT 
+COMPANY_STOCK_RECORD_ON_DATE_QUERY = """
+        SELECT
             x.CompanyID 'Company ID',
             x.CompanyName 'Company Name',
             y.Date,
@@ -270,19 +342,25 @@ def get_company_stock_record_on_date(company_id, date):
         WHERE x.CompanyID = %s AND y.Date = %s
         ORDER BY y.Date, x.CompanyID;
     """
+
+def get_company_stock_record_on_date(company_id, date):
+    # Retrieves stock data for a specific company on a given date.
+
+    if isinstance(date, datetime.datetime):
+        date = date.strftime('%Y-%m-%d')
+
     try:
-        connection = db.create_connection()
-        with connection.cursor() as cursor:
-            cursor.execute(query, (company_id, date))
-            result = cursor.fetchone()  # Fetch the first row
-            if result:
-                return dict(result)
+        with db.pooled_connection() as connection:
+            if connection:
+                result = db.execute_query(connection, COMPANY_STOCK_RECORD_ON_DATE_QUERY, (company_id, date), dictionary=True)
+                if result:
+                    return dict(result[0])  # First matching row
+                else:
+                    print(f"No data found for Company ID {company_id} on {date}.")
+                    return None
             else:
-                print(f"No data found for Company ID {company_id} on {date}.")
+                print("Error: Unable to establish database connection.")
                 return None
     except Exception as e:
         print(f"Error retrieving stock data: {e}")
         return None
-    finally:
-        if connection:
-            connection.close()
\ No newline at end of file
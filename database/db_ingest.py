@@ -0,0 +1,149 @@
+import pandas as pd
+
+from . import db_cache, db_config
+from . import db_connection as db
+from . import db_functions
+
+STOCK_COLUMNS = ["CompanyID", "Date", "Open", "High", "Low", "Close", "AdjClose", "Volume"]
+# Columns an upsert overwrites on existing rows; a stored (dividend-adjusted) AdjClose is kept
+UPDATE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+MARKET_TIMEZONE = "America/New_York"
+EXISTING_DATES_QUERY = "SELECT Date FROM stock_data WHERE CompanyID = %s AND Date BETWEEN %s AND %s"
+
+def bars_to_rows(company_id, bars):
+    # Map Polygon aggregate bars (t/o/h/l/c/v) to stock_data rows.
+    # Polygon's adjusted=true only adjusts for splits, while the stored AdjClose also adjusts for
+    # dividends, so `c` fills Close and AdjClose is left NULL rather than mixing the two series.
+    if not bars:
+        return []
+
+    df = pd.DataFrame(bars, columns=["t", "o", "h", "l", "c", "v"])
+    dates = pd.to_datetime(df["t"], unit="ms", utc=True).dt.tz_convert(MARKET_TIMEZONE).dt.date.tolist()
+    prices = {column: df[column].astype(float).tolist() for column in ("o", "h", "l", "c")}
+    volumes = df["v"].round().astype("int64").tolist()
+
+    # Plain Python values so the connector does not have to convert NumPy scalars
+    return list(zip([int(company_id)] * len(df), dates, prices["o"], prices["h"], prices["l"],
+                    prices["c"], [None] * len(df), volumes))
+
+def has_unique_stock_key(connection):
+    # ON DUPLICATE KEY UPDATE only upserts when a unique key covers (CompanyID, Date).
+    query = """
+        SELECT INDEX_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'stock_data' AND NON_UNIQUE = 0
+        GROUP BY INDEX_NAME
+        HAVING COUNT(*) = 2 AND SUM(COLUMN_NAME IN ('CompanyID', 'Date')) = 2
+    """
+    result = db.execute_query(connection, query)
+    return bool(result)
+
+def _count_existing(cursor, batch):
+    # Number of (CompanyID, Date) keys in the batch that are already stored (one indexed range scan per company).
+    dates_by_company = {}
+    for row in batch:
+        dates_by_company.setdefault(row[0], set()).add(row[1])
+
+    existing = 0
+    for company_id, dates in dates_by_company.items():
+        cursor.execute(EXISTING_DATES_QUERY, (company_id, min(dates), max(dates)))
+        existing += len({row[0] for row in cursor.fetchall()} & dates)
+    return existing
+
+def _upsert_batch(cursor, rows):
+    # One multi-row INSERT ... ON DUPLICATE KEY UPDATE per batch.
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+    updates = ", ".join(f"{column} = VALUES({column})" for column in UPDATE_COLUMNS)
+    query = (f"INSERT INTO stock_data ({', '.join(STOCK_COLUMNS)}) VALUES {placeholders} "
+             f"ON DUPLICATE KEY UPDATE {updates}")
+    cursor.execute(query, [value for row in rows for value in row])
+    return cursor.rowcount
+
+def upsert_stock_rows(connection, rows, batch_size=None, commit_batches=None):
+    """
+    Write stock_data rows in multi-row upsert batches, committing every `commit_batches` batches.
+
+    Yields one report per batch: rows, inserted, updated (changed values) and unchanged.
+    Uncommitted batches are rolled back if a statement fails.
+    """
+    batch_size = batch_size or db_config.DB_INGEST_BATCH_SIZE
+    commit_batches = commit_batches or db_config.DB_INGEST_COMMIT_BATCHES
+
+    cursor = connection.cursor()
+    pending = 0
+    try:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            existing = _count_existing(cursor, batch)
+            affected = _upsert_batch(cursor, batch)
+
+            # MySQL counts 1 per inserted row and 2 per updated row (0 when the values did not change);
+            # SQLite counts 1 per inserted or changed row
+            inserted = len(batch) - existing
+            updated = max(0, (affected - inserted) // (1 if db_config.DB_BACKEND == "sqlite" else 2))
+            pending += 1
+            if pending >= commit_batches:
+                connection.commit()
+                pending = 0
+
+            yield {"rows": len(batch), "inserted": inserted, "updated": updated, "unchanged": existing - updated}
+
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def _invalidate_caches(company_id):
+    # Backfilled or updated rows can sit behind the cache watermark, so drop this company's cache
+    # and the indicators persisted from its old prices
+    from analysis import indicators
+
+    db_cache.invalidate("stock_data", company_id)
+    indicators.invalidate_company(company_id)
+
+def load_polygon_bars(ticker, batches, company_id=None):
+    """
+    Load streamed Polygon bar batches for one ticker into stock_data.
+
+    `batches` is any iterable of bar lists (for example polygon_requests.iter_api_data), so bars are
+    written as they arrive. Returns the totals across all batches, or None on failure (including an
+    exception raised by `batches`, such as a failed Polygon page; earlier batches stay loaded).
+    """
+    if company_id is None:
+        company = db_functions.get_company_id_and_name_by_symbol(ticker)
+        if company is None:
+            return None
+        company_id = company["CompanyID"]
+
+    totals = {"rows": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+    batch_number = 0
+    try:
+        with db.pooled_connection() as connection:
+            if not connection:
+                print("Error: Unable to establish database connection.")
+                return None
+
+            if not has_unique_stock_key(connection):
+                print("[!!] stock_data has no unique key on (CompanyID, Date); run the duplicate check "
+                      "or `python -m database.db_migrate` first.")
+                return None
+
+            for bars in batches:
+                for report in upsert_stock_rows(connection, bars_to_rows(company_id, bars)):
+                    batch_number += 1
+                    print(f"Batch {batch_number}: {report['rows']} rows "
+                          f"({report['inserted']} inserted, {report['updated']} updated, {report['unchanged']} unchanged)")
+                    for key in totals:
+                        totals[key] += report[key]
+
+        _invalidate_caches(company_id)
+        print(f"Loaded {totals['rows']} bars for {ticker}: {totals['inserted']} inserted, {totals['updated']} updated.")
+        return totals
+
+    except Exception as e:
+        # A failed fetch stops the stream midway; batches written before it are already committed
+        if batch_number:
+            _invalidate_caches(company_id)
+        print(f"Error loading stock data for {ticker}: {e}")
+        return None
@@ -0,0 +1,297 @@
+# db_migrate.py
+
+"""
+Versioned schema migrations for the analysis tables.
+
+Applied versions are recorded in `schema_migrations`. Every step first looks at
+information_schema, so re-running a migration (or one that stopped half way, since
+MySQL DDL is not transactional) only applies what is still missing.
+
+    python -m database.db_migrate            apply pending migrations, then run the EXPLAIN check
+    python -m database.db_migrate --dry-run  show what would change
+    python -m database.db_migrate --check    only run the EXPLAIN check
+"""
+
+import argparse
+import sys
+
+from . import db_cache, db_config, db_functions, db_ingest, db_query_cache
+from . import db_connection as db
+
+# (version, name, steps). Step kinds:
+#   ("primary_key", table, columns)
+#   ("index", table, name, columns)
+#   ("drop_index", table, name)  -- only dropped when another index starts with the same columns
+#   ("foreign_key", table, name, columns, ref_table, ref_columns)
+MIGRATIONS = [
+    (1, "company_info keys", [
+        ("primary_key", "company_info", ("CompanyID",)),
+        ("index", "company_info", "idx_company_symbol", ("StockSymbol",)),
+    ]),
+    (2, "dow_jones primary key", [
+        ("primary_key", "dow_jones", ("Date",)),
+    ]),
+    (3, "stock_data primary key", [
+        ("primary_key", "stock_data", ("CompanyID", "Date")),
+        ("drop_index", "stock_data", "uq_stock_company_date"),
+        ("drop_index", "stock_data", "CompanyID"),
+    ]),
+    (4, "data_breach_disclosures keys", [
+        ("primary_key", "data_breach_disclosures", ("DisclosureID",)),
+        ("index", "data_breach_disclosures", "idx_disclosure_company_date", ("CompanyID", "DisclosureDate")),
+        ("drop_index", "data_breach_disclosures", "CompanyID"),
+    ]),
+    (5, "company foreign keys", [
+        ("foreign_key", "stock_data", "fk_stock_company", ("CompanyID",), "company_info", ("CompanyID",)),
+        ("foreign_key", "data_breach_disclosures", "fk_disclosure_company", ("CompanyID",),
+         "company_info", ("CompanyID",)),
+    ]),
+]
+
+MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT NOT NULL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Access types that read a whole table or index
+FULL_SCAN_TYPES = ("ALL", "index")
+
+def _quote(name):
+    return f"`{name}`"
+
+def _column_list(columns):
+    return ", ".join(_quote(column) for column in columns)
+
+def _indexes(connection, table):
+    # {index name: [columns in key order]} for a table
+    query = """
+        SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """
+    indexes = {}
+    for index_name, column in db.execute_query(connection, query, (table,)) or []:
+        indexes.setdefault(index_name, []).append(column)
+    return indexes
+
+def _has_leading_index(indexes, columns, exclude=None):
+    # True when some index (other than `exclude`) starts with exactly these columns
+    columns = list(columns)
+    return any(name != exclude and index_columns[:len(columns)] == columns
+               for name, index_columns in indexes.items())
+
+def _foreign_key_exists(connection, table, columns, ref_table):
+    query = """
+        SELECT CONSTRAINT_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY ORDINAL_POSITION)
+        FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME = %s
+        GROUP BY CONSTRAINT_NAME
+    """
+    result = db.execute_query(connection, query, (table, ref_table)) or []
+    return any(row[1] == ",".join(columns) for row in result)
+
+def _count(connection, query):
+    result = db.execute_query(connection, query)
+    return None if result is None else int(result[0][0])
+
+def _primary_key_blockers(connection, table, columns):
+    # Rows that would make ADD PRIMARY KEY fail: NULL key columns or repeated keys
+    column_list = _column_list(columns)
+    nulls = " OR ".join(f"{_quote(column)} IS NULL" for column in columns)
+    null_rows = _count(connection, f"SELECT COUNT(*) FROM {_quote(table)} WHERE {nulls}")
+    repeated = _count(connection, f"""
+        SELECT COUNT(*) FROM (
+            SELECT {column_list} FROM {_quote(table)} GROUP BY {column_list} HAVING COUNT(*) > 1
+        ) repeated_keys
+    """)
+    if null_rows is None or repeated is None:
+        return "unable to inspect existing rows"
+    if null_rows or repeated:
+        return f"{null_rows} rows with NULL key columns, {repeated} repeated keys"
+    return None
+
+def _orphan_rows(connection, table, columns, ref_table, ref_columns):
+    join = " AND ".join(f"c.{_quote(column)} = p.{_quote(ref)}" for column, ref in zip(columns, ref_columns))
+    return _count(connection, f"""
+        SELECT COUNT(*) FROM {_quote(table)} c
+        LEFT JOIN {_quote(ref_table)} p ON {join}
+        WHERE p.{_quote(ref_columns[0])} IS NULL
+    """)
+
+def plan_step(connection, step):
+    """
+    Work out what a step still has to do.
+
+    Returns (statement, message): statement is None when the step is already applied
+    or cannot be applied, in which case message says why (prefixed with "[!!]" on a blocker).
+    """
+    kind, table = step[0], step[1]
+    indexes = _indexes(connection, table)
+
+    if kind == "primary_key":
+        columns = step[2]
+        if "PRIMARY" in indexes:
+            if indexes["PRIMARY"] == list(columns):
+                return None, f"{table}: primary key ({', '.join(columns)}) present"
+            return None, f"[!!] {table}: has a different primary key ({', '.join(indexes['PRIMARY'])})"
+        blockers = _primary_key_blockers(connection, table, columns)
+        if blockers:
+            return None, f"[!!] {table}: cannot add primary key ({', '.join(columns)}): {blockers}"
+        return (f"ALTER TABLE {_quote(table)} ADD PRIMARY KEY ({_column_list(columns)})",
+                f"{table}: add primary key ({', '.join(columns)})")
+
+    if kind == "index":
+        name, columns = step[2], step[3]
+        if _has_leading_index(indexes, columns):
+            return None, f"{table}: index on ({', '.join(columns)}) present"
+        return (f"ALTER TABLE {_quote(table)} ADD INDEX {_quote(name)} ({_column_list(columns)})",
+                f"{table}: add index {name} ({', '.join(columns)})")
+
+    if kind == "drop_index":
+        name = step[2]
+        if name not in indexes:
+            return None, f"{table}: index {name} absent"
+        if not _has_leading_index(indexes, indexes[name], exclude=name):
+            return None, f"{table}: keeping index {name}, no other index covers it"
+        return f"ALTER TABLE {_quote(table)} DROP INDEX {_quote(name)}", f"{table}: drop redundant index {name}"
+
+    if kind == "foreign_key":
+        name, columns, ref_table, ref_columns = step[2:]
+        if _foreign_key_exists(connection, table, columns, ref_table):
+            return None, f"{table}: foreign key to {ref_table} present"
+        orphans = _orphan_rows(connection, table, columns, ref_table, ref_columns)
+        if orphans is None or orphans > 0:
+            return None, f"[!!] {table}: cannot add foreign key to {ref_table}: {orphans} rows without a parent"
+        return (f"ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} FOREIGN KEY ({_column_list(columns)}) "
+                f"REFERENCES {_quote(ref_table)} ({_column_list(ref_columns)})",
+                f"{table}: add foreign key {name} -> {ref_table}")
+
+    return None, f"[!!] Unknown migration step: {kind}"
+
+def applied_versions(connection):
+    if db.execute_transaction(connection, [(MIGRATIONS_TABLE, None)]) is None:
+        return None
+    result = db.execute_query(connection, "SELECT version FROM schema_migrations")
+    return None if result is None else {row[0] for row in result}
+
+def migrate(connection, dry_run=False):
+    """Apply pending migrations in version order. Returns True when the schema is up to date."""
+    applied = applied_versions(connection)
+    if applied is None:
+        print("Unable to read schema_migrations.")
+        return False
+
+    pending = [migration for migration in MIGRATIONS if migration[0] not in applied]
+    if not pending:
+        print("Schema is up to date.")
+        return True
+
+    changed_tables = set()
+    for version, name, steps in pending:
+        print(f"Migration {version}: {name}")
+        for step in steps:
+            statement, message = plan_step(connection, step)
+            if statement is None:
+                print(f"  {message}")
+                if message.startswith("[!!]"):
+                    print(f"Migration {version} stopped; fix the rows above and run it again.")
+                    return False
+                continue
+
+            if dry_run:
+                print(f"  would {message}")
+                continue
+
+            print(f"  {message}")
+            if db.execute_transaction(connection, [(statement, None)]) is None:
+                print(f"Migration {version} failed.")
+                return False
+            changed_tables.add(step[1])
+
+        if not dry_run:
+            db.execute_transaction(connection, [
+                ("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            ])
+
+    # Rebuilt tables get fresh cached copies on the next read
+    for table in changed_tables & set(db_cache.TABLES):
+        db_cache.invalidate(table)
+    for table in changed_tables:
+        db_query_cache.invalidate(table)
+
+    print("Dry run: no changes made." if dry_run else "Schema is up to date.")
+    return True
+
+def _sample_parameters(connection):
+    # Real key values so EXPLAIN plans the lookups the application actually runs
+    sample = db.execute_query(connection, "SELECT CompanyID, Date FROM stock_data LIMIT 1") or [(0, "1970-01-01")]
+    symbol = db.execute_query(connection, "SELECT StockSymbol FROM company_info WHERE StockSymbol IS NOT NULL LIMIT 1")
+    company_id, date = sample[0]
+    return company_id, date, symbol[0][0] if symbol else ""
+
+def hot_queries(connection):
+    """(name, query, data, full_scan_allowed) for the queries the analysis runs most."""
+    company_id, date, symbol = _sample_parameters(connection)
+    joined, _ = db_functions._stock_price_and_dow_jones_query()
+    joined_filtered, data = db_functions._stock_price_and_dow_jones_query([company_id])
+
+    # Unfiltered queries read every row anyway, so their driving table may be scanned
+    return [
+        ("stock + Dow Jones join", joined, None, True),
+        ("stock + Dow Jones join (by company)", joined_filtered, data, False),
+        ("stock record on date", db_functions.COMPANY_STOCK_RECORD_ON_DATE_QUERY, (company_id, date), False),
+        ("company by symbol", db_functions.COMPANY_BY_SYMBOL_QUERY, (symbol,), False),
+        ("disclosure dates", db_functions.COMPANY_DISCLOSURE_DATES_QUERY, None, True),
+        ("ingest existing dates", db_ingest.EXISTING_DATES_QUERY, (company_id, date, date), False),
+    ]
+
+def explain(connection, query, data=None):
+    return db.execute_query(connection, "EXPLAIN " + query.strip().rstrip(";"), data, dictionary=True)
+
+def check_query_plans(connection):
+    """EXPLAIN every hot query and fail if one falls back to a full table scan."""
+    ok = True
+    for name, query, data, full_scan_allowed in hot_queries(connection):
+        plan = explain(connection, query, data)
+        if not plan:
+            print(f"[!!] {name}: EXPLAIN failed")
+            ok = False
+            continue
+
+        scans = [row["table"] for position, row in enumerate(plan)
+                 if row["type"] in FULL_SCAN_TYPES and not (full_scan_allowed and position == 0)]
+        access = ", ".join(f"{row['table']}:{row['type']}({row['key'] or '-'})" for row in plan)
+        if scans:
+            print(f"[!!] {name}: full scan of {', '.join(scans)}  [{access}]")
+            ok = False
+        else:
+            print(f"[OK] {name}  [{access}]")
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply Tauronix schema migrations.")
+    parser.add_argument("--dry-run", action="store_true", help="show pending changes without applying them")
+    parser.add_argument("--check", action="store_true", help="only run the EXPLAIN check on the hot queries")
+    args = parser.parse_args(argv)
+
+    if db_config.DB_BACKEND == "sqlite":
+        # SQLite databases are built from DB_SQLITE_SCHEMA_FILE, which already has every key below
+        print("The SQLite backend is created with the migrated schema; nothing to migrate.")
+        return 0
+
+    with db.pooled_connection() as connection:
+        if not connection:
+            print("Error: Unable to establish database connection.")
+            return 1
+
+        if not args.check and not migrate(connection, dry_run=args.dry_run):
+            return 1
+        if args.dry_run:
+            return 0
+        return 0 if check_query_plans(connection) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
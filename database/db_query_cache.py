@@ -0,0 +1,107 @@
+# db_query_cache.py
+
+"""
+In-process memoization for queries over slowly changing reference tables.
+
+Results are kept in a size-bounded LRU with a TTL per table and are tagged with the tables
+they read, so invalidate(table) drops every result built from it. Writers of a cached table
+call it; today only migrations do (dedupe and ingest write stock_data, which is never cached
+here), and anything else changed behind the process's back is picked up when the TTL runs out.
+Callers get a copy, so modifying a returned frame or dict never changes the cache (`.shared`
+skips the copy for read-only callers). Failed lookups (None) are not cached.
+"""
+
+import collections
+import copy
+import functools
+import threading
+import time
+
+from . import db_config
+
+_lock = threading.Lock()
+_entries = collections.OrderedDict()  # key -> (expires_at, tables, value), least recently used first
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+def _copy(value):
+    # DataFrames (and anything else with a .copy(deep=...)) copy themselves; the rest is deep-copied
+    if hasattr(value, "copy") and hasattr(value, "columns"):
+        return value.copy(deep=True)
+    return copy.deepcopy(value)
+
+def ttl_for(tables):
+    """Shortest configured TTL (seconds) among the tables a query reads."""
+    return min(db_config.DB_QUERY_CACHE_TTLS.get(table, db_config.DB_QUERY_CACHE_DEFAULT_TTL) for table in tables)
+
+def get(key, copy_value=True):
+    """(True, copy of value) on a fresh hit, (False, None) otherwise; copy_value=False returns the cached object."""
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del _entries[key]
+            _stats["misses"] += 1
+            return False, None
+        _entries.move_to_end(key)
+        _stats["hits"] += 1
+        value = entry[2]
+    return True, _copy(value) if copy_value else value
+
+def put(key, value, tables, ttl=None):
+    ttl = ttl_for(tables) if ttl is None else ttl
+    value = _copy(value)
+    with _lock:
+        _entries[key] = (time.monotonic() + ttl, frozenset(tables), value)
+        _entries.move_to_end(key)
+        while len(_entries) > db_config.DB_QUERY_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+
+def invalidate(table=None):
+    """Drop every cached result that read `table` (everything when table is None)."""
+    with _lock:
+        if table is None:
+            dropped = len(_entries)
+            _entries.clear()
+        else:
+            stale = [key for key, (_, tables, _) in _entries.items() if table in tables]
+            for key in stale:
+                del _entries[key]
+            dropped = len(stale)
+        _stats["invalidations"] += dropped
+    return dropped
+
+def stats():
+    with _lock:
+        return dict(_stats, entries=len(_entries))
+
+def cached(tables, ttl=None):
+    """
+    Decorator that memoizes a db_functions query by its arguments.
+
+    `tables` lists every table the query reads; writes to any of them invalidate the result.
+    `wrapper.shared(...)` returns the cached object itself, for callers that only read from it.
+    """
+    def decorator(function):
+        def lookup(args, kwargs, copy_value):
+            if not db_config.DB_QUERY_CACHE_ENABLED:
+                return function(*args, **kwargs)
+
+            key = (function.__name__, args, tuple(sorted(kwargs.items())))
+            hit, value = get(key, copy_value)
+            if hit:
+                return value
+
+            value = function(*args, **kwargs)
+            if value is not None:
+                put(key, value, tables, ttl)
+            return value
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            return lookup(args, kwargs, True)
+
+        wrapper.shared = lambda *args, **kwargs: lookup(args, kwargs, False)
+        wrapper.uncached = function
+        return wrapper
+    return decorator
@@ -0,0 +1,335 @@
+# db_sqlite.py
+
+"""
+Embedded SQLite backend (DB_BACKEND = "sqlite" in db_config).
+
+Connections look like mysql-connector ones to db_connection and the rest of the package:
+is_connected(), cursor(dictionary=..., buffered=...), commit/rollback and MySQL-style `%s`
+queries. Each statement is translated to SQLite's dialect before it runs (placeholders,
+ON DUPLICATE KEY UPDATE, multi-table DELETE, temporary tables, information_schema.STATISTICS).
+
+The database lives in DB_SQLITE_PATH (or in memory with ":memory:"). A missing database is
+built from DB_SQLITE_SCHEMA_FILE plus the rows in DB_SQLITE_DUMP_FILE; a built file doubles as
+a snapshot that later runs open directly.
+
+    python -m database.db_sqlite                       build DB_SQLITE_PATH from the dump
+    python -m database.db_sqlite --output snap.sqlite3 --force
+"""
+
+import argparse
+import datetime
+import functools
+import os
+import re
+import sqlite3
+import sys
+import threading
+
+from . import db_config
+
+Error = sqlite3.Error
+
+MEMORY_PATH = ":memory:"
+MEMORY_URI = "file:tauronix_memory?mode=memory&cache=shared"
+
+_build_lock = threading.Lock()
+_memory_keeper = None  # Keeps the shared in-memory database alive for the life of the process
+
+# Tokens of a MySQL script: string literals, comments, statement separators and everything else
+_TOKENS = re.compile(r"'(?:[^'\\]|\\.|'')*'|--[^\n]*|/\*.*?\*/|;|[^'\-/;]+|.", re.S)
+_MYSQL_ESCAPES = {"'": "''", '"': '"', "\\": "\\", "n": "\n", "r": "\r", "t": "\t", "0": "\0", "Z": "\x1a"}
+
+# MySQL's index metadata, rebuilt from SQLite's index pragmas
+_STATISTICS = """(
+    SELECT 'main' AS TABLE_SCHEMA, m.name AS TABLE_NAME,
+           CASE il.origin WHEN 'pk' THEN 'PRIMARY' ELSE il.name END AS INDEX_NAME,
+           1 - il."unique" AS NON_UNIQUE, ii.seqno + 1 AS SEQ_IN_INDEX, ii.name AS COLUMN_NAME
+    FROM sqlite_master m
+    JOIN pragma_index_list(m.name) il
+    JOIN pragma_index_info(il.name) ii
+    WHERE m.type = 'table'
+)"""
+
+# Dates round-trip as ISO text, like the DATE/DATETIME columns they come from
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("date", lambda value: datetime.date.fromisoformat(value.decode()))
+sqlite3.register_converter("datetime", lambda value: datetime.datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("timestamp", lambda value: datetime.datetime.fromisoformat(value.decode()))
+
+def _tokens(sql):
+    return (match.group(0) for match in _TOKENS.finditer(sql))
+
+def _upsert(match):
+    # INSERT ... ON DUPLICATE KEY UPDATE c = VALUES(c) -> ON CONFLICT DO UPDATE SET c = excluded.c.
+    # Rows whose values did not change are left alone, so rowcount counts inserts and real updates.
+    assignments = [part.strip() for part in match.group(1).split(",")]
+    updates, changed = [], []
+    for assignment in assignments:
+        column, value = (part.strip() for part in assignment.split("=", 1))
+        values = re.fullmatch(r"VALUES\(\s*`?(\w+)`?\s*\)", value, re.I)
+        if values:
+            value = f"excluded.{values.group(1)}"
+            changed.append(f"{column} IS NOT {value}")
+        updates.append(f"{column} = {value}")
+    where = f" WHERE {' OR '.join(changed)}" if changed else ""
+    return f"ON CONFLICT DO UPDATE SET {', '.join(updates)}{where}"
+
+@functools.lru_cache(maxsize=256)
+def translate(query):
+    """Rewrite one MySQL statement (as the package writes them) for SQLite."""
+    # Placeholders, outside string literals only
+    query = "".join(token if token.startswith("'") else token.replace("%s", "?") for token in _tokens(query))
+    query = query.strip().rstrip(";")
+
+    query = query.replace("<=>", " IS ")
+    query = re.sub(r"information_schema\.STATISTICS\b", _STATISTICS, query, flags=re.I)
+    query = re.sub(r"ON DUPLICATE KEY UPDATE\s+(.+)$", _upsert, query, flags=re.I | re.S)
+    query = re.sub(r"^DELETE\s+(\w+)\s+FROM\s+(\w+)\s+\1\s+JOIN\s+(\w+)\s+(\w+)\s+ON\s+(.+)$",
+                   r"DELETE FROM \2 AS \1 WHERE EXISTS (SELECT 1 FROM \3 \4 WHERE \5)", query, flags=re.I | re.S)
+    query = re.sub(r"^DROP\s+TEMPORARY\s+TABLE\s+(IF\s+EXISTS\s+)?(\w+)$", r"DROP TABLE \1temp.\2", query, flags=re.I)
+    query = re.sub(r"^ALTER\s+TABLE\s+(\w+)\s+ADD\s+UNIQUE\s+(?:KEY|INDEX)\s+(\w+)\s*(\(.+\))$",
+                   r"CREATE UNIQUE INDEX \2 ON \1 \3", query, flags=re.I | re.S)
+    return query
+
+# ---- Loading MySQL dumps ----
+
+def split_statements(script):
+    """Statements of a MySQL script with comments removed and string escapes converted to SQLite's."""
+    statements, current = [], []
+    for token in _tokens(script):
+        if token == ";":
+            statements.append("".join(current).strip())
+            current = []
+        elif token.startswith("'"):
+            current.append("'" + re.sub(r"\\(.)", lambda m: _MYSQL_ESCAPES.get(m.group(1), m.group(1)), token[1:-1]) + "'")
+        elif not token.startswith(("--", "/*")):
+            current.append(token)
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+def _create_table(statement, keys, used_index_names):
+    """CREATE TABLE for SQLite plus its CREATE INDEX statements; `keys` holds the dump's ALTER TABLE additions."""
+    match = re.match(r"CREATE TABLE\s+`?(\w+)`?\s*\((.*)\)[^)]*$", statement, re.I | re.S)
+    table, body = match.group(1), match.group(2)
+
+    columns, indexes = [], []
+    for line in [line.strip().rstrip(",") for line in body.splitlines()] + keys.get(table, []):
+        if not line:
+            continue
+        key = re.match(r"(UNIQUE\s+)?(?:KEY|INDEX)\s+`?(\w+)`?\s*(\(.+\))", line, re.I)
+        if key:
+            name = key.group(2) if key.group(2) not in used_index_names else f"{table}_{key.group(2)}"
+            used_index_names.add(name)
+            indexes.append(f"CREATE {'UNIQUE ' if key.group(1) else ''}INDEX `{name}` ON `{table}` {key.group(3)}")
+            continue
+        line = re.sub(r"\s+(CHARACTER SET|COLLATE)\s+\w+|\s+AUTO_INCREMENT|\s+unsigned|\s+ON UPDATE current_timestamp\(\)",
+                      "", line, flags=re.I)
+        columns.append(re.sub(r"current_timestamp\(\)", "CURRENT_TIMESTAMP", line, flags=re.I))
+
+    return [f"CREATE TABLE `{table}` (\n  " + ",\n  ".join(columns) + "\n)"] + indexes
+
+def translate_dump(script, tables=True, rows=True):
+    """SQLite statements for a MySQL dump (tables=False keeps only the rows, rows=False only the tables)."""
+    statements = split_statements(script)
+
+    # Keys are added after the data in phpMyAdmin/mysqldump output; fold them into CREATE TABLE
+    keys = {}
+    for statement in statements:
+        alter = re.match(r"ALTER TABLE\s+`?(\w+)`?\s+(ADD\s.+)$", statement, re.I | re.S)
+        if alter:
+            for addition in re.split(r",\s*(?=ADD\s)", alter.group(2), flags=re.I):
+                keys.setdefault(alter.group(1), []).append(re.sub(r"^ADD\s+", "", addition.strip(), flags=re.I))
+
+    translated, used_index_names = [], set()
+    for statement in statements:
+        if tables and re.match(r"CREATE TABLE", statement, re.I):
+            translated.extend(_create_table(statement, keys, used_index_names))
+        elif rows and re.match(r"INSERT INTO", statement, re.I):
+            translated.append(statement)
+        # SET / LOCK / transaction control and ALTER TABLE ... MODIFY (AUTO_INCREMENT) have no SQLite equivalent
+    return translated
+
+def load_dump(connection, dump_file=None, schema_file=None):
+    """Create the tables (from schema_file when given, else the dump) and load the dump's rows."""
+    dump_file = dump_file or db_config.DB_SQLITE_DUMP_FILE
+    with open(dump_file, encoding="utf-8") as f:
+        dump = f.read()
+
+    statements = []
+    if schema_file:
+        with open(schema_file, encoding="utf-8") as f:
+            statements.extend(translate_dump(f.read(), rows=False))
+    statements.extend(translate_dump(dump, tables=not schema_file))
+
+    for statement in statements:
+        connection.execute(statement)
+    connection.commit()
+    return len(statements)
+
+# ---- Connections ----
+
+def _open(target, uri=False):
+    connection = sqlite3.connect(target, uri=uri, timeout=db_config.DB_SQLITE_TIMEOUT,
+                                 detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+    connection.create_function("DATABASE", 0, lambda: "main", deterministic=True)
+    connection.execute("PRAGMA foreign_keys = ON")
+    return connection
+
+def build_database(path, dump_file=None, schema_file=None):
+    """Build a database file from the dump (written to a temporary file first, then moved into place)."""
+    schema_file = db_config.DB_SQLITE_SCHEMA_FILE if schema_file is None else schema_file
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    partial = f"{path}.partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+    connection = _open(partial)
+    try:
+        connection.execute("PRAGMA journal_mode = WAL")  # Readers do not block each other or the writer
+        load_dump(connection, dump_file, schema_file or None)
+    finally:
+        connection.close()
+    os.replace(partial, path)
+    return path
+
+def snapshot(path, source=None):
+    """Copy the current database (file or in-memory) to `path` with SQLite's online backup."""
+    source = source or connect()
+    destination = sqlite3.connect(path)
+    try:
+        source._connection.backup(destination)
+    finally:
+        destination.close()
+    return path
+
+def connect(path=None):
+    """A new connection to the configured SQLite database, building it on first use."""
+    global _memory_keeper
+    path = path or db_config.DB_SQLITE_PATH
+
+    if path == MEMORY_PATH:
+        with _build_lock:
+            if _memory_keeper is None:
+                keeper = _open(MEMORY_URI, uri=True)
+                load_dump(keeper, schema_file=db_config.DB_SQLITE_SCHEMA_FILE or None)
+                _memory_keeper = keeper
+        return SQLiteConnection(_open(MEMORY_URI, uri=True))
+
+    if not os.path.exists(path):
+        with _build_lock:
+            if not os.path.exists(path):
+                print(f"Building SQLite database '{path}' from {db_config.DB_SQLITE_DUMP_FILE}...")
+                build_database(path)
+    return SQLiteConnection(_open(path))
+
+class SQLiteCursor:
+    """The parts of a mysql-connector cursor the package uses, over a sqlite3 cursor."""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, data=None):
+        self._cursor.execute(translate(query), tuple(data) if data else ())
+
+    def executemany(self, query, rows):
+        self._cursor.executemany(translate(query), rows)
+
+    def _rows(self, rows):
+        if not self._dictionary:
+            return rows
+        columns = [column[0] for column in self._cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def fetchall(self):
+        return self._rows(self._cursor.fetchall())
+
+    def fetchmany(self, size=None):
+        return self._rows(self._cursor.fetchmany(size or self._cursor.arraysize))
+
+    def fetchone(self):
+        rows = self._rows(self._cursor.fetchmany(1))
+        return rows[0] if rows else None
+
+    def close(self):
+        self._cursor.close()
+
+class SQLiteConnection:
+    """The parts of a mysql-connector connection the package uses, over a sqlite3 connection."""
+
+    unread_result = False  # sqlite3 cursors never block the connection with pending results
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._open = True
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    def is_connected(self):
+        return self._open
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        pass
+
+    def cursor(self, dictionary=False, buffered=True):
+        # Results are read lazily either way, so unbuffered streaming needs nothing extra
+        return SQLiteCursor(self._connection.cursor(), dictionary)
+
+    def consume_results(self):
+        pass
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        if self._open:
+            self._connection.close()
+            self._open = False
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a SQLite snapshot of the Tauronix database from a MySQL dump.")
+    parser.add_argument("--output", default=db_config.DB_SQLITE_PATH, help="database file to write")
+    parser.add_argument("--dump", default=db_config.DB_SQLITE_DUMP_FILE, help="MySQL dump with the rows")
+    parser.add_argument("--schema", default=db_config.DB_SQLITE_SCHEMA_FILE,
+                        help="table definitions ('' to use the dump's own)")
+    parser.add_argument("--force", action="store_true", help="replace an existing file")
+    args = parser.parse_args(argv)
+
+    if args.output == MEMORY_PATH:
+        print("Give a file name with --output; an in-memory database cannot be saved.")
+        return 1
+    if os.path.exists(args.output) and not args.force:
+        print(f"'{args.output}' already exists (use --force to rebuild it).")
+        return 1
+
+    try:
+        build_database(args.output, args.dump, args.schema)
+    except (OSError, Error) as e:
+        print(f"Error building SQLite database: {e}")
+        return 1
+
+    connection = sqlite3.connect(args.output)
+    tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")]
+    for table in tables:
+        print(f"  {table:<26} {connection.execute(f'SELECT COUNT(*) FROM `{table}`').fetchone()[0]:>8} rows")
+    connection.close()
+    print(f"SQLite database written to '{args.output}'.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# Column types for the frames built from query results. Numeric columns come back from
+# mysql-connector as Decimal objects; converting them column by column as the frame is built
+# keeps every frame out of object dtype. "volume" marks suffixed strings such as '276.73M'.
+COMPANY_INFO_TYPES = {
+    "CompanyID": "int64",
+    "CompanyName": "object",
+    "Location": "object",
+    "StockSymbol": "object"
+}
+
+DISCLOSURE_DATE_TYPES = {
+    "ID": "int64",
+    "Name": "object",
+    "Symbol": "object",
+    "Disclosure Date": "datetime64[ns]"
+}
+
+STOCK_DATA_TYPES = {
+    "CompanyID": "int64",
+    "Date": "datetime64[ns]",
+    "Open": "float64",
+    "High": "float64",
+    "Low": "float64",
+    "Close": "float64",
+    "AdjClose": "float64",
+    "Volume": "Int64"
+}
+
+DOW_JONES_TYPES = {
+    "Date": "datetime64[ns]",
+    "Price": "float64",
+    "Open": "float64",
+    "High": "float64",
+    "Low": "float64",
+    "Volume": "volume",
+    "Change_Percent": "float64"
+}
+
+STOCK_PRICE_AND_DOW_JONES_TYPES = {
+    "Company ID": "int64",
+    "Company Name": "object",
+    "Date": "datetime64[ns]",
+    "Stock Open": "float64",
+    "Stock High": "float64",
+    "Stock Close": "float64",
+    "Stock Volume": "Int64",
+    "Dow Jones Price": "float64",
+    "Dow Jones Open": "float64",
+    "Dow Jones High": "float64",
+    "Dow Jones Low": "float64",
+    "Dow Jones Volume": "volume",
+    "Dow Jones Change %": "float64"
+}
+
+VOLUME_SUFFIXES = {"K": 1e3, "M": 1e6, "B": 1e9}
+
+def parse_volume_strings(values):
+    # Vectorized parse of suffixed volume strings ('276.73M', '1.2B', '950K', '1200') into nullable int64.
+    text = pd.Series(values, dtype=object).astype("string").str.strip().str.upper().str.replace(",", "", regex=False)
+    parts = text.str.extract(r"^([0-9]*\.?[0-9]+)([KMB]?)$")
+    numbers = pd.to_numeric(parts[0], errors="coerce")
+    multipliers = parts[1].map(VOLUME_SUFFIXES).fillna(1.0).astype("float64")
+    return (numbers * multipliers).round().astype("Int64").reset_index(drop=True)
+
+def _convert_column(values, dtype):
+    # Build one typed column straight from the row values.
+    if dtype == "float64":
+        return np.fromiter((np.nan if value is None else float(value) for value in values),
+                           dtype=np.float64, count=len(values))
+    if dtype in ("int64", "Int64"):
+        series = pd.array([None if value is None else int(value) for value in values], dtype="Int64")
+        return series if dtype == "Int64" or series.isna().any() else series.astype("int64")
+    if dtype == "datetime64[ns]":
+        return pd.to_datetime(pd.Series(values, dtype=object)).astype("datetime64[ns]").to_numpy()
+    if dtype == "volume":
+        return parse_volume_strings(values).array
+    return np.array(values, dtype=dtype)
+
+def to_frame(rows, types):
+    # Build a DataFrame with the given {column: dtype} schema from cursor rows (tuples).
+    if not rows:
+        return empty_frame(types)
+
+    values_by_column = list(zip(*rows))
+    return pd.DataFrame({column: _convert_column(list(values), types[column])
+                         for column, values in zip(types, values_by_column)})
+
+def empty_frame(types):
+    return pd.DataFrame({column: pd.Series(dtype="Int64" if dtype == "volume" else dtype)
+                         for column, dtype in types.items()})
+
+def normalize_frame(df, types):
+    # Coerce an existing DataFrame to the schema (used for frames that did not come from a cursor).
+    df = df.copy()
+    for column, dtype in types.items():
+        if column not in df:
+            continue
+        if dtype == "volume":
+            if pd.api.types.is_numeric_dtype(df[column]):
+                df[column] = df[column].round().astype("Int64")
+            else:
+                df[column] = parse_volume_strings(df[column]).array
+        elif dtype == "float64":
+            df[column] = pd.to_numeric(df[column]).astype("float64")
+        elif dtype in ("int64", "Int64"):
+            df[column] = pd.to_numeric(df[column]).astype("Int64")
+            if dtype == "int64" and not df[column].isna().any():
+                df[column] = df[column].astype("int64")
+        elif dtype == "datetime64[ns]":
+            df[column] = pd.to_datetime(df[column]).astype("datetime64[ns]")
+    return df
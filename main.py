@@ -1,11 +1,13 @@
 # main.py
 
-import pandas as pd
+import argparse
+import datetime
+import sys
 
-from database import db_functions, db_check_stock_records
-from utils import display_func, utils_func, app_config
-from analysis import process_disclosure_dates
-from tabulate import tabulate
+# Only light modules are imported at startup. pandas, tabulate, the MySQL connector and the
+# analysis code are imported by the report that needs them (see scripts/check_startup_time.py).
+from utils import display_func, export_func, app_config
+from analysis import data_context
 
 def main_menu():
     """Display the main menu with 'Main Menu' as the title."""
@@ -23,96 +25,180 @@ def main_menu():
     print(f"{'Main Menu'.center(app_config.LINE_LENGTH)}")
     print("=" * app_config.LINE_LENGTH + "\n")
     print("Please select an option from the menu below:\n")
-    
+
     for option in options:
         print(f"    {option}")
-    
+
     print("\n" + "=" * app_config.LINE_LENGTH)
 
-def handle_menu_choice(choice):
-    """Handles the menu choice entered by the user."""
-    if choice == "1":
-        company_info_df = db_functions.retrieve_company_info()
-        display_func.display_compnay_info(company_info_df)
+def report_company_info(context, interactive=True):
+    """Displays the company information and saves it to Excel (after asking, when interactive)."""
+    from utils import utils_func
 
+    company_info_df = context.company_info
+    display_func.display_compnay_info(company_info_df)
+    if company_info_df.empty:
+        return False
+
+    if interactive:
         # Prompt user for saving to Excel
         utils_func.prompt_save_excel(company_info_df, "company_info.xlsx")
+    else:
+        utils_func.output_to_excel(company_info_df, "company_info.xlsx")
+    return True
+
+def report_disclosure_dates(context):
+    """Displays the disclosure dates with per-company counts and exports both to Excel."""
+    if context.disclosure_dates.empty:
+        print("[Error] No disclosure dates retrieved.")
+        return False
+
+    import pandas as pd
+    from tabulate import tabulate
+    from utils import utils_func
+
+    # The shared frame is reused by other reports, so reformat a copy
+    disclosure_dates_df = context.disclosure_dates.copy()
+
+    # Ensure the 'Disclosure Date' column is converted to datetime format
+    disclosure_dates_df['Disclosure Date'] = pd.to_datetime(disclosure_dates_df['Disclosure Date'], errors='coerce')
+
+    # Format the Disclosure Date to have abbreviated month names (e.g., 'Mar' instead of '03')
+    disclosure_dates_df['Disclosure Date'] = disclosure_dates_df['Disclosure Date'].dt.strftime("%b %d, %Y")
+
+    # Convert DataFrame to a list of lists without including the index
+    disclosure_dates = disclosure_dates_df.values.tolist()
+    headers = disclosure_dates_df.columns.tolist()
+
+    # Display the disclosure dates in a nice table format without the index
+    print("\nDisclosure Dates:")
+    print(tabulate(disclosure_dates, headers=headers, tablefmt="pretty"))
+
+    # Perform analysis - Number of disclosure dates per company and most recent disclosure
+    analysis_df = disclosure_dates_df.groupby(['ID', 'Name', 'Symbol']).agg(
+        num_disclosures=('Disclosure Date', 'count'),
+        most_recent_disclosure=('Disclosure Date', 'max')
+    ).reset_index()
+
+    # Merge the analysis data with the original DataFrame for exporting
+    merged_df = pd.merge(disclosure_dates_df, analysis_df, on=['ID', 'Name', 'Symbol'], how='left')
+
+    # Rename columns for clarity
+    merged_df = merged_df.rename(columns={
+        'num_disclosures': '# Disclosures',
+        'most_recent_disclosure': 'Most Recent'
+    })
+
+    # Display analysis results in the required format
+    analysis_headers = ["ID", "Name", "Symbol", "# Disclosures", "Most Recent"]
+    analysis_data = analysis_df.values.tolist()
+
+    print("\nDisclosure Dates Analysis:")
+    print(tabulate(analysis_data, headers=analysis_headers, tablefmt="pretty"))
+
+    # Export the merged data (including the new columns) to an Excel file
+    utils_func.output_to_excel(merged_df, "disclosure_dates_with_analysis.xlsx")
+    print("Disclosure dates exported to 'disclosure_dates_with_analysis.xlsx'.")
+    return True
+
+def prompt_company_ids():
+    """Asks whether to limit results by Company ID. Returns (ok, company_ids or None)."""
+    limit_results = input("\nWould you like to limit the results by specific Company IDs? (y/n): ").strip().lower()
+    if limit_results != "y":
+        return True, None
+
+    company_ids_input = input("Enter the Company IDs separated by commas (e.g., 1, 2, 3): ").strip()
+    try:
+        # Convert the input string to a list of integers (company IDs)
+        return True, parse_company_ids(company_ids_input)
+    except ValueError:
+        print("[Error] Invalid input. Please enter valid company IDs separated by commas.")
+        return False, None
+
+def parse_company_ids(text):
+    """'1, 2, 3' -> [1, 2, 3]; raises ValueError on anything that is not an integer."""
+    return [int(company_id.strip()) for company_id in text.split(',')]
+
+def report_stock_data(context, company_ids=None, fmt="xlsx"):
+    """
+    Exports the stock price + Dow Jones join, optionally limited to some Company IDs. When the
+    context already holds the input frames (as in `all`) the join is built from them; otherwise
+    it is streamed from the database chunk by chunk straight into the file.
+    """
+    from database import db_functions, db_types
+
+    if context.loaded(("company_info", "stock_data", "dow_jones")):
+        chunks = context.iter_stock_price_and_dow_jones(company_ids)
+    else:
+        chunks = db_functions.iter_stock_price_and_dow_jones_data(company_ids=company_ids)
+    rows = export_func.export(chunks, f"stock_price_and_dow_jones.{fmt}", fmt,
+                              types=db_types.STOCK_PRICE_AND_DOW_JONES_TYPES)
+    if not rows:
+        print("[Error] No stock data retrieved.")
+        return False
+    return True
+
+def report_duplicates(context, dry_run=False):
+    """Runs the duplicate stock record check; a real dedupe invalidates the loaded frames."""
+    from database import db_check_stock_records
+
+    db_check_stock_records.check_for_duplicate_rows(dry_run=dry_run)
+    if not dry_run:
+        context.clear()
+    return True
+
+def report_analysis(context):
+    """Writes the disclosure, event window and event study workbook."""
+    from analysis import process_disclosure_dates
+
+    return process_disclosure_dates.run_stock_analysis(context) is not None
+
+def report_backfill(context, company_ids=None, start=None, end=None, max_gap=0, dry_run=False):
+    """Lists the trading sessions missing from stock_data and loads only those from Polygon."""
+    from analysis import gap_detection
+
+    gaps = gap_detection.detect_gaps(company_ids, start, end, max_gap, context)
+    if gaps is None:
+        return False
+    gap_detection.print_gap_report(gaps)
+    if dry_run or gaps.empty:
+        return True
+
+    totals = gap_detection.backfill(gaps)
+    if totals is None:
+        return False
+    context.clear()  # The stored stock data changed
+    print(f"\nBackfilled {totals['ranges'] - totals['failed']} of {totals['ranges']} ranges: "
+          f"{totals['inserted']} rows inserted, {totals['updated']} updated.")
+    for symbol, from_date, to_date in totals["failed_ranges"]:
+        print(f"[!!] Not filled: {symbol} {from_date} to {to_date}")
+    return totals["failed"] == 0
+
+def handle_menu_choice(choice, context=None):
+    """Handles the menu choice entered by the user."""
+    context = context or data_context.AnalysisContext()
+
+    if choice == "1":
+        report_company_info(context)
 
     elif choice == "2":
-        disclosure_dates_df = db_functions.retrieve_company_disclosure_dates()
-        if disclosure_dates_df.empty:
-            print("[Error] No disclosure dates retrieved.")
-        else:
-            # Ensure the 'Disclosure Date' column is converted to datetime format
-            disclosure_dates_df['Disclosure Date'] = pd.to_datetime(disclosure_dates_df['Disclosure Date'], errors='coerce')
-
-            # Format the Disclosure Date to have abbreviated month names (e.g., 'Mar' instead of '03')
-            disclosure_dates_df['Disclosure Date'] = disclosure_dates_df['Disclosure Date'].dt.strftime("%b %d, %Y")
-
-            # Convert DataFrame to a list of lists without including the index
-            disclosure_dates = disclosure_dates_df.values.tolist()
-            headers = disclosure_dates_df.columns.tolist()
-
-            # Display the disclosure dates in a nice table format without the index
-            print("\nDisclosure Dates:")
-            print(tabulate(disclosure_dates, headers=headers, tablefmt="pretty"))
-
-            # Perform analysis - Number of disclosure dates per company and most recent disclosure
-            analysis_df = disclosure_dates_df.groupby(['ID', 'Name', 'Symbol']).agg(
-                num_disclosures=('Disclosure Date', 'count'),
-                most_recent_disclosure=('Disclosure Date', 'max')
-            ).reset_index()
-
-            # Merge the analysis data with the original DataFrame for exporting
-            merged_df = pd.merge(disclosure_dates_df, analysis_df, on=['ID', 'Name', 'Symbol'], how='left')
-
-            # Rename columns for clarity
-            merged_df = merged_df.rename(columns={
-                'num_disclosures': '# Disclosures',
-                'most_recent_disclosure': 'Most Recent'
-            })
-
-            # Display analysis results in the required format
-            analysis_headers = ["ID", "Name", "Symbol", "# Disclosures", "Most Recent"]
-            analysis_data = analysis_df.values.tolist()
-            
-            print("\nDisclosure Dates Analysis:")
-            print(tabulate(analysis_data, headers=analysis_headers, tablefmt="pretty"))
-            
-            # Export the merged data (including the new columns) to an Excel file
-            utils_func.output_to_excel(merged_df, "disclosure_dates_with_analysis.xlsx")
-            print("Disclosure dates exported to 'disclosure_dates_with_analysis.xlsx'.")
+        report_disclosure_dates(context)
 
     elif choice == "3":
-        # Display Company Info
-        company_info_df = db_functions.retrieve_company_info()
-        display_func.display_compnay_info(company_info_df)
-
-        # Prompt the user if they want to limit the results by specific company IDs
-        limit_results = input("\nWould you like to limit the results by specific Company IDs? (y/n): ").strip().lower()
-        
-        company_ids = None
-        if limit_results == "y":
-            company_ids_input = input("Enter the Company IDs separated by commas (e.g., 1, 2, 3): ").strip()
-            try:
-                # Convert the input string to a list of integers (company IDs)
-                company_ids = [int(company_id.strip()) for company_id in company_ids_input.split(',')]
-            except ValueError:
-                print("[Error] Invalid input. Please enter valid company IDs separated by commas.")
-                return  # Exit the function to prevent further errors
-
-        # Get Stock Data, passing the list of company IDs if available
-        df_stock_data = db_functions.retrieve_stock_price_and_dow_jones_data(company_ids=company_ids)
-        if df_stock_data is None or df_stock_data.empty:
-            print("[Error] No stock data retrieved.")
-        else:
-            utils_func.output_to_excel(df_stock_data, "stock_price_and_dow_jones.xlsx")
+        # Display Company Info (already loaded if option 1 ran this session)
+        display_func.display_compnay_info(context.company_info)
+
+        ok, company_ids = prompt_company_ids()
+        if not ok:
+            return True  # Exit the option to prevent further errors
+        report_stock_data(context, company_ids)
 
     elif choice == "4":
-        db_check_stock_records.check_for_duplicate_rows()
+        dry_run = input("\nReport only, without removing duplicates? (y/n): ").strip().lower() == "y"
+        report_duplicates(context, dry_run)
 
     elif choice == "5":
-        process_disclosure_dates.run_stock_analysis()
+        report_analysis(context)
 
     elif choice == "6":
         display_func.about_message()
@@ -123,19 +209,109 @@ def handle_menu_choice(choice):
 
     else:
         print("\n[Error] Invalid choice. Please select a valid option.")
-    
+
     return True
 
-def main():
+def _company_ids_argument(text):
+    try:
+        return parse_company_ids(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected Company IDs separated by commas, e.g. 1,2,3")
+
+def _date_argument(text):
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected a date as YYYY-MM-DD")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Tauronix data breach stock analysis. Runs the interactive menu when no command is given.")
+    parser.add_argument("--instrument", action="store_true",
+                        help="time every query and API call and print a summary at exit")
+    parser.add_argument("--metrics-file", help="also write one JSON line per timed call to this file")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    commands.add_parser("company-info", help="export company information")
+    commands.add_parser("disclosures", help="export disclosure dates with per-company counts")
+
+    stock = commands.add_parser("stock-data", help="export stock prices joined with the Dow Jones")
+    stock.add_argument("--company-ids", type=_company_ids_argument, help="limit to these Company IDs (e.g. 1,2,3)")
+    stock.add_argument("--format", choices=export_func.FORMATS, default="xlsx", help="export file format")
+
+    duplicates = commands.add_parser("duplicates", help="remove duplicate stock records")
+    duplicates.add_argument("--dry-run", action="store_true", help="report only, without removing duplicates")
+
+    commands.add_parser("analysis", help="write the analysis workbook")
+
+    backfill = commands.add_parser("backfill", help="fetch only the trading sessions missing from stock_data")
+    backfill.add_argument("--company-ids", type=_company_ids_argument, help="limit to these Company IDs (e.g. 1,2,3)")
+    backfill.add_argument("--start", type=_date_argument,
+                          help="check from this date (default: each company's first stored session)")
+    backfill.add_argument("--end", type=_date_argument, help="check up to this date (default: last completed session)")
+    backfill.add_argument("--max-gap", type=int, default=0,
+                          help="merge ranges at most this many stored sessions apart into one request")
+    backfill.add_argument("--dry-run", action="store_true", help="list the missing ranges without fetching them")
+
+    pipeline = commands.add_parser("all", help="run every report, loading the data once")
+    pipeline.add_argument("--company-ids", type=_company_ids_argument, help="limit the stock data export")
+    pipeline.add_argument("--format", choices=export_func.FORMATS, default="xlsx", help="stock data export format")
+    pipeline.add_argument("--fix-duplicates", action="store_true",
+                          help="remove duplicate stock records first (default: report only)")
+
+    return parser.parse_args(argv)
+
+def run_batch(args):
+    """Runs one batch command without prompting. Returns the process exit code."""
+    context = data_context.AnalysisContext()
+
+    if args.command == "company-info":
+        ok = report_company_info(context, interactive=False)
+    elif args.command == "disclosures":
+        ok = report_disclosure_dates(context)
+    elif args.command == "stock-data":
+        ok = report_stock_data(context, args.company_ids, args.format)
+    elif args.command == "duplicates":
+        ok = report_duplicates(context, args.dry_run)
+    elif args.command == "analysis":
+        ok = report_analysis(context)
+    elif args.command == "backfill":
+        ok = report_backfill(context, args.company_ids, args.start, args.end, args.max_gap, args.dry_run)
+    else:
+        # Check duplicates before loading so every report sees the same, cleaned data
+        results = [report_duplicates(context, dry_run=not args.fix_duplicates)]
+        context.load_all()
+        results += [
+            report_company_info(context, interactive=False),
+            report_disclosure_dates(context),
+            report_stock_data(context, args.company_ids, args.format),
+            report_analysis(context)
+        ]
+        ok = all(results)
+
+    return 0 if ok else 1
+
+def main(argv=None):
     """Main function to run the application."""
+    args = parse_args(argv)
+    if args.instrument or args.metrics_file:
+        from utils import instrumentation
+        instrumentation.enable(metrics_file=args.metrics_file)
+
+    if args.command:
+        return run_batch(args)
+
     display_func.display_welcome_message()
-    
+
+    # Frames loaded by one option are reused by the next
+    context = data_context.AnalysisContext()
     while True:
         main_menu()
         choice = input("\nEnter your choice: ").strip()
-        if not handle_menu_choice(choice):
+        if not handle_menu_choice(choice, context):
             break
         input("\nPress Enter to return to the main menu...")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
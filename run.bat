@@ -47,6 +47,18 @@ IF %ERRORLEVEL% NEQ 0 (
     pip install tabulate
 )
 
+pip show aiohttp >nul 2>&1
+IF %ERRORLEVEL% NEQ 0 (
+    echo Installing aiohttp...
+    pip install aiohttp
+)
+
+pip show pyarrow >nul 2>&1
+IF %ERRORLEVEL% NEQ 0 (
+    echo Installing pyarrow...
+    pip install pyarrow
+)
+
 :: Start the application
 echo Starting the application...
 python main.py
@@ -0,0 +1,109 @@
+# check_startup_time.py
+#
+# Measures the cold-start import cost of the CLI entry points with `python -X importtime`
+# and fails when it regresses: either the median total import time exceeds the budget in
+# app_config, or a heavy dependency that should load lazily is imported at startup.
+#
+#   python scripts/check_startup_time.py [--runs 5] [--top 10] [--json output/startup.json]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import app_config
+
+def import_times(module):
+    """
+    Import `module` in a fresh interpreter and return {module name: (self us, cumulative us)}
+    for the modules it pulled in. Interpreter startup (site and friends) is left out.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip()}")
+
+    # Lines are printed as imports finish, so the entry point's subtree is everything between
+    # the previous top-level (unindented) import and the entry point's own line
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        top_level = name.strip() == name[1:]
+        if top_level and name.strip() != module:
+            times = {}
+            continue
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def check_entry_point(module, runs, top):
+    # The entry point's cumulative time covers everything it imports, but not interpreter startup
+    samples = [import_times(module) for _ in range(runs)]
+    totals_ms = [times[module][1] / 1000 for times in samples]
+    median_ms = statistics.median(totals_ms)
+
+    # Report the run closest to the median so the per-module numbers match the headline figure
+    times = samples[min(range(runs), key=lambda i: abs(totals_ms[i] - median_ms))]
+    eager = [name for name in app_config.STARTUP_LAZY_MODULES if name in times]
+
+    print(f"\n{module}: {median_ms:.1f} ms median import time over {runs} runs "
+          f"(budget {app_config.STARTUP_IMPORT_BUDGET_MS} ms)")
+    print(f"  {'Module':<40} {'Self ms':>9} {'Cumulative ms':>14}")
+    slowest = sorted(times.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {name:<40} {self_us / 1000:>9.1f} {cumulative_us / 1000:>14.1f}")
+
+    failures = []
+    if median_ms > app_config.STARTUP_IMPORT_BUDGET_MS:
+        failures.append(f"{module}: {median_ms:.1f} ms exceeds the {app_config.STARTUP_IMPORT_BUDGET_MS} ms budget")
+    if eager:
+        failures.append(f"{module}: imports {', '.join(eager)} at startup")
+
+    report = {
+        "module": module,
+        "runs_ms": totals_ms,
+        "median_ms": median_ms,
+        "budget_ms": app_config.STARTUP_IMPORT_BUDGET_MS,
+        "eager_heavy_modules": eager,
+        "modules": {name: {"self_ms": s / 1000, "cumulative_ms": c / 1000} for name, (s, c) in times.items()},
+    }
+    return report, failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the cold-start import time of the CLI entry points.")
+    parser.add_argument("modules", nargs="*", default=list(app_config.STARTUP_ENTRY_POINTS),
+                        help="entry point modules to check")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per entry point")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    parser.add_argument("--json", help="also write the per-module timings to this file")
+    args = parser.parse_args(argv)
+
+    reports, failures = [], []
+    for module in args.modules:
+        report, module_failures = check_entry_point(module, args.runs, args.top)
+        reports.append(report)
+        failures += module_failures
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\nTimings written to '{args.json}'.")
+
+    print()
+    for failure in failures:
+        print(f"[!!] {failure}")
+    if not failures:
+        print("[OK] Startup within budget.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
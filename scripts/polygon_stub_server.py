@@ -0,0 +1,102 @@
+# polygon_stub_server.py
+#
+# Local stand-in for the Polygon aggregates endpoint, used to exercise the fetchers without
+# spending API quota. Serves deterministic daily bars for weekdays in the requested range.
+#
+#   python scripts/polygon_stub_server.py --port 8765 --throttle-every 4 --page-limit 100
+#   base_url="http://127.0.0.1:8765"
+
+import argparse
+import datetime
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from zoneinfo import ZoneInfo
+
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+
+AGGS_PATH = re.compile(r"^/v2/aggs/ticker/(?P<ticker>[^/]+)/range/(?P<multiplier>\d+)/(?P<timespan>\w+)/"
+                       r"(?P<from_date>[\d-]+)/(?P<to_date>[\d-]+)$")
+
+def synthetic_bars(ticker, from_date, to_date):
+    """Deterministic daily bars (one per weekday) for a ticker and date range."""
+    seed = sum(ord(ch) for ch in ticker)
+    day = datetime.date.fromisoformat(from_date)
+    end = datetime.date.fromisoformat(to_date)
+    bars = []
+    while day <= end:
+        if day.weekday() < 5:
+            n = day.toordinal()
+            base = 50 + seed % 50 + (n % 17) * 0.5
+            # Polygon stamps daily bars at midnight New York time
+            timestamp = int(datetime.datetime(day.year, day.month, day.day, tzinfo=MARKET_TIMEZONE).timestamp() * 1000)
+            bars.append({"t": timestamp, "o": base, "h": base + 1.0, "l": base - 1.0, "c": base + 0.25,
+                         "v": 1_000_000 + (n * seed) % 500_000, "vw": base + 0.1, "n": 5_000 + n % 1_000})
+        day += datetime.timedelta(days=1)
+    return bars
+
+class StubHandler(BaseHTTPRequestHandler):
+    throttle_every = 0
+    page_limit = 0
+    request_count = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.request_count += 1
+            count = StubHandler.request_count
+
+        if self.throttle_every and count % self.throttle_every == 0:
+            self._send(429, {"status": "ERROR", "error": "Too many requests"}, {"Retry-After": "1"})
+            return
+
+        match = AGGS_PATH.match(self.path.split("?", 1)[0])
+        if not match:
+            self._send(404, {"status": "NOT_FOUND"})
+            return
+
+        # Page through the bars the way Polygon does: `limit` per response plus a next_url cursor
+        query = parse_qs(urlsplit(self.path).query)
+        limit = int(query.get("limit", [self.page_limit])[0])
+        limit = min(limit, self.page_limit) if self.page_limit else limit
+        offset = int(query.get("cursor", ["0"])[0])
+
+        bars = synthetic_bars(match["ticker"], match["from_date"], match["to_date"])
+        page = bars[offset:offset + limit]
+        body = {"ticker": match["ticker"], "queryCount": len(page), "resultsCount": len(page),
+                "adjusted": True, "status": "OK", "results": page}
+        if offset + limit < len(bars):
+            host = self.headers.get("Host", "127.0.0.1")
+            body["next_url"] = f"http://{host}{urlsplit(self.path).path}?cursor={offset + limit}&limit={limit}"
+        self._send(200, body)
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Polygon aggregates API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with 429.")
+    parser.add_argument("--page-limit", type=int, default=0, help="Cap bars per response to force next_url paging.")
+    args = parser.parse_args()
+
+    StubHandler.throttle_every = args.throttle_every
+    StubHandler.page_limit = args.page_limit
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"Polygon stand-in listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
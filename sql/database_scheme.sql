@@ -3,7 +3,9 @@ CREATE TABLE `company_info` (
   `CompanyName` varchar(255) NOT NULL,
   `Location` varchar(255) DEFAULT NULL,
   `StockSymbol` varchar(10) DEFAULT NULL,
-  `note` varchar(200) DEFAULT NULL
+  `note` varchar(200) DEFAULT NULL,
+  PRIMARY KEY (`CompanyID`),
+  KEY `idx_company_symbol` (`StockSymbol`)
 );
 
 CREATE TABLE `data_breach_disclosures` (
@@ -12,7 +14,10 @@ CREATE TABLE `data_breach_disclosures` (
   `DisclosureDate` date NOT NULL,
   `Perpetrators` varchar(200) DEFAULT NULL,
   `Description` text DEFAULT NULL,
-  `Impact` text DEFAULT NULL
+  `Impact` text DEFAULT NULL,
+  PRIMARY KEY (`DisclosureID`),
+  KEY `idx_disclosure_company_date` (`CompanyID`, `DisclosureDate`),
+  CONSTRAINT `fk_disclosure_company` FOREIGN KEY (`CompanyID`) REFERENCES `company_info` (`CompanyID`)
 );
 
 CREATE TABLE `dow_jones` (
@@ -22,18 +27,21 @@ CREATE TABLE `dow_jones` (
   `High` decimal(10,2) DEFAULT NULL,
   `Low` decimal(10,2) DEFAULT NULL,
   `Volume` varchar(20) DEFAULT NULL,
-  `Change_Percent` decimal(5,2) DEFAULT NULL
+  `Change_Percent` decimal(5,2) DEFAULT NULL,
+  PRIMARY KEY (`Date`)
 );
 
 CREATE TABLE `stock_data` (
-  `CompanyID` int(11) DEFAULT NULL,
-  `Date` date DEFAULT NULL,
+  `CompanyID` int(11) NOT NULL,
+  `Date` date NOT NULL,
   `Open` decimal(15,6) DEFAULT NULL,
   `High` decimal(15,6) DEFAULT NULL,
   `Low` decimal(15,6) DEFAULT NULL,
   `Close` decimal(15,6) DEFAULT NULL,
   `AdjClose` decimal(15,6) DEFAULT NULL,
-  `Volume` int(11) DEFAULT NULL
+  `Volume` int(11) DEFAULT NULL,
+  PRIMARY KEY (`CompanyID`, `Date`),
+  CONSTRAINT `fk_stock_company` FOREIGN KEY (`CompanyID`) REFERENCES `company_info` (`CompanyID`)
 );
 
 CREATE TABLE `threat_actors` (
@@ -4,9 +4,8 @@
 from datetime import datetime, timedelta
 
 # Custom Libraries
-from database import db_functions
-from utils import utils_plots, display_func
-from api_requests import polygon_requests
+# The Polygon client, database layer and matplotlib are imported by the menu action that uses them
+from utils import display_func
 
 def process_stock_data(data):
     # Initialize total statistics
@@ -103,11 +102,12 @@ def display_menu():
     print("="*60)
     print("1. Fetch Stock Data")
     print("2. Plot Stock Data")
+    print("3. Load Stock Data into Database")
     print("0. Exit")
     print("="*60)
 
-# Function to get stock data and format it
-def fetch_stock_data():
+# Function to prompt for the ticker and date range
+def prompt_fetch_parameters():
     while True:
         ticker = input("\nEnter the stock ticker symbol: ").strip().upper()
         if not ticker:
@@ -127,8 +127,20 @@ def fetch_stock_data():
     from_date = input(f"Enter the start date (YYYY-MM-DD) [default: {start_date}]: ").strip() or start_date
     to_date = input(f"Enter the end date (YYYY-MM-DD) [default: {end_date}]: ").strip() or end_date
 
-    # Fetch and format aggregate data
-    aggregate_data = polygon_requests.get_api_data(ticker, from_date, to_date)
+    return ticker, from_date, to_date
+
+# Function to get stock data and format it
+def fetch_stock_data():
+    parameters = prompt_fetch_parameters()
+    if parameters is None:
+        return None, None, None
+    ticker, from_date, to_date = parameters
+
+    from api_requests import polygon_cache
+    from database import db_functions
+
+    # Fetch and format aggregate data (only the days not already cached are requested)
+    aggregate_data = polygon_cache.get_api_data(ticker, from_date, to_date)
 
     results = db_functions.get_company_id_and_name_by_symbol(ticker)
 
@@ -161,6 +173,9 @@ def main():
                 if save_plots == 'y':
                     plot_stock_data(company_name, stock_data) 
 
+        elif choice == '3':
+            load_stock_data()
+
         elif choice == '0':
             print("\nExiting the program.")
             break
@@ -168,30 +183,31 @@ def main():
         else:
             print("\n[Error] Invalid choice. Please select a valid option.")
 
+# Function to stream bars from Polygon straight into the stock_data table
+def load_stock_data():
+    parameters = prompt_fetch_parameters()
+    if parameters is None:
+        return
+    ticker, from_date, to_date = parameters
+
+    from api_requests import polygon_requests
+    from database import db_ingest
+
+    batches = polygon_requests.iter_api_data(ticker, from_date, to_date)
+    db_ingest.load_polygon_bars(ticker, batches)
+
 def plot_stock_data(company_name, stock_data):
     # Clean the company name by removing any '.' or ',' and truncating to 10 characters
     cleaned_company_name = company_name.replace('.', '').replace(',', '').replace(' ', '')[:10]
 
     # Try plotting and saving the stock data and other metrics
     try:
-        # Plot stock prices (closing, vwaps, open, high, low)
-        utils_plots.plot_stock_data(cleaned_company_name,
-                                    stock_data['dates'],
-                                    stock_data['closing_prices'],
-                                    stock_data['vwaps'],
-                                    stock_data['opening_prices'],
-                                    stock_data['stock_highs'],
-                                    stock_data['stock_lows'])
-
-        # Plot the number of trades
-        utils_plots.plot_number_of_trades(cleaned_company_name,
-                                          stock_data['dates'],
-                                          stock_data['stock_trades'])
-
-        # Plot the volume over time
-        utils_plots.plot_volume(cleaned_company_name,
-                                stock_data['dates'],
-                                stock_data['volume'])
+        from utils import utils_plots
+
+        # Price, volume and trades charts, with the render time of each
+        records = utils_plots.render_charts([(cleaned_company_name, stock_data)], max_workers=1)
+        if any(record['error'] for record in records):
+            return
 
         # If no errors, display success message with cleaned and truncated company name
         print(f"\nPlots were saved as '{cleaned_company_name}_*.png' in the 'output' directory.")
@@ -0,0 +1,25 @@
+# conftest.py
+
+# The packages are imported from the repository root (as main.py does), so put it on the path
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+@pytest.fixture
+def sqlite_database(tmp_path, monkeypatch):
+    """A fresh SQLite database built from the bundled dump, with the local caches under tmp_path."""
+    from database import db_config, db_query_cache, db_sqlite
+
+    path = str(tmp_path / "tauronix.sqlite3")
+    db_sqlite.build_database(path, os.path.join(ROOT, "sql", "database_full.sql"),
+                             os.path.join(ROOT, "sql", "database_scheme.sql"))
+    monkeypatch.setattr(db_config, "DB_BACKEND", "sqlite")
+    monkeypatch.setattr(db_config, "DB_SQLITE_PATH", path)
+    monkeypatch.setattr(db_config, "DB_CACHE_DIR", str(tmp_path / "cache"))
+    db_query_cache.invalidate()
+    yield path
+    db_query_cache.invalidate()
@@ -0,0 +1,30 @@
+# test_data_context.py
+
+import pandas as pd
+
+from analysis import data_context
+from database import db_functions
+
+def test_join_from_loaded_frames_matches_the_database_stream(sqlite_database):
+    context = data_context.AnalysisContext().load_all()
+    assert context.loaded(("company_info", "stock_data", "dow_jones"))
+
+    for company_ids in (None, [2, 8]):
+        expected = pd.concat(db_functions.iter_stock_price_and_dow_jones_data(company_ids=company_ids), ignore_index=True)
+        chunks = list(context.iter_stock_price_and_dow_jones(company_ids, chunk_size=100))
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+def test_frames_are_loaded_once(sqlite_database, monkeypatch):
+    calls = []
+    retrieve = db_functions.retrieve_stock_data
+    monkeypatch.setattr(db_functions, "retrieve_stock_data", lambda: calls.append(1) or retrieve())
+
+    context = data_context.AnalysisContext()
+    assert not context.loaded(("stock_data",))
+    context.prefetch(("stock_data", "dow_jones"))
+    context.stock_data
+    assert len(calls) == 1
+    context.clear()
+    context.stock_data
+    assert len(calls) == 2
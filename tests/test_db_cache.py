@@ -0,0 +1,51 @@
+# test_db_cache.py
+
+import pandas as pd
+
+from database import db_cache
+from database import db_connection as db
+
+def _execute(query, data=None):
+    with db.pooled_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(query, data)
+        connection.commit()
+        cursor.close()
+
+def _stored(table):
+    with db.pooled_connection() as connection:
+        return db.execute_query(connection, f"SELECT COUNT(*) FROM {table}")[0][0]
+
+def test_refresh_pulls_only_rows_after_the_watermark(sqlite_database):
+    assert db_cache.refresh() == {"stock_data": _stored("stock_data"), "dow_jones": _stored("dow_jones")}
+    assert db_cache.refresh() == {"stock_data": 0, "dow_jones": 0}
+
+    _execute("INSERT INTO stock_data (CompanyID, Date, Close, AdjClose, Volume) VALUES (2, '2030-01-02', 50, 50, 1000)")
+    assert db_cache.refresh("stock_data") == {"stock_data": 1}
+
+    df = db_cache.read_table("stock_data")
+    assert len(df) == _stored("stock_data")
+    assert df[df["CompanyID"] == 2]["Date"].max() == pd.Timestamp("2030-01-02")
+
+def test_parts_written_again_are_read_once(sqlite_database):
+    db_cache.refresh()
+    stock, dow = db_cache.read_table("stock_data"), db_cache.read_table("dow_jones")
+
+    # A refresh that wrote its parts but never saved the watermark pulls the same rows again
+    changed = stock[stock["CompanyID"] == 2].assign(Close=1.0)
+    db_cache._write_partitions("stock_data", changed)
+    db_cache._write_partitions("dow_jones", dow)
+
+    df = db_cache.read_table("stock_data")
+    assert len(df) == len(stock)
+    assert (df[df["CompanyID"] == 2]["Close"] == 1.0).all()
+    pd.testing.assert_frame_equal(db_cache.read_table("dow_jones"), dow)
+
+def test_invalidated_company_is_pulled_again(sqlite_database):
+    db_cache.refresh()
+    count = int((db_cache.read_table("stock_data")["CompanyID"] == 2).sum())
+
+    db_cache.invalidate("stock_data", 2)
+    assert not (db_cache.read_table("stock_data")["CompanyID"] == 2).any()
+    assert db_cache.refresh("stock_data") == {"stock_data": count}
+    assert int((db_cache.read_table("stock_data")["CompanyID"] == 2).sum()) == count
@@ -0,0 +1,42 @@
+# test_db_ingest.py
+
+import datetime
+import zoneinfo
+
+from analysis import indicators
+from database import db_ingest
+from database import db_connection as db
+
+def _bar(date, close):
+    # Polygon daily bars are stamped at midnight New York time
+    timestamp = datetime.datetime(date.year, date.month, date.day, tzinfo=zoneinfo.ZoneInfo("America/New_York"))
+    return {"t": int(timestamp.timestamp() * 1000), "o": close, "h": close, "l": close, "c": close, "v": 1000}
+
+def _stored(company_id, date):
+    with db.pooled_connection() as connection:
+        return db.execute_query(connection, "SELECT Close, AdjClose, Volume FROM stock_data "
+                                            "WHERE CompanyID = %s AND Date = %s", (company_id, date))
+
+def test_bars_fill_close_but_not_the_dividend_adjusted_close():
+    rows = db_ingest.bars_to_rows(2, [_bar(datetime.date(2017, 6, 19), 46.0)])
+    assert rows == [(2, datetime.date(2017, 6, 19), 46.0, 46.0, 46.0, 46.0, None, 1000)]
+
+def test_upsert_keeps_the_stored_adjusted_close(sqlite_database):
+    existing, new = datetime.date(2017, 6, 19), datetime.date(2030, 1, 2)
+    assert _stored(2, existing)[0][1] == 33.12011
+
+    totals = db_ingest.load_polygon_bars("VZ", [[_bar(existing, 46.0)], [_bar(new, 50.0)]], company_id=2)
+    assert (totals["inserted"], totals["updated"]) == (1, 1)
+
+    # Close and Volume take the Polygon values; the dividend-adjusted close is untouched
+    assert _stored(2, existing) == [(46.0, 33.12011, 1000)]
+    assert _stored(2, new) == [(50.0, None, 1000)]
+
+def test_ingest_drops_the_company_indicator_parts(sqlite_database, tmp_path, monkeypatch):
+    directory = tmp_path / "indicators"
+    (directory / "company_2").mkdir(parents=True)
+    (directory / "company_3").mkdir()
+    monkeypatch.setattr(indicators, "cache_directory", lambda: str(directory))
+
+    db_ingest.load_polygon_bars("VZ", [[_bar(datetime.date(2017, 6, 19), 46.0)]], company_id=2)
+    assert sorted(path.name for path in directory.iterdir()) == ["company_3"]
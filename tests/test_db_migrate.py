@@ -0,0 +1,83 @@
+# test_db_migrate.py
+
+import pytest
+
+from database import db_migrate, db_sqlite
+
+SCHEMA = """
+CREATE TABLE `company_info` (
+  `CompanyID` int(11) NOT NULL,
+  `StockSymbol` varchar(10) DEFAULT NULL,
+  PRIMARY KEY (`CompanyID`)
+);
+CREATE TABLE `dow_jones` (
+  `Date` date NOT NULL,
+  `Price` decimal(10,2) DEFAULT NULL
+);
+CREATE TABLE `stock_data` (
+  `CompanyID` int(11) NOT NULL,
+  `Date` date NOT NULL,
+  KEY `CompanyID` (`CompanyID`),
+  KEY `idx_company_date` (`CompanyID`, `Date`)
+);
+CREATE TABLE `data_breach_disclosures` (
+  `DisclosureID` int(11) NOT NULL,
+  `CompanyID` int(11) NOT NULL,
+  `DisclosureDate` date NOT NULL,
+  KEY `idx_disclosure_company` (`CompanyID`)
+);
+INSERT INTO `dow_jones` VALUES ('2024-01-02', 100), ('2024-01-03', 101);
+INSERT INTO `stock_data` VALUES (1, '2024-01-02'), (1, '2024-01-02');
+"""
+
+@pytest.fixture
+def connection():
+    raw = db_sqlite._open(":memory:")
+    for statement in db_sqlite.translate_dump(SCHEMA):
+        raw.execute(statement)
+    raw.commit()
+    connection = db_sqlite.SQLiteConnection(raw)
+    yield connection
+    connection.close()
+
+def test_existing_primary_key_is_left_alone(connection):
+    statement, message = db_migrate.plan_step(connection, ("primary_key", "company_info", ("CompanyID",)))
+    assert statement is None
+    assert message == "company_info: primary key (CompanyID) present"
+
+def test_missing_primary_key_is_added(connection):
+    statement, _ = db_migrate.plan_step(connection, ("primary_key", "dow_jones", ("Date",)))
+    assert statement == "ALTER TABLE `dow_jones` ADD PRIMARY KEY (`Date`)"
+
+def test_repeated_keys_block_the_primary_key(connection):
+    statement, message = db_migrate.plan_step(connection, ("primary_key", "stock_data", ("CompanyID", "Date")))
+    assert statement is None
+    assert message.startswith("[!!] stock_data: cannot add primary key")
+    assert "1 repeated keys" in message
+
+def test_index_covered_by_a_leading_index_is_skipped(connection):
+    statement, message = db_migrate.plan_step(connection, ("index", "stock_data", "idx_company", ("CompanyID",)))
+    assert statement is None
+    assert "present" in message
+
+def test_missing_index_is_added(connection):
+    step = ("index", "data_breach_disclosures", "idx_disclosure_company_date", ("CompanyID", "DisclosureDate"))
+    statement, _ = db_migrate.plan_step(connection, step)
+    assert statement == ("ALTER TABLE `data_breach_disclosures` ADD INDEX `idx_disclosure_company_date` "
+                         "(`CompanyID`, `DisclosureDate`)")
+
+def test_index_is_dropped_only_when_another_covers_it(connection):
+    statement, _ = db_migrate.plan_step(connection, ("drop_index", "stock_data", "CompanyID"))
+    assert statement == "ALTER TABLE `stock_data` DROP INDEX `CompanyID`"
+
+    step = ("drop_index", "data_breach_disclosures", "idx_disclosure_company")
+    statement, message = db_migrate.plan_step(connection, step)
+    assert statement is None
+    assert "no other index covers it" in message
+
+def test_has_leading_index():
+    indexes = {"PRIMARY": ["CompanyID", "Date"], "idx_date": ["Date"]}
+    assert db_migrate._has_leading_index(indexes, ["CompanyID"])
+    assert db_migrate._has_leading_index(indexes, ["Date"])
+    assert not db_migrate._has_leading_index(indexes, ["Date"], exclude="idx_date")
+    assert not db_migrate._has_leading_index(indexes, ["Date", "CompanyID"])
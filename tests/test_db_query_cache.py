@@ -0,0 +1,71 @@
+# test_db_query_cache.py
+
+import pytest
+
+from database import db_config, db_functions, db_query_cache
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(db_config, "DB_QUERY_CACHE_ENABLED", True)
+    db_query_cache.invalidate()
+    yield
+    db_query_cache.invalidate()
+
+def _counting(name="lookup", tables=("company_info",), ttl=None):
+    # Results are keyed by function name, so each query needs its own
+    calls = []
+
+    def lookup(value):
+        calls.append(value)
+        return {"value": value}
+    lookup.__name__ = name
+    return db_query_cache.cached(tables=tables, ttl=ttl)(lookup), calls
+
+def test_results_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(db_query_cache.time, "monotonic", lambda: now[0])
+    lookup, calls = _counting(ttl=10)
+
+    lookup(1)
+    now[0] += 9
+    lookup(1)
+    assert calls == [1]
+
+    now[0] += 1
+    lookup(1)
+    assert calls == [1, 1]
+
+def test_least_recently_used_result_is_evicted(monkeypatch):
+    monkeypatch.setattr(db_config, "DB_QUERY_CACHE_MAX_ENTRIES", 2)
+    lookup, calls = _counting()
+
+    lookup(1), lookup(2), lookup(1)  # 2 is now the least recently used
+    lookup(3)
+    lookup(1), lookup(2)
+    assert calls == [1, 2, 3, 2]
+    assert db_query_cache.stats()["evictions"] == 2
+
+def test_invalidation_drops_only_results_that_read_the_table():
+    companies, company_calls = _counting("companies", tables=("company_info",))
+    disclosures, disclosure_calls = _counting("disclosures", tables=("company_info", "data_breach_disclosures"))
+    companies(1), disclosures(1)
+
+    assert db_query_cache.invalidate("data_breach_disclosures") == 1
+    companies(1), disclosures(1)
+    assert (company_calls, disclosure_calls) == ([1], [1, 1])
+
+    assert db_query_cache.invalidate() == 2
+
+def test_callers_get_a_copy():
+    lookup, _ = _counting()
+    lookup(1)["value"] = 2
+    assert lookup(1) == {"value": 1}
+    assert lookup.shared(1) is lookup.shared(1)
+
+def test_symbol_lookup_copies_only_the_returned_company(sqlite_database):
+    company = db_functions.get_company_id_and_name_by_symbol("VZ")
+    assert company["CompanyID"] == 2
+
+    company["CompanyID"] = 0
+    assert db_functions.get_company_id_and_name_by_symbol("VZ")["CompanyID"] == 2
+    assert db_functions.get_company_id_and_name_by_symbol("NOT A SYMBOL") is None
@@ -0,0 +1,122 @@
+# test_db_sqlite.py
+
+import datetime
+
+import pytest
+
+from database import db_check_stock_records, db_config, db_sqlite
+from database import db_connection as db
+
+# A phpMyAdmin-style dump: keys are added by ALTER TABLE after the rows, strings use MySQL escapes
+DUMP = r"""
+-- phpMyAdmin SQL Dump
+SET SQL_MODE = "NO_AUTO_VALUE_ON_ZERO";
+/*!40101 SET NAMES utf8mb4 */;
+
+CREATE TABLE `company_info` (
+  `CompanyID` int(11) NOT NULL,
+  `CompanyName` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL,
+  `StockSymbol` varchar(10) DEFAULT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO `company_info` (`CompanyID`, `CompanyName`, `StockSymbol`) VALUES
+(1, 'Macy\'s; Inc.', 'M'),
+(2, 'Line\nBreak -- not a comment', 'LB');
+
+CREATE TABLE `stock_data` (
+  `CompanyID` int(11) NOT NULL,
+  `Date` date NOT NULL,
+  `Open` decimal(15,6) DEFAULT NULL,
+  `High` decimal(15,6) DEFAULT NULL,
+  `Low` decimal(15,6) DEFAULT NULL,
+  `Close` decimal(15,6) DEFAULT NULL,
+  `AdjClose` decimal(15,6) DEFAULT NULL,
+  `Volume` bigint(20) unsigned DEFAULT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp()
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO `stock_data` (`CompanyID`, `Date`, `Open`, `High`, `Low`, `Close`, `AdjClose`, `Volume`) VALUES
+(1, '2024-01-02', 10, 11, 9, 10.5, 10.5, 100),
+(1, '2024-01-02', 10, 11, 9, 10.5, 10.5, 100),
+(1, '2024-01-02', 10, 11, 9, 10.5, 10.5, 100),
+(1, '2024-01-03', 10.5, 12, 10, 11, 11, 200);
+
+ALTER TABLE `company_info`
+  ADD PRIMARY KEY (`CompanyID`),
+  ADD KEY `idx_symbol` (`StockSymbol`);
+
+ALTER TABLE `company_info`
+  MODIFY `CompanyID` int(11) NOT NULL AUTO_INCREMENT;
+COMMIT;
+"""
+
+@pytest.fixture
+def connection(tmp_path, monkeypatch):
+    # A dedupe invalidates the local cache, so keep it out of the working directory
+    monkeypatch.setattr(db_config, "DB_CACHE_DIR", str(tmp_path / "cache"))
+    raw = db_sqlite._open(":memory:")
+    for statement in db_sqlite.translate_dump(DUMP):
+        raw.execute(statement)
+    raw.commit()
+    connection = db_sqlite.SQLiteConnection(raw)
+    yield connection
+    connection.close()
+
+def test_placeholders_outside_string_literals():
+    assert db_sqlite.translate("SELECT * FROM t WHERE a = %s AND b = '%s'") == "SELECT * FROM t WHERE a = ? AND b = '%s'"
+
+def test_null_safe_equality():
+    assert db_sqlite.translate("SELECT 1 FROM t WHERE a <=> b") == "SELECT 1 FROM t WHERE a  IS  b"
+
+def test_upsert_becomes_on_conflict():
+    query = ("INSERT INTO stock_data (CompanyID, Date, Close) VALUES (%s, %s, %s) "
+             "ON DUPLICATE KEY UPDATE Close = VALUES(Close)")
+    assert db_sqlite.translate(query) == (
+        "INSERT INTO stock_data (CompanyID, Date, Close) VALUES (?, ?, ?) "
+        "ON CONFLICT DO UPDATE SET Close = excluded.Close WHERE Close IS NOT excluded.Close")
+
+def test_multi_table_delete_and_temporary_tables():
+    assert db_sqlite.translate("DELETE s FROM stock_data s JOIN dedupe d ON s.a <=> d.a") == (
+        "DELETE FROM stock_data AS s WHERE EXISTS (SELECT 1 FROM dedupe d WHERE s.a  IS  d.a)")
+    assert db_sqlite.translate("DROP TEMPORARY TABLE IF EXISTS dedupe;") == "DROP TABLE IF EXISTS temp.dedupe"
+    assert db_sqlite.translate("ALTER TABLE stock_data ADD UNIQUE KEY uq (CompanyID, Date)") == (
+        "CREATE UNIQUE INDEX uq ON stock_data (CompanyID, Date)")
+
+def test_split_statements_keeps_escaped_strings_together():
+    statements = db_sqlite.split_statements("INSERT INTO t VALUES ('a\\'b; c'); -- note; here\nSELECT 1;")
+    assert statements == ["INSERT INTO t VALUES ('a''b; c')", "SELECT 1"]
+
+def test_translate_dump_folds_keys_into_create_table():
+    statements = db_sqlite.translate_dump(DUMP)
+    create = next(s for s in statements if s.startswith("CREATE TABLE `company_info`"))
+    assert "PRIMARY KEY (`CompanyID`)" in create
+    assert "CHARACTER SET" not in create and "COLLATE" not in create
+    assert "CREATE INDEX `idx_symbol` ON `company_info` (`StockSymbol`)" in statements
+    assert not any(s.upper().startswith(("SET", "ALTER", "COMMIT")) for s in statements)
+
+def test_dump_rows_round_trip(connection):
+    rows = db.execute_query(connection, "SELECT CompanyName FROM company_info ORDER BY CompanyID")
+    assert rows == [("Macy's; Inc.",), ("Line\nBreak -- not a comment",)]
+    dates = db.execute_query(connection, "SELECT DISTINCT Date FROM stock_data WHERE CompanyID = %s ORDER BY Date", (1,))
+    assert dates == [(datetime.date(2024, 1, 2),), (datetime.date(2024, 1, 3),)]
+
+def test_upsert_rowcount_counts_only_real_changes(connection):
+    connection._connection.execute("CREATE UNIQUE INDEX uq_symbol ON company_info (StockSymbol)")
+    query = ("INSERT INTO company_info (CompanyID, CompanyName, StockSymbol) VALUES (%s, %s, %s) "
+             "ON DUPLICATE KEY UPDATE CompanyName = VALUES(CompanyName)")
+    assert db.execute_transaction(connection, [(query, (1, "Macy's; Inc.", "M"))]) == [0]
+    assert db.execute_transaction(connection, [(query, (1, "Macy's", "M"))]) == [1]
+    assert db.execute_transaction(connection, [(query, (3, "New", "NEW"))]) == [1]
+
+def test_dedupe_statements_run_on_sqlite(connection):
+    report = db_check_stock_records.duplicate_report(connection)
+    assert report["duplicate_groups"] == 1
+    assert report["extra_copies"] == 2
+    assert not report["unique_key_exists"]
+
+    assert db_check_stock_records.remove_duplicate_rows(connection) == 2
+    assert db.execute_query(connection, "SELECT COUNT(*) FROM stock_data") == [(2,)]
+
+    report = db_check_stock_records.duplicate_report(connection)
+    assert db_check_stock_records.enforce_unique_key(connection, report)
+    assert db_check_stock_records.duplicate_report(connection)["unique_key_exists"]
@@ -0,0 +1,57 @@
+# test_event_study.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import event_study
+
+# January 2024 sessions; the 15th (MLK Day) is a holiday
+SESSIONS = ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05', '2024-01-08', '2024-01-09',
+            '2024-01-10', '2024-01-11', '2024-01-12', '2024-01-16', '2024-01-17', '2024-01-18']
+
+def _dow(dates, prices):
+    return pd.DataFrame({'Date': pd.to_datetime(dates), 'Price': prices})
+
+def _stock(company_id, dates, prices):
+    return pd.DataFrame({'CompanyID': company_id, 'Date': pd.to_datetime(dates), 'AdjClose': prices})
+
+def test_returns_span_exactly_one_session():
+    # No row on the 9th: the 10th has no return instead of one spanning two sessions
+    dates = [date for date in SESSIONS[:8] if date != '2024-01-09']
+    stock = _stock(1, dates, [100.0, 101.0, 102.0, 103.0, 104.0, 110.0, 111.0])
+    returns = event_study.build_return_series(stock, _dow(SESSIONS, np.arange(12.0) + 100))
+
+    by_date = returns.set_index('Date')['Return']
+    assert np.isnan(by_date[pd.Timestamp('2024-01-02')])
+    assert by_date[pd.Timestamp('2024-01-03')] == pytest.approx(0.01)
+    assert np.isnan(by_date[pd.Timestamp('2024-01-10')])
+    assert by_date[pd.Timestamp('2024-01-11')] == pytest.approx(111.0 / 110.0 - 1)
+
+def test_returns_across_a_holiday_use_the_previous_session():
+    stock = _stock(1, ['2024-01-12', '2024-01-16'], [100.0, 105.0])
+    returns = event_study.build_return_series(stock, _dow(['2024-01-12', '2024-01-16'], [200.0, 210.0]))
+    assert returns['Return'].iloc[1] == pytest.approx(0.05)
+    assert returns['Market Return'].iloc[1] == pytest.approx(0.05)
+
+def test_market_return_is_nan_after_a_missing_index_session():
+    # No index price on the 4th: neither the 4th nor the 5th has a market return
+    dow = _dow([date for date in SESSIONS if date != '2024-01-04'], np.arange(11.0) + 100)
+    stock = _stock(1, SESSIONS[:5], [1.0, 1.0, 1.0, 1.0, 1.0])
+    returns = event_study.build_return_series(stock, dow)
+    assert returns['Market Return'].isna().tolist() == [True, False, True, True, False]
+
+def test_market_adjusted_fallback_without_estimation_data():
+    stock = _stock(1, SESSIONS, np.linspace(100.0, 111.0, 12))
+    dow = _dow(SESSIONS, np.linspace(200.0, 211.0, 12))
+    disclosures = pd.DataFrame({'ID': [1, 2], 'Name': ['A', 'B'], 'Symbol': ['A', 'B'],
+                                'Disclosure Date': pd.to_datetime(['2024-01-10', '2024-01-10'])})
+    study = event_study.compute_event_study(disclosures, stock, dow, estimation_window=(-250, -30),
+                                            car_windows=[(0, 1)], min_obs=30)
+
+    assert study['Model'].tolist() == ['Market adjusted', '']
+    assert np.isnan(study.loc[0, 'Beta'])
+    # Alpha 0 and beta 1: the abnormal return is the stock return less the market return
+    assert study.loc[0, 'AR +1'] == pytest.approx((107.0 / 106.0 - 1) - (207.0 / 206.0 - 1))
+    # Company 2 has no prices, so its event is unresolved
+    assert np.isnan(study.loc[1, 'CAR [+0,+1]'])
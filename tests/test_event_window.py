@@ -0,0 +1,91 @@
+# test_event_window.py
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import event_window
+from utils import trading_calendar
+
+def _stock(rows):
+    # rows: (CompanyID, 'YYYY-MM-DD', price); Open and Close both carry the price
+    return pd.DataFrame({
+        'CompanyID': [company_id for company_id, _, _ in rows],
+        'Date': pd.to_datetime([date for _, date, _ in rows]),
+        'Open': [price for _, _, price in rows],
+        'Close': [price for _, _, price in rows],
+    })
+
+def _disclosures(rows):
+    # rows: (ID, 'YYYY-MM-DD')
+    return pd.DataFrame({
+        'ID': [company_id for company_id, _ in rows],
+        'Name': [f"Company {company_id}" for company_id, _ in rows],
+        'Symbol': [f"C{company_id}" for company_id, _ in rows],
+        'Disclosure Date': pd.to_datetime([date for _, date in rows]),
+    })
+
+@pytest.fixture
+def stock():
+    # January 2024: the 1st and the 15th (MLK Day) are holidays. Company 1 has no row on the 9th;
+    # company 2 only starts trading on the 10th; company 3 starts on the 9th.
+    sessions = ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05', '2024-01-08',
+                '2024-01-09', '2024-01-10', '2024-01-11', '2024-01-12', '2024-01-16', '2024-01-17']
+    rows = [(1, date, 100.0 + i) for i, date in enumerate(sessions) if date != '2024-01-09']
+    rows += [(2, date, 200.0 + i) for i, date in enumerate(sessions) if date >= '2024-01-10']
+    rows += [(3, date, 300.0 + i) for i, date in enumerate(sessions) if date >= '2024-01-09']
+    return _stock(rows)
+
+def _event_dates(stock, disclosures):
+    stock_sorted = event_window.prepare_stock_data(stock)
+    disclosure_dates = disclosures['Disclosure Date']
+    sessions = event_window.resolve_event_sessions(stock_sorted, disclosures['ID'].to_numpy(), disclosure_dates)
+    return list(event_window.event_dates(sessions))
+
+def test_weekend_disclosure_rolls_to_next_session(stock):
+    assert _event_dates(stock, _disclosures([(1, '2024-01-06')])) == [datetime.date(2024, 1, 8)]
+
+def test_holiday_disclosure_rolls_past_the_holiday(stock):
+    assert _event_dates(stock, _disclosures([(1, '2024-01-15')])) == [datetime.date(2024, 1, 16)]
+
+def test_missing_event_session_matches_within_one_session(stock):
+    # Company 1 has no row on Tuesday the 9th, so the event moves to the 10th (one session later)
+    assert _event_dates(stock, _disclosures([(1, '2024-01-09')])) == [datetime.date(2024, 1, 10)]
+    assert _event_dates(stock, _disclosures([(3, '2024-01-08')])) == [datetime.date(2024, 1, 9)]
+
+def test_as_of_match_further_than_one_session_is_rejected(stock):
+    # Company 2's first row is two sessions after the disclosure
+    dates = _event_dates(stock, _disclosures([(2, '2024-01-08'), (2, '2024-01-05'), (4, '2024-01-08')]))
+    assert all(pd.isna(date) for date in dates)
+
+def test_window_offsets_count_sessions_not_stored_rows(stock):
+    df_window = event_window.build_event_window(_disclosures([(1, '2024-01-08')]), stock, pre=2, post=3)
+    row = df_window.iloc[0]
+
+    assert row['Event Date'] == datetime.date(2024, 1, 8)
+    assert row['Close -2'] == 102.0   # 2024-01-04
+    assert row['Close +0'] == 104.0
+    # The 9th is a session company 1 has no row for: NaN, not the 10th's price
+    assert np.isnan(row['Close +1'])
+    assert row['Close +2'] == 106.0   # 2024-01-10
+    assert row['Close +3'] == 107.0
+
+def test_window_across_a_holiday_skips_it(stock):
+    df_window = event_window.build_event_window(_disclosures([(1, '2024-01-12')]), stock, pre=0, post=1)
+    # The session after Friday the 12th is Tuesday the 16th (Monday is MLK Day)
+    assert df_window.iloc[0]['Close +1'] == 109.0
+
+def test_unresolved_event_has_an_empty_window(stock):
+    df_window = event_window.build_event_window(_disclosures([(2, '2024-01-03')]), stock, pre=1, post=1)
+    assert pd.isna(df_window.iloc[0]['Event Date'])
+    assert df_window[['Close -1', 'Close +0', 'Close +1']].isna().all(axis=None)
+
+def test_lookup_sessions_returns_minus_one_for_missing_rows(stock):
+    stock_sorted = event_window.prepare_stock_data(stock)
+    session = trading_calendar.get_calendar().session_positions(pd.to_datetime(['2024-01-02']))[0]
+    rows = event_window.lookup_sessions(stock_sorted, [1, 1, 9], [session, -1, session])
+    assert rows[0] >= 0
+    assert stock_sorted.loc[rows[0], 'Date'] == pd.Timestamp('2024-01-02')
+    assert list(rows[1:]) == [-1, -1]
@@ -0,0 +1,75 @@
+# test_export_func.py
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from openpyxl import load_workbook
+
+from utils import export_func
+
+@pytest.fixture
+def small_sheets(monkeypatch):
+    # Five rows per worksheet (header included) keeps the split cheap to exercise
+    monkeypatch.setattr(export_func, "EXCEL_MAX_ROWS", 5)
+
+def _frame(start, stop):
+    return pd.DataFrame({'ID': range(start, stop), 'Value': [float(i) / 2 for i in range(start, stop)]})
+
+def _sheet_values(path):
+    workbook = load_workbook(path, read_only=True)
+    return {sheet.title: [list(row) for row in sheet.iter_rows(values_only=True)] for sheet in workbook.worksheets}
+
+def test_rows_past_the_limit_continue_on_numbered_sheets(tmp_path, small_sheets):
+    rows = export_func.export_sheets({'Data': _frame(0, 10)}, 'out.xlsx', str(tmp_path))
+    sheets = _sheet_values(tmp_path / 'out.xlsx')
+
+    assert rows == 10
+    assert list(sheets) == ['Data', 'Data (2)', 'Data (3)']
+    # Every sheet repeats the header and holds at most four data rows
+    assert all(values[0] == ['ID', 'Value'] for values in sheets.values())
+    assert [len(values) - 1 for values in sheets.values()] == [4, 4, 2]
+    assert [row[0] for values in sheets.values() for row in values[1:]] == list(range(10))
+
+def test_split_works_across_chunk_boundaries(tmp_path, small_sheets):
+    chunks = [_frame(0, 3), _frame(3, 3), _frame(3, 7)]
+    export_func.export_sheets({'Data': iter(chunks)}, 'out.xlsx', str(tmp_path))
+    sheets = _sheet_values(tmp_path / 'out.xlsx')
+    assert [len(values) - 1 for values in sheets.values()] == [4, 3]
+
+def test_sheet_titles_stay_within_excel_limit(tmp_path, small_sheets):
+    name = 'A very long sheet name that Excel would reject'
+    export_func.export_sheets({name: _frame(0, 5)}, 'out.xlsx', str(tmp_path))
+    titles = list(_sheet_values(tmp_path / 'out.xlsx'))
+    assert titles == [name[:31], name[:27] + ' (2)']
+    assert all(len(title) <= export_func.EXCEL_SHEET_NAME_LENGTH for title in titles)
+
+def test_empty_frame_keeps_its_header_and_missing_values_are_blank(tmp_path):
+    df = pd.DataFrame({'ID': [1], 'Date': [pd.NaT], 'Value': [float('nan')], 'Name': ['x']})
+    export_func.export_sheets({'Empty': df.iloc[:0], 'Data': df}, 'out.xlsx', str(tmp_path))
+    sheets = _sheet_values(tmp_path / 'out.xlsx')
+    assert sheets['Empty'] == [['ID', 'Date', 'Value', 'Name']]
+    assert sheets['Data'][1] == [1, None, None, 'x']
+
+def test_format_from_filename():
+    assert export_func.format_from_filename('report.CSV.GZ') == 'csv.gz'
+    assert export_func.format_from_filename('report.parquet') == 'parquet'
+    assert export_func.format_from_filename('report.txt') is None
+
+def test_arrow_exports_cast_later_chunks_to_the_declared_types(tmp_path):
+    first = pd.DataFrame({'ID': [1, 2], 'Volume': [10, 20], 'Name': [None, None]})
+    later = pd.DataFrame({'ID': [3], 'Volume': pd.array([None], dtype='Int64'), 'Name': ['x']})
+    types = {'ID': 'int64', 'Volume': 'Int64', 'Name': 'object'}
+
+    for fmt in ('parquet', 'feather'):
+        assert export_func.export([first, later], f'out.{fmt}', fmt, str(tmp_path), types=types) == 3
+    schema = pq.read_schema(tmp_path / 'out.parquet')
+    assert [str(schema.field(name).type) for name in schema.names] == ['int64', 'int64', 'string']
+    assert pd.read_feather(tmp_path / 'out.feather')['Name'].tolist()[2] == 'x'
+
+def test_csv_exports_ignore_the_declared_types(tmp_path):
+    df = _frame(0, 3)
+    types = {'ID': 'int64', 'Value': 'float64'}
+    assert export_func.export(df, 'out.csv', 'csv', str(tmp_path), types=types) == 3
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'out.csv'), df)
+    assert export_func.export(df, 'out.csv.gz', 'csv.gz', str(tmp_path), types=types) == 3
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'out.csv.gz'), df)
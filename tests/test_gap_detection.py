@@ -0,0 +1,104 @@
+# test_gap_detection.py
+
+import datetime
+
+import pandas as pd
+import pytest
+
+from analysis import gap_detection
+from utils import trading_calendar
+
+D = datetime.date
+
+# January 2024 sessions; the 1st and the 15th (MLK Day) are holidays
+JANUARY = ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05', '2024-01-08', '2024-01-09',
+           '2024-01-10', '2024-01-11', '2024-01-12', '2024-01-16', '2024-01-17', '2024-01-18']
+
+@pytest.fixture(scope="module")
+def calendar():
+    return trading_calendar.TradingCalendar(2023, 2025)
+
+def _stock(dates_by_company):
+    rows = [(company_id, date) for company_id, dates in dates_by_company.items() for date in dates]
+    return pd.DataFrame({'CompanyID': [company_id for company_id, _ in rows],
+                         'Date': pd.to_datetime([date for _, date in rows])})
+
+def _companies(*company_ids):
+    return pd.DataFrame({'CompanyID': list(company_ids), 'StockSymbol': [f"C{i}" for i in company_ids]})
+
+def _ranges(gaps):
+    return [(row.CompanyID, row.From, row.To, row.Sessions, row.Edge) for row in gaps.itertuples(index=False)]
+
+def test_complete_history_has_no_gaps(calendar):
+    gaps = gap_detection.find_gaps(_stock({1: JANUARY}), _companies(1), end=D(2024, 1, 18), calendar=calendar)
+    assert gaps.empty
+    assert list(gaps.columns) == gap_detection.GAP_COLUMNS
+
+def test_holidays_and_weekends_are_not_gaps(calendar):
+    # Friday the 12th to Tuesday the 16th skips a weekend and MLK Day
+    stock = _stock({1: ['2024-01-11', '2024-01-12', '2024-01-16']})
+    assert gap_detection.find_gaps(stock, _companies(1), end=D(2024, 1, 16), calendar=calendar).empty
+
+def test_interior_gap(calendar):
+    dates = [date for date in JANUARY if date not in ('2024-01-09', '2024-01-10')]
+    gaps = gap_detection.find_gaps(_stock({1: dates}), _companies(1), end=D(2024, 1, 18), calendar=calendar)
+    assert _ranges(gaps) == [(1, D(2024, 1, 9), D(2024, 1, 10), 2, 'interior')]
+    assert gaps.loc[0, 'StockSymbol'] == 'C1'
+
+def test_leading_and_trailing_edges(calendar):
+    stock = _stock({1: JANUARY[3:9]})   # 2024-01-05 to 2024-01-12
+    gaps = gap_detection.find_gaps(stock, _companies(1), start=D(2024, 1, 1), end=D(2024, 1, 18), calendar=calendar)
+    assert _ranges(gaps) == [(1, D(2024, 1, 2), D(2024, 1, 4), 3, 'leading'),
+                             (1, D(2024, 1, 16), D(2024, 1, 18), 3, 'trailing')]
+
+    # Without `start` the check begins at the first stored session
+    gaps = gap_detection.find_gaps(stock, _companies(1), end=D(2024, 1, 18), calendar=calendar)
+    assert _ranges(gaps) == [(1, D(2024, 1, 16), D(2024, 1, 18), 3, 'trailing')]
+
+def test_company_without_rows_needs_a_start(calendar):
+    stock = _stock({1: JANUARY})
+    assert gap_detection.find_gaps(stock, _companies(1, 2), end=D(2024, 1, 18), calendar=calendar).empty
+
+    gaps = gap_detection.find_gaps(stock, _companies(1, 2), start=D(2024, 1, 16), end=D(2024, 1, 18),
+                                   calendar=calendar)
+    assert _ranges(gaps) == [(2, D(2024, 1, 16), D(2024, 1, 18), 3, 'all')]
+
+def test_nearby_ranges_merge_within_max_gap(calendar):
+    dates = [date for date in JANUARY if date not in ('2024-01-04', '2024-01-08', '2024-01-09')]
+    stock = _stock({1: dates})
+    gaps = gap_detection.find_gaps(stock, _companies(1), end=D(2024, 1, 18), calendar=calendar)
+    assert len(gaps) == 2
+
+    # One stored session (the 5th) between the ranges is re-fetched instead of making a second call
+    gaps = gap_detection.find_gaps(stock, _companies(1), end=D(2024, 1, 18), max_gap=1, calendar=calendar)
+    assert _ranges(gaps) == [(1, D(2024, 1, 4), D(2024, 1, 9), 3, 'interior')]
+
+def test_rows_on_closed_days_and_other_companies_are_ignored(calendar):
+    stock = _stock({1: JANUARY + ['2024-01-13', '2024-01-15'], 3: ['2024-01-02']})
+    gaps = gap_detection.find_gaps(stock, _companies(1), end=D(2024, 1, 18), calendar=calendar)
+    assert gaps.empty
+
+def test_backfill_reports_failed_ranges(monkeypatch):
+    from api_requests import polygon_requests
+    from database import db_ingest
+
+    loaded = {"VZ": {"rows": 3, "inserted": 2, "updated": 1}, "T": None}
+    monkeypatch.setattr(polygon_requests, "iter_api_data", lambda ticker, *args, **kwargs: iter(()))
+    monkeypatch.setattr(db_ingest, "load_polygon_bars", lambda ticker, batches, company_id=None: loaded[ticker])
+
+    gaps = pd.DataFrame({'CompanyID': [1, 2, 3], 'StockSymbol': ['VZ', 'T', None],
+                         'From': [D(2024, 1, 2)] * 3, 'To': [D(2024, 1, 5)] * 3,
+                         'Sessions': [4] * 3, 'Edge': ['interior'] * 3})
+    totals = gap_detection.backfill(gaps, api_key="key")
+
+    assert totals["ranges"] == 3
+    assert totals["failed"] == 2
+    assert (totals["rows"], totals["inserted"], totals["updated"]) == (3, 2, 1)
+    assert totals["failed_ranges"][0] == ('T', D(2024, 1, 2), D(2024, 1, 5))
+    assert pd.isna(totals["failed_ranges"][1][0])
+
+def test_backfill_dry_run_fetches_nothing():
+    gaps = pd.DataFrame({'CompanyID': [1], 'StockSymbol': ['VZ'], 'From': [D(2024, 1, 2)], 'To': [D(2024, 1, 5)],
+                         'Sessions': [4], 'Edge': ['interior']})
+    totals = gap_detection.backfill(gaps, dry_run=True)
+    assert totals["ranges"] == 0 and totals["failed_ranges"] == []
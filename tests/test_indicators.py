@@ -0,0 +1,119 @@
+# test_indicators.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import event_window, indicators
+from utils import app_config, trading_calendar
+
+@pytest.fixture(autouse=True)
+def short_windows(monkeypatch):
+    monkeypatch.setattr(app_config, "INDICATOR_MA_WINDOWS", (2, 3))
+    monkeypatch.setattr(app_config, "INDICATOR_VOLATILITY_WINDOW", 3)
+    monkeypatch.setattr(app_config, "INDICATOR_BETA_WINDOW", 3)
+    monkeypatch.setattr(app_config, "INDICATOR_DRAWDOWN_WINDOW", 4)
+
+def _sessions(count, start='2024-01-02'):
+    calendar = trading_calendar.get_calendar()
+    return calendar.sessions_between(start, '2024-12-31')[:count]
+
+def _market(count=60):
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({'Date': pd.to_datetime(_sessions(count)), 'Price': 100 * np.cumprod(1 + rng.normal(0, 0.01, count))})
+
+def _stock(count=60, skip=()):
+    rng = np.random.default_rng(11)
+    frames = []
+    for company_id in (1, 2):
+        dates = pd.to_datetime(_sessions(count))
+        prices = 50 * company_id * np.cumprod(1 + rng.normal(0, 0.02, count))
+        frames.append(pd.DataFrame({'CompanyID': company_id, 'Date': dates, 'AdjClose': prices}))
+    df = pd.concat(frames, ignore_index=True)
+    return df[~((df['CompanyID'] == 1) & df['Date'].isin(pd.to_datetime(list(skip))))].reset_index(drop=True)
+
+def test_rolling_mean_needs_a_full_window():
+    values = np.array([[1.0, 2.0, np.nan, 4.0, 5.0, 6.0]])
+    assert np.allclose(indicators.rolling_mean(values, 2), [[np.nan, 1.5, np.nan, np.nan, 4.5, 5.5]], equal_nan=True)
+
+def test_rolling_drawdown_from_the_trailing_high():
+    prices = np.array([[10.0, 8.0, 12.0, 9.0, 9.0, 9.0]])
+    assert np.allclose(indicators.rolling_drawdown(prices, 3), [[0.0, -0.2, 0.0, -0.25, -0.25, 0.0]])
+
+def test_missing_session_leaves_a_hole_instead_of_stretching_windows():
+    df = indicators.compute_indicators(_stock(skip=['2024-01-10']), _market())
+    company = df[df['CompanyID'] == 1].set_index('Date')
+    # The 11th's 2-session mean would need the 10th
+    assert np.isnan(company.loc[pd.Timestamp('2024-01-11'), 'MA 2'])
+    assert np.isfinite(company.loc[pd.Timestamp('2024-01-12'), 'MA 2'])
+
+def test_event_values_use_session_offsets():
+    stock = _stock(skip=['2024-01-10'])
+    stock_sorted = event_window.prepare_stock_data(stock, columns=('AdjClose',))
+    company_ids = np.array([1, 2])
+    sessions = event_window.resolve_event_sessions(stock_sorted, company_ids, pd.to_datetime(['2024-01-09'] * 2))
+    values = indicators.event_values(stock, 'AdjClose', company_ids, sessions, [-1, 0, 1])
+
+    prices = stock.set_index(['CompanyID', 'Date'])['AdjClose']
+    assert values[0, 1] == prices[(1, pd.Timestamp('2024-01-09'))]
+    assert np.isnan(values[0, 2])
+    assert values[1, 2] == prices[(2, pd.Timestamp('2024-01-10'))]
+
+def test_cache_extends_to_the_same_values_as_a_full_recompute():
+    stock, market = _stock(), _market()
+    cache = indicators.IndicatorCache()
+    cache.update(stock[stock['Date'] < stock['Date'].max() - pd.Timedelta(days=7)], market)
+    pd.testing.assert_frame_equal(cache.update(stock, market), indicators.compute_indicators(stock, market))
+
+def test_cache_is_persisted_between_instances(tmp_path):
+    stock, market = _stock(), _market()
+    directory = str(tmp_path / "indicators")
+    indicators.IndicatorCache(directory=directory).update(stock[stock['Date'] < '2024-03-01'], market)
+
+    cache = indicators.IndicatorCache(directory=directory)
+    assert cache.frame()['Date'].max() < pd.Timestamp('2024-03-01')
+    pd.testing.assert_frame_equal(cache.update(stock, market), indicators.compute_indicators(stock, market))
+
+    # Reopened again, nothing is left to compute
+    reopened = indicators.IndicatorCache(directory=directory)
+    pd.testing.assert_frame_equal(reopened.frame(), indicators.compute_indicators(stock, market))
+
+    reopened.invalidate(1)
+    assert set(indicators.IndicatorCache(directory=directory).frame()['CompanyID']) == {2}
+
+def test_cache_with_other_windows_starts_over(tmp_path, monkeypatch):
+    stock, market = _stock(), _market()
+    directory = str(tmp_path / "indicators")
+    indicators.IndicatorCache(directory=directory).update(stock, market)
+
+    monkeypatch.setattr(app_config, "INDICATOR_MA_WINDOWS", (2, 4))
+    assert indicators.IndicatorCache(directory=directory).frame().empty
+
+def test_backfilled_history_is_recomputed(tmp_path):
+    market = _market()
+    directory = str(tmp_path / "indicators")
+    indicators.IndicatorCache(directory=directory).update(_stock(skip=['2024-01-10']), market)
+
+    stock = _stock()
+    cache = indicators.IndicatorCache(directory=directory)
+    pd.testing.assert_frame_equal(cache.update(stock, market), indicators.compute_indicators(stock, market))
+
+def test_prices_corrected_in_place_are_recomputed(tmp_path):
+    stock, market = _stock(), _market()
+    directory = str(tmp_path / "indicators")
+    indicators.IndicatorCache(directory=directory).update(stock, market)
+
+    # Same bars, one price rewritten inside the cached history
+    corrected = stock.copy()
+    corrected.loc[(corrected['CompanyID'] == 1) & (corrected['Date'] == '2024-02-01'), 'AdjClose'] *= 1.01
+    cache = indicators.IndicatorCache(directory=directory)
+    pd.testing.assert_frame_equal(cache.update(corrected, market), indicators.compute_indicators(corrected, market))
+
+def test_invalidated_company_parts_are_recomputed(tmp_path):
+    stock, market = _stock(), _market()
+    directory = str(tmp_path / "indicators")
+    indicators.IndicatorCache(directory=directory).update(stock[stock['Date'] < '2024-03-01'], market)
+    indicators.IndicatorCache(directory=directory).update(stock, market)
+
+    indicators.invalidate_company(1, directory=directory)
+    assert set(indicators.IndicatorCache(directory=directory).frame()['CompanyID']) == {2}
@@ -0,0 +1,26 @@
+# test_parallel_executor.py
+
+import pandas as pd
+
+from analysis import parallel_executor
+from benchmarks import synthetic_data
+from utils import app_config
+
+def test_process_pool_matches_a_single_process_run(monkeypatch):
+    frames = synthetic_data.analysis_frames(synthetic_data.generate(companies=4, years=2, disclosures=2))
+    disclosures, stock, dow = frames["disclosure_dates"], frames["stock_data"], frames["dow_jones"]
+
+    serial = parallel_executor.run_analyses(disclosures, stock, dow, max_workers=1)
+    monkeypatch.setattr(app_config, "ANALYSIS_PARALLEL_MIN_ROWS", 0)
+    parallel = parallel_executor.run_analyses(disclosures, stock, dow, max_workers=2)
+
+    assert set(parallel) == set(parallel_executor.ANALYSES)
+    for name, df in serial.items():
+        pd.testing.assert_frame_equal(parallel[name], df)
+
+def test_partitions_are_balanced_and_deterministic():
+    row_counts = {5: 10, 1: 40, 3: 25, 2: 25, 4: 0}
+    partitions = parallel_executor.partition_companies(row_counts, 3)
+    assert partitions == [[1], [2, 5], [3, 4]]
+    assert parallel_executor.partition_companies(dict(reversed(row_counts.items())), 3) == partitions
+    assert parallel_executor.partition_companies({1: 5}, 4) == [[1]]
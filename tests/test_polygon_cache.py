@@ -0,0 +1,51 @@
+# test_polygon_cache.py
+
+import datetime
+import os
+
+import requests
+
+from api_requests import polygon_cache, polygon_requests
+
+def _d(value):
+    return datetime.date.fromisoformat(value)
+
+def _today():
+    return datetime.datetime.now(polygon_cache.MARKET_TIMEZONE).date()
+
+def test_merge_intervals_joins_overlapping_and_touching_ranges():
+    intervals = [("2024-01-10", "2024-01-20"), ("2024-01-01", "2024-01-05"), ("2024-01-06", "2024-01-08"),
+                 ("2024-01-15", "2024-01-25"), ("2024-02-01", "2024-02-01")]
+    assert polygon_cache.merge_intervals(intervals) == [(_d("2024-01-01"), _d("2024-01-08")),
+                                                        (_d("2024-01-10"), _d("2024-01-25")),
+                                                        (_d("2024-02-01"), _d("2024-02-01"))]
+    assert polygon_cache.merge_intervals([]) == []
+
+def test_missing_ranges_are_the_gaps_in_the_coverage():
+    intervals = [("2024-01-05", "2024-01-10"), ("2024-01-20", "2024-01-31")]
+    assert polygon_cache.missing_ranges(intervals, "2024-01-01", "2024-02-05") == [
+        (_d("2024-01-01"), _d("2024-01-04")), (_d("2024-01-11"), _d("2024-01-19")), (_d("2024-02-01"), _d("2024-02-05"))]
+    assert polygon_cache.missing_ranges(intervals, "2024-01-06", "2024-01-08") == []
+    assert polygon_cache.missing_ranges([], "2024-01-01", "2024-01-02") == [(_d("2024-01-01"), _d("2024-01-02"))]
+
+def test_uncovered_part_is_replaced_when_fetched_again(tmp_path, monkeypatch):
+    def fetch(ticker, from_date, to_date, *args, **kwargs):
+        timestamp = datetime.datetime.combine(_d(to_date), datetime.time(), polygon_cache.MARKET_TIMEZONE)
+        return [{"t": int(timestamp.timestamp() * 1000), "c": 1.0}]
+    monkeypatch.setattr(polygon_cache, "fetch_range", fetch)
+
+    today = _today().isoformat()
+    for _ in range(3):
+        assert len(polygon_cache.get_bars("VZ", today, today, api_key="key", cache_dir=str(tmp_path))) == 1
+
+    path = polygon_cache.cache_path("VZ", cache_dir=str(tmp_path))
+    parts = polygon_cache._load_index(path)
+    assert len(parts) == 1 and parts[0]["covered"] is None
+    assert sorted(name for name in os.listdir(path) if name.startswith("part-")) == [parts[0]["file"]]
+
+def test_connection_errors_are_reported_as_a_failed_range(monkeypatch):
+    def request_json(url, ticker):
+        raise requests.ConnectionError("connection refused")
+    monkeypatch.setattr(polygon_requests, "request_json", request_json)
+
+    assert polygon_cache.fetch_range("VZ", "2024-01-01", "2024-01-31", api_key="key") is None
@@ -0,0 +1,95 @@
+# test_trading_calendar.py
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import trading_calendar, utils_func
+
+D = datetime.date
+
+@pytest.fixture(scope="module")
+def calendar():
+    return trading_calendar.TradingCalendar(2018, 2025)
+
+def test_holidays_2024():
+    assert trading_calendar.nyse_holidays(2024) == {
+        D(2024, 1, 1): "New Year's Day",
+        D(2024, 1, 15): "Martin Luther King Jr. Day",
+        D(2024, 2, 19): "Washington's Birthday",
+        D(2024, 3, 29): "Good Friday",
+        D(2024, 5, 27): "Memorial Day",
+        D(2024, 6, 19): "Juneteenth",
+        D(2024, 7, 4): "Independence Day",
+        D(2024, 9, 2): "Labor Day",
+        D(2024, 11, 28): "Thanksgiving Day",
+        D(2024, 12, 25): "Christmas Day",
+    }
+
+def test_weekend_holidays_are_observed():
+    holidays_2022 = trading_calendar.nyse_holidays(2022)
+    # New Year's Day on a Saturday is not moved to Friday 2021-12-31
+    assert D(2021, 12, 31) not in trading_calendar.nyse_holidays(2021)
+    assert "New Year's Day" not in holidays_2022.values()
+    # Sunday holidays move to Monday
+    assert holidays_2022[D(2022, 6, 20)] == "Juneteenth"
+    assert holidays_2022[D(2022, 12, 26)] == "Christmas Day"
+    # Saturday holidays move to Friday
+    assert trading_calendar.nyse_holidays(2020)[D(2020, 7, 3)] == "Independence Day"
+
+def test_juneteenth_only_from_2022():
+    assert "Juneteenth" not in trading_calendar.nyse_holidays(2021).values()
+
+def test_special_closures(calendar):
+    assert not calendar.is_session(D(2018, 12, 5))
+    assert not calendar.is_session(D(2025, 1, 9))
+    assert list(calendar.closure_reasons([D(2025, 1, 9)])) == ["National Day of Mourning (Carter)"]
+
+@pytest.mark.parametrize("year, sessions", [(2019, 252), (2022, 251), (2023, 250), (2024, 252)])
+def test_sessions_per_year(calendar, year, sessions):
+    assert len(calendar.sessions_between(D(year, 1, 1), D(year, 12, 31))) == sessions
+
+def test_early_closes():
+    assert trading_calendar.nyse_early_closes(2024) == {
+        D(2024, 7, 3): "Independence Day Eve",
+        D(2024, 11, 29): "Day after Thanksgiving",
+        D(2024, 12, 24): "Christmas Eve",
+    }
+    # July 3rd 2021 was a Saturday
+    assert D(2021, 7, 3) not in trading_calendar.nyse_early_closes(2021)
+
+def test_next_and_previous_session(calendar):
+    # Good Friday 2024 sits between a Thursday session and a weekend
+    assert calendar.next_session(D(2024, 3, 29)) == D(2024, 4, 1)
+    assert calendar.previous_session(D(2024, 3, 29)) == D(2024, 3, 28)
+    assert calendar.next_session(D(2024, 4, 1)) == D(2024, 4, 1)
+    assert calendar.next_session(D(2024, 4, 1), inclusive=False) == D(2024, 4, 2)
+    assert calendar.session_offset(D(2024, 3, 28), 1) == D(2024, 4, 1)
+
+def test_session_positions(calendar):
+    positions = calendar.session_positions(pd.to_datetime(['2024-03-28', '2024-03-29', '2024-04-01', None]))
+    assert positions[1] == -1 and positions[3] == -1
+    assert positions[2] == positions[0] + 1
+    dates = calendar.session_dates(positions[[0, 1]])
+    assert dates[0] == np.datetime64('2024-03-28')
+    assert np.isnat(dates[1])
+
+    next_positions = calendar.next_session_positions(pd.to_datetime(['2024-03-29', '2030-01-01']))
+    assert next_positions[0] == positions[2]
+    assert next_positions[1] == -1
+
+def test_closure_reasons(calendar):
+    reasons = calendar.closure_reasons(pd.to_datetime(['2024-03-29', '2024-03-30', '2024-03-31', '2024-04-01']))
+    assert list(reasons) == ["Good Friday", "Saturday", "Sunday", ""]
+
+def test_roll_forward(calendar):
+    rolled = calendar.roll_forward(pd.to_datetime(['2024-12-25', '2024-12-26', None]))
+    assert list(rolled[:2]) == [pd.Timestamp('2024-12-26'), pd.Timestamp('2024-12-26')]
+    assert pd.isna(rolled[2])
+
+def test_utils_func_wrappers():
+    assert utils_func.is_market_closed(D(2024, 7, 4)) == (True, "Independence Day")
+    assert utils_func.is_market_closed(datetime.datetime(2024, 7, 5, 15, 30)) == (False, None)
+    assert utils_func.get_next_open_market_date(D(2024, 7, 6)) == D(2024, 7, 8)
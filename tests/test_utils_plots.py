@@ -0,0 +1,26 @@
+# test_utils_plots.py
+
+import os
+
+import pytest
+
+from utils import utils_plots
+
+def _stock_data(days, offset):
+    return {
+        "dates": [f"2024-01-{day:02d}" for day in range(2, 2 + days)],
+        "closing_prices": [100.0 + offset + day for day in range(days)],
+        "opening_prices": [99.0 + offset + day for day in range(days)],
+        "volume": [1000 + 10 * day for day in range(days)],
+        "stock_trades": [50 + day for day in range(days)],
+    }
+
+@pytest.mark.parametrize("multi_panel, charts", [(False, 3), (True, 1)])
+def test_charts_are_rendered_in_worker_processes(tmp_path, multi_panel, charts):
+    companies = [("Alpha Inc.", _stock_data(5, 0)), ("Beta Corp", _stock_data(6, 20))]
+    records = utils_plots.render_charts(companies, multi_panel=multi_panel, max_workers=2, output_dir=str(tmp_path))
+
+    assert len(records) == 2 * charts
+    assert all(record["error"] is None for record in records)
+    assert {record["company"] for record in records} == {"Alpha Inc.", "Beta Corp"}
+    assert all(os.path.getsize(record["path"]) > 0 for record in records)
@@ -2,4 +2,41 @@
 
 # Global variables for application information
 APP_TITLE = "Stock Market Analysis Application"
-LINE_LENGTH = 60
\ No newline at end of file
+LINE_LENGTH = 60
+
+# Event window around each disclosure, in trading days
+EVENT_WINDOW_PRE = 5
+EVENT_WINDOW_POST = 10
+EVENT_MAX_LAG_SESSIONS = 1  # Furthest an event day may be from the disclosure's next session before it is unresolved
+
+# Market-model event study (trading days relative to the event day)
+EVENT_STUDY_ESTIMATION_WINDOW = (-250, -11)
+EVENT_STUDY_CAR_WINDOWS = ((-1, 1), (0, 5), (-5, 10))
+EVENT_STUDY_MIN_OBS = 30
+
+# Rolling indicators (see analysis/indicators.py), in trading sessions
+INDICATOR_MA_WINDOWS = (20, 50, 200)
+INDICATOR_VOLATILITY_WINDOW = 20
+INDICATOR_BETA_WINDOW = 60
+INDICATOR_DRAWDOWN_WINDOW = 252
+TRADING_DAYS_PER_YEAR = 252             # Annualizes volatility
+INDICATOR_CACHE_MAX_PARTS = 20          # A company's cached parts are merged into one file past this
+
+# Parallel analysis across worker processes (see analysis/parallel_executor.py)
+ANALYSIS_MAX_WORKERS = None             # None = one worker per CPU
+ANALYSIS_PARTITIONS_PER_WORKER = 4      # Several partitions per worker even out companies with long histories
+ANALYSIS_PARALLEL_MIN_ROWS = 500000     # Below this many stock rows a process pool costs more than it saves
+
+# Trading calendar coverage
+TRADING_CALENDAR_START_YEAR = 1990
+TRADING_CALENDAR_YEARS_AHEAD = 5
+
+# Cold-start budget for the CLI entry points (checked by scripts/check_startup_time.py)
+STARTUP_ENTRY_POINTS = ("main", "test_polygon_api")
+STARTUP_IMPORT_BUDGET_MS = 50
+STARTUP_LAZY_MODULES = ("pandas", "numpy", "pyarrow", "matplotlib", "mysql.connector", "requests", "tabulate")
+
+# Hot-path instrumentation (see utils/instrumentation.py); TAURONIX_INSTRUMENTATION=1 also enables it
+INSTRUMENTATION_ENABLED = False
+INSTRUMENTATION_METRICS_FILE = None     # e.g. "output/metrics.jsonl" for one JSON line per event
+INSTRUMENTATION_SUMMARY_AT_EXIT = True
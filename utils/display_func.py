@@ -3,7 +3,6 @@
 # Python Libraries
 from datetime import datetime
 import textwrap
-from tabulate import tabulate
 
 # Custom Libraries
 from . import app_config
@@ -49,6 +48,8 @@ def display_compnay_info(company_info_df):
     if company_info_df.empty:
         print("[Error] No company information retrieved.")
     else:
+        from tabulate import tabulate
+
         # Convert DataFrame to a list of lists without including the index
         company_info = company_info_df.values.tolist()
         headers = company_info_df.columns.tolist()
@@ -0,0 +1,216 @@
+# export_func.py
+
+import gzip
+import itertools
+import os
+
+EXCEL_MAX_ROWS = 1048576  # Rows per worksheet, including the header row
+EXCEL_SHEET_NAME_LENGTH = 31
+
+# Arrow column types for the dtype names used by database/db_types ("volume" is a parsed Int64)
+ARROW_TYPES = {
+    "int64": "int64",
+    "Int64": "int64",
+    "volume": "int64",
+    "float64": "float64",
+    "datetime64[ns]": "timestamp[ns]",
+    "object": "string",
+    "bool": "bool",
+}
+
+def _chunks(data):
+    # A single DataFrame or any iterable of DataFrame chunks, skipping empty chunks
+    import pandas as pd
+
+    if isinstance(data, pd.DataFrame):
+        data = [data]
+    return (chunk for chunk in data if chunk is not None and not chunk.empty)
+
+def _write_csv(chunks, path, compress=False, types=None):
+    opener = gzip.open if compress else open
+    rows = 0
+    with opener(path, "wt", newline="") as f:
+        for chunk in chunks:
+            chunk.to_csv(f, index=False, header=(rows == 0))
+            rows += len(chunk)
+    return rows
+
+def _arrow_schema(table, types=None):
+    # The file schema: the declared column types where given, else the first chunk's types
+    # (a column with no values in the first chunk is written as strings rather than nulls)
+    import pyarrow as pa
+
+    fields = []
+    for field in table.schema:
+        alias = ARROW_TYPES.get((types or {}).get(field.name))
+        if alias:
+            fields.append(pa.field(field.name, pa.type_for_alias(alias)))
+        elif pa.types.is_null(field.type):
+            fields.append(pa.field(field.name, pa.string()))
+        else:
+            fields.append(field)
+    return pa.schema(fields, metadata=table.schema.metadata)
+
+def _arrow_tables(chunks, types=None):
+    # Arrow tables cast to one schema, so a later chunk (say an int column that now has a
+    # missing value, or an all-null first chunk) cannot disagree with the file's schema
+    import pyarrow as pa
+
+    schema = None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        schema = schema or _arrow_schema(table, types)
+        yield table.select(schema.names).cast(schema)
+
+def _write_parquet(chunks, path, types=None):
+    import pyarrow.parquet as pq
+
+    rows = 0
+    writer = None
+    try:
+        for table in _arrow_tables(chunks, types):
+            writer = writer or pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def _write_feather(chunks, path, types=None):
+    # Feather v2 is the Arrow IPC file format, so record batches can be appended one chunk at a time
+    import pyarrow as pa
+
+    rows = 0
+    sink = writer = None
+    try:
+        for table in _arrow_tables(chunks, types):
+            if writer is None:
+                sink = pa.OSFile(path, "wb")
+                writer = pa.ipc.new_file(sink, table.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+        if sink is not None:
+            sink.close()
+    return rows
+
+def _excel_rows(chunk):
+    # Plain cell values: missing values become empty cells instead of NaN/NaT
+    values = chunk.astype(object).where(chunk.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+def _sheet_title(name, part):
+    suffix = f" ({part})" if part > 1 else ""
+    return name[:EXCEL_SHEET_NAME_LENGTH - len(suffix)] + suffix
+
+def _append_sheet(workbook, name, chunks):
+    # Streams chunks into write-only worksheets, starting "<name> (2)", "<name> (3)"... at the row limit
+    rows = 0
+    part = 0
+    sheet = None
+    sheet_rows = EXCEL_MAX_ROWS
+    header = None
+    for chunk in chunks:
+        header = header or list(chunk.columns)
+        for row in _excel_rows(chunk):
+            if sheet_rows >= EXCEL_MAX_ROWS:
+                part += 1
+                sheet = workbook.create_sheet(_sheet_title(name, part))
+                sheet.append(header)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+            rows += 1
+    return rows
+
+def _write_xlsx(sheets, path):
+    # Write-only workbooks keep memory flat: rows go straight to the file instead of a cell grid
+    import pandas as pd
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    rows = 0
+    for name, data in sheets.items():
+        written = _append_sheet(workbook, name, _chunks(data))
+        if not written and isinstance(data, pd.DataFrame):
+            # Keep the header of an empty frame so the sheet layout stays the same
+            workbook.create_sheet(_sheet_title(name, 1)).append(list(data.columns))
+        rows += written
+
+    if not workbook.worksheets:
+        workbook.create_sheet()
+    workbook.save(path)
+    return rows
+
+# Every writer takes (chunks, path, types); only the Arrow formats use the column types
+WRITERS = {
+    "xlsx": lambda chunks, path, types=None: _write_xlsx({"Sheet1": chunks}, path),
+    "csv": _write_csv,
+    "csv.gz": lambda chunks, path, types=None: _write_csv(chunks, path, compress=True),
+    "parquet": _write_parquet,
+    "feather": _write_feather,
+}
+FORMATS = tuple(WRITERS)
+
+def format_from_filename(filename):
+    """The export format implied by a file name ('report.csv.gz' -> 'csv.gz'); None if unknown."""
+    name = filename.lower()
+    for fmt in sorted(FORMATS, key=len, reverse=True):
+        if name.endswith("." + fmt):
+            return fmt
+    return None
+
+def export(data, filename, fmt=None, output_dir="output", types=None):
+    """
+    Write a DataFrame, or an iterable of DataFrame chunks, to output_dir/filename.
+
+    fmt is one of FORMATS and defaults to the file extension. Chunks are written as they
+    arrive, so streamed exports never hold the full result. types ({column: dtype}, as in
+    database/db_types) fixes the parquet/feather column types; without it they come from the
+    first chunk. Returns the number of rows written (0 when there was nothing to write), or
+    None on error.
+    """
+    fmt = fmt or format_from_filename(filename)
+    if fmt not in WRITERS:
+        print(f"\n[!!] Unknown export format for '{filename}'. Use one of: {', '.join(FORMATS)}")
+        return None
+
+    output_path = os.path.join(output_dir, filename)
+    try:
+        # Only create the file once there is at least one row to put in it
+        chunks = _chunks(data)
+        first = next(chunks, None)
+        if first is None:
+            print(f"\nNo data to export to '{output_path}'.")
+            return 0
+
+        os.makedirs(output_dir, exist_ok=True)
+        rows = WRITERS[fmt](itertools.chain([first], chunks), output_path, types=types)
+        print(f"\nData saved to '{output_path}' successfully ({rows} rows).")
+        return rows
+
+    except Exception as e:
+        print(f"\n[!!] Error saving data to '{output_path}':", e)
+        return None
+
+def export_sheets(sheets, filename, output_dir="output"):
+    """
+    Write several DataFrames (or chunk iterables) to one write-only xlsx workbook.
+
+    sheets maps sheet name -> data, in sheet order; an empty DataFrame still gets its header
+    row. Sheets past the Excel row limit continue on "<name> (2)" and so on. Returns the total rows written,
+    or None on error.
+    """
+    output_path = os.path.join(output_dir, filename)
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        rows = _write_xlsx(sheets, output_path)
+        print(f"\nData saved to '{output_path}' successfully ({rows} rows).")
+        return rows
+
+    except Exception as e:
+        print(f"\n[!!] Error saving data to '{output_path}':", e)
+        return None
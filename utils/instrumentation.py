@@ -0,0 +1,129 @@
+# instrumentation.py
+
+"""
+In-process metrics for the hot paths: database queries, pool checkouts and Polygon HTTP calls.
+
+Instrumented call sites check the module-level `enabled` flag before doing anything else, so
+with instrumentation off the only cost is that one attribute lookup. When on, every event is
+aggregated in a thread-safe registry (printed as a summary table at exit) and, optionally,
+appended to a JSON-lines metrics file.
+
+    from utils import instrumentation
+    instrumentation.enable(metrics_file="output/metrics.jsonl")
+
+or set TAURONIX_INSTRUMENTATION=1 (and optionally TAURONIX_METRICS_FILE) in the environment.
+"""
+
+import atexit
+import contextlib
+import datetime
+import json
+import os
+import sys
+import threading
+
+from . import app_config
+
+enabled = False
+
+_lock = threading.Lock()
+_stats = {}  # (kind, caller, name) -> aggregated counters
+_metrics_file = None
+_atexit_registered = False
+_own_file = os.path.abspath(__file__)
+
+def enable(metrics_file=None, summary_at_exit=None):
+    """Start recording. metrics_file (if given) receives one JSON object per event."""
+    global enabled, _metrics_file, _atexit_registered
+    with _lock:
+        if metrics_file and _metrics_file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(metrics_file)), exist_ok=True)
+            _metrics_file = open(metrics_file, "a", buffering=1)  # Line buffered, one event per line
+
+        summary_at_exit = app_config.INSTRUMENTATION_SUMMARY_AT_EXIT if summary_at_exit is None else summary_at_exit
+        if summary_at_exit and not _atexit_registered:
+            atexit.register(_at_exit)
+            _atexit_registered = True
+        enabled = True
+
+def disable():
+    """Stop recording and close the metrics file (the collected summary is kept)."""
+    global enabled, _metrics_file
+    with _lock:
+        enabled = False
+        if _metrics_file is not None:
+            _metrics_file.close()
+            _metrics_file = None
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+def caller_name(skip=()):
+    """'module.function' of the first frame outside this module, contextlib and the `skip` files."""
+    skip = {os.path.abspath(path) for path in skip} | {_own_file, os.path.abspath(contextlib.__file__)}
+    frame = sys._getframe(1)
+    while frame is not None and os.path.abspath(frame.f_code.co_filename) in skip:
+        frame = frame.f_back
+    if frame is None:
+        return "<unknown>"
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+def describe_query(query):
+    """Short single-line label for a SQL statement."""
+    text = " ".join(query.split())
+    return text if len(text) <= 80 else text[:77] + "..."
+
+def record(kind, name, seconds, caller=None, rows=None, nbytes=None, retries=0, wait_seconds=None, status="ok"):
+    """Record one event. Call sites should only call this when `enabled` is true."""
+    with _lock:
+        stats = _stats.setdefault((kind, caller or "", name), {
+            "count": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0,
+            "rows": 0, "bytes": 0, "retries": 0, "wait_seconds": 0.0
+        })
+        stats["count"] += 1
+        stats["errors"] += status != "ok"
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        stats["rows"] += rows or 0
+        stats["bytes"] += nbytes or 0
+        stats["retries"] += retries
+        stats["wait_seconds"] += wait_seconds or 0.0
+
+        if _metrics_file is not None:
+            event = {"time": datetime.datetime.now().isoformat(timespec="milliseconds"), "kind": kind,
+                     "name": name, "caller": caller, "seconds": round(seconds, 6), "rows": rows, "bytes": nbytes,
+                     "retries": retries, "wait_seconds": wait_seconds, "status": status,
+                     "thread": threading.current_thread().name}
+            _metrics_file.write(json.dumps(event) + "\n")
+
+def summary():
+    """Aggregated events, slowest (by total time) first."""
+    with _lock:
+        rows = [dict(kind=kind, caller=caller, name=name, **stats) for (kind, caller, name), stats in _stats.items()]
+    return sorted(rows, key=lambda row: row["seconds"], reverse=True)
+
+def print_summary(limit=25):
+    rows = summary()
+    if not rows:
+        return
+
+    print("\n" + "=" * app_config.LINE_LENGTH)
+    print("Instrumentation Summary".center(app_config.LINE_LENGTH))
+    print("=" * app_config.LINE_LENGTH)
+    print(f"{'Kind':<11} {'Calls':>6} {'Total s':>9} {'Max s':>8} {'Rows':>9} {'Bytes':>11} {'Retry':>5} "
+          f"{'Wait s':>7}  Caller / Name")
+    for row in rows[:limit]:
+        print(f"{row['kind']:<11} {row['count']:>6} {row['seconds']:>9.3f} {row['max_seconds']:>8.3f} "
+              f"{row['rows']:>9} {row['bytes']:>11} {row['retries']:>5} {row['wait_seconds']:>7.3f}  "
+              f"{row['caller']}  {row['name']}")
+    if len(rows) > limit:
+        print(f"... {len(rows) - limit} more (see the metrics file for every event)")
+
+def _at_exit():
+    print_summary()
+    disable()
+
+# Opt in from the environment or app_config without touching code
+if os.environ.get("TAURONIX_INSTRUMENTATION", "") not in ("", "0") or app_config.INSTRUMENTATION_ENABLED:
+    enable(metrics_file=os.environ.get("TAURONIX_METRICS_FILE") or app_config.INSTRUMENTATION_METRICS_FILE)
@@ -0,0 +1,210 @@
+# trading_calendar.py
+
+import datetime
+import functools
+
+import numpy as np
+import pandas as pd
+
+from . import app_config
+
+# One-off NYSE closures that no holiday rule produces
+SPECIAL_CLOSURES = {
+    datetime.date(1994, 4, 27): "National Day of Mourning (Nixon)",
+    datetime.date(2001, 9, 11): "September 11",
+    datetime.date(2001, 9, 12): "September 11",
+    datetime.date(2001, 9, 13): "September 11",
+    datetime.date(2001, 9, 14): "September 11",
+    datetime.date(2004, 6, 11): "National Day of Mourning (Reagan)",
+    datetime.date(2007, 1, 2): "National Day of Mourning (Ford)",
+    datetime.date(2012, 10, 29): "Hurricane Sandy",
+    datetime.date(2012, 10, 30): "Hurricane Sandy",
+    datetime.date(2018, 12, 5): "National Day of Mourning (Bush)",
+    datetime.date(2025, 1, 9): "National Day of Mourning (Carter)",
+}
+
+def _easter_sunday(year):
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+def _nth_weekday(year, month, weekday, n):
+    """The n-th given weekday of a month (n=-1 for the last one)."""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(date):
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday."""
+    if date.weekday() == 5:
+        return date - datetime.timedelta(days=1)
+    if date.weekday() == 6:
+        return date + datetime.timedelta(days=1)
+    return date
+
+def nyse_holidays(year):
+    """Full-day NYSE holidays for a year as {date: name}."""
+    holidays = {}
+
+    # New Year's Day moves to Monday when it falls on Sunday but is not observed when it falls on Saturday
+    new_year = datetime.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays[_observed(new_year)] = "New Year's Day"
+
+    if year >= 1998:
+        holidays[_nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    holidays[_nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    holidays[_easter_sunday(year) - datetime.timedelta(days=2)] = "Good Friday"
+    holidays[_nth_weekday(year, 5, 0, -1)] = "Memorial Day"
+    if year >= 2022:
+        holidays[_observed(datetime.date(year, 6, 19))] = "Juneteenth"
+    holidays[_observed(datetime.date(year, 7, 4))] = "Independence Day"
+    holidays[_nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    holidays[_nth_weekday(year, 11, 3, 4)] = "Thanksgiving Day"
+    holidays[_observed(datetime.date(year, 12, 25))] = "Christmas Day"
+
+    for date, name in SPECIAL_CLOSURES.items():
+        if date.year == year:
+            holidays[date] = name
+    return holidays
+
+def nyse_early_closes(year, holidays=None):
+    """1:00 PM early closes for a year as {date: name}."""
+    holidays = nyse_holidays(year) if holidays is None else holidays
+    candidates = {
+        datetime.date(year, 7, 3): "Independence Day Eve",
+        _nth_weekday(year, 11, 3, 4) + datetime.timedelta(days=1): "Day after Thanksgiving",
+        datetime.date(year, 12, 24): "Christmas Eve",
+    }
+    return {date: name for date, name in candidates.items()
+            if date.weekday() < 5 and date not in holidays}
+
+class TradingCalendar:
+    """
+    NYSE sessions for a range of years, held as a sorted datetime64[D] array so that
+    next/previous-session and offset lookups are binary searches.
+    """
+
+    def __init__(self, start_year, end_year):
+        self.start_year = start_year
+        self.end_year = end_year
+
+        self.holidays = {}
+        self.early_closes = {}
+        for year in range(start_year, end_year + 1):
+            year_holidays = nyse_holidays(year)
+            self.holidays.update(year_holidays)
+            self.early_closes.update(nyse_early_closes(year, year_holidays))
+
+        days = np.arange(np.datetime64(f"{start_year}-01-01"), np.datetime64(f"{end_year + 1}-01-01"))
+        weekdays = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+        holiday_days = np.array(sorted(self.holidays), dtype='datetime64[D]')
+        self.sessions = days[(weekdays < 5) & ~np.isin(days, holiday_days)]
+
+        self._holiday_days = holiday_days
+        self._holiday_names = np.array([self.holidays[d] for d in sorted(self.holidays)], dtype=object)
+        self._early_close_days = np.array(sorted(self.early_closes), dtype='datetime64[D]')
+
+    @staticmethod
+    def _to_days(dates):
+        """Converts a scalar or column of date-likes to datetime64[D]."""
+        if np.isscalar(dates) or isinstance(dates, (datetime.date, pd.Timestamp)):
+            return np.datetime64(pd.Timestamp(dates).date(), 'D')
+        return pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[D]')
+
+    def _session_at(self, index):
+        if 0 <= index < len(self.sessions):
+            return self.sessions[index].astype(datetime.date)
+        return None
+
+    def is_session(self, date):
+        day = self._to_days(date)
+        index = np.searchsorted(self.sessions, day)
+        return bool(index < len(self.sessions) and self.sessions[index] == day)
+
+    def is_early_close(self, date):
+        return bool(np.isin(self._to_days(date), self._early_close_days))
+
+    def next_session(self, date, inclusive=True):
+        """First session on (or, with inclusive=False, strictly after) the date; None past the range."""
+        side = 'left' if inclusive else 'right'
+        return self._session_at(int(np.searchsorted(self.sessions, self._to_days(date), side=side)))
+
+    def previous_session(self, date, inclusive=True):
+        """Last session on (or, with inclusive=False, strictly before) the date; None before the range."""
+        side = 'right' if inclusive else 'left'
+        return self._session_at(int(np.searchsorted(self.sessions, self._to_days(date), side=side)) - 1)
+
+    def session_offset(self, date, offset):
+        """The session `offset` sessions away from the date (a closed date counts from the next session)."""
+        index = int(np.searchsorted(self.sessions, self._to_days(date), side='left'))
+        return self._session_at(index + offset)
+
+    def sessions_between(self, start, end):
+        """All sessions from start to end inclusive."""
+        lo = np.searchsorted(self.sessions, self._to_days(start), side='left')
+        hi = np.searchsorted(self.sessions, self._to_days(end), side='right')
+        return self.sessions[lo:hi]
+
+    def session_positions(self, dates):
+        """Vectorized index of each date in `sessions`; -1 for closed days, NaT and dates outside the range."""
+        days = self._to_days(dates)
+        index = np.searchsorted(self.sessions, days, side='left')
+        clipped = np.minimum(index, len(self.sessions) - 1)
+        found = ~np.isnat(days) & (index < len(self.sessions)) & (self.sessions[clipped] == days)
+        return np.where(found, index, -1)
+
+    def next_session_positions(self, dates):
+        """Vectorized index of the first session on or after each date; -1 for NaT and dates past the range."""
+        days = self._to_days(dates)
+        index = np.searchsorted(self.sessions, days, side='left')
+        return np.where(~np.isnat(days) & (index < len(self.sessions)), index, -1)
+
+    def session_dates(self, positions):
+        """Session dates for an array of positions (NaT where the position is -1)."""
+        positions = np.asarray(positions, dtype=np.int64)
+        padded = np.append(self.sessions, np.datetime64('NaT', 'D'))
+        return padded[np.where(positions >= 0, positions, len(self.sessions))]
+
+    def closure_reasons(self, dates):
+        """Vectorized closure reason per date: weekday name, holiday name or '' when the market is open."""
+        days = self._to_days(dates)
+        reasons = np.full(len(days), '', dtype=object)
+
+        valid = ~np.isnat(days)
+        weekdays = np.where(valid, (days.astype(np.int64) + 3) % 7, 0)
+        reasons[valid & (weekdays == 5)] = "Saturday"
+        reasons[valid & (weekdays == 6)] = "Sunday"
+
+        if len(self._holiday_days):
+            index = np.minimum(np.searchsorted(self._holiday_days, days), len(self._holiday_days) - 1)
+            is_holiday = valid & (self._holiday_days[index] == days)
+            reasons[is_holiday] = self._holiday_names[index[is_holiday]]
+        return reasons
+
+    def roll_forward(self, dates):
+        """Vectorized roll of every date to the next session (itself when already a session)."""
+        days = self._to_days(dates)
+        index = np.searchsorted(self.sessions, days, side='left')
+        padded = np.append(self.sessions, np.datetime64('NaT', 'D'))
+        rolled = np.where(np.isnat(days), np.datetime64('NaT', 'D'), padded[np.minimum(index, len(self.sessions))])
+        return pd.Series(pd.to_datetime(rolled))
+
+@functools.lru_cache(maxsize=None)
+def get_calendar(start_year=None, end_year=None):
+    """Shared calendar covering the configured year range (built once per process)."""
+    start_year = app_config.TRADING_CALENDAR_START_YEAR if start_year is None else start_year
+    if end_year is None:
+        end_year = datetime.date.today().year + app_config.TRADING_CALENDAR_YEARS_AHEAD
+    return TradingCalendar(start_year, end_year)
@@ -1,6 +1,7 @@
-import os
 import datetime
 
+from . import export_func, trading_calendar
+
 def prompt_save_excel(data_df, file_name):
     save_excel = input("\nSave this data to an Excel file? (y/n): ").strip().lower()
     if save_excel == "y":
@@ -8,51 +9,37 @@ def prompt_save_excel(data_df, file_name):
         print(f"Data exported to '{file_name}'.")
 
 def output_to_excel(dataframe, filename, output_dir="output"):
-    try:
-        # Ensure the output directory exists
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Combine the output directory with the filename
-        output_path = os.path.join(output_dir, filename)
-        
-        dataframe.to_excel(output_path, index=False)
-        print(f"\nData saved to '{output_path}' successfully.")
-    
-    except Exception as e:
-        print(f"\n[!!] Error saving data to '{output_path}':", e)
+    # Write-only xlsx export (see export_func); sheets split automatically at the Excel row limit.
+    return export_func.export(dataframe, filename, "xlsx", output_dir)
+
+def output_chunks_to_csv(chunks, filename, output_dir="output"):
+    # Write an iterable of DataFrame chunks to one CSV file without holding more than one chunk in memory.
+    return export_func.export(chunks, filename, "csv", output_dir)
 
 def is_market_closed(date):
-    month = date.month
-    reason = None
-    
-    # Check if the date falls on a weekend (Saturday or Sunday)
-    if date.weekday() == 5:  
-        return True, "Saturday"
-    
-    elif date.weekday() == 6:
-        return True, "Sunday"
-    
-    # Check if the date is Memorial Day (May 31, 2021)
-    elif date == datetime.date(2021, 5, 31):
-        return True, "Memorial Day"
-    
-    return False, reason
+    # Check the NYSE trading calendar (weekends, holidays and special closures).
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+
+    reason = trading_calendar.get_calendar().closure_reasons([date])[0]
+    if reason:
+        return True, reason
+
+    return False, None
 
 def get_next_open_market_date(org_date):
-    
-    # Increment the date until a non-holiday, non-weekend day is found
-    iteration_count = 0
-    next_date = org_date
-    market_closed, reason = is_market_closed(next_date)
-    while market_closed:
-        iteration_count += 1
-        next_date += datetime.timedelta(days=1)
-        
-        if iteration_count == 7:
-            print("\n[!!] Error: exceeded maximum iterations.")
-            print("Exiting application.")
-            exit()
-        
-        market_closed, reason = is_market_closed(next_date)
-    
-    return next_date
\ No newline at end of file
+    # Next trading session on or after the given date (binary search over the session calendar).
+    next_date = trading_calendar.get_calendar().next_session(org_date)
+    if next_date is None:
+        print("\n[!!] Error: date is past the end of the trading calendar.")
+        return org_date
+
+    return next_date
+
+def market_closed_reasons(dates):
+    # Vectorized is_market_closed: returns the closure reason for each date ('' when the market is open).
+    return trading_calendar.get_calendar().closure_reasons(dates)
+
+def roll_to_open_market_dates(dates):
+    # Vectorized get_next_open_market_date: rolls every closed date forward to the next open market day.
+    return trading_calendar.get_calendar().roll_forward(dates)
@@ -1,104 +1,169 @@
-import matplotlib.pyplot as plt
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# Plot Stock Prices (Closing, VWAP, Open, High, Low)
-def plot_stock_data(company_name, dates, closing_prices, vwap=None, open_prices=None, high_prices=None, low_prices=None):
-    plt.figure(figsize=(12, 6))
-
-    # Plot Closing Prices
-    plt.plot(dates, closing_prices, marker='o', label='Closing Price')
+# Object-oriented Agg API: every chart owns its Figure, so nothing touches global pyplot
+# state and charts can be rendered side by side in worker processes.
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
-    # Plot VWAP if available
-    if vwap:
-        plt.plot(dates, vwap, marker='s', linestyle='-', label='VWAP')
+FIGURE_SIZE = (12, 6)
+OVERVIEW_FIGURE_SIZE = (12, 12)
 
-    # Plot Open Prices if available
-    if open_prices:
-        plt.plot(dates, open_prices, marker='^', label='Open Price')
+def _clean_name(company_name):
+    # Clean and truncate company name for the filename
+    return company_name.replace('.', '').replace(',', '').replace(' ', '')[:10]
 
-    # Plot High Prices if available
-    if high_prices:
-        plt.plot(dates, high_prices, marker='>', linestyle=':', label='High Price')
+def _has(values):
+    return values is not None and len(values) > 0
 
-    # Plot Low Prices if available
-    if low_prices:
-        plt.plot(dates, low_prices, marker='<', linestyle='-.', label='Low Price')
+def _new_figure(figsize=FIGURE_SIZE, panels=1):
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    axes = figure.subplots(panels, 1, sharex=True, squeeze=False)[:, 0]
+    return figure, axes
 
-    # Customize the plot
-    plt.title(f'{company_name} Stock Prices Over Time')
-    plt.xlabel('Date')
-    plt.ylabel('Price ($)')
-    plt.xticks(rotation=45)
-    plt.grid(True)
+def _finish_axes(ax, title, ylabel, xlabel='Date'):
+    ax.set_title(title)
+    if xlabel:
+        ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(True)
 
     # Show the legend to differentiate between the lines
-    plt.legend(loc='best')
+    ax.legend(loc='best')
 
+def _save(figure, output_path):
     # Ensure everything fits without overlap
-    plt.tight_layout()
-
-    # Clean and truncate company name for the filename
-    cleaned_company_name = company_name.replace('.', '').replace(',', '').replace(' ', '')[:10]
-    output_path = f'output/{cleaned_company_name}_Stock_Price_Over_Time.png'
+    figure.tight_layout()
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    plt.savefig(output_path)
-
-    plt.close()  # Close the plot after saving
+    figure.savefig(output_path)
+    return output_path
+
+def _draw_prices(ax, company_name, dates, closing_prices, vwap=None, open_prices=None, high_prices=None,
+                 low_prices=None, xlabel='Date'):
+    # Plot Closing Prices, then VWAP / Open / High / Low where available
+    ax.plot(dates, closing_prices, marker='o', label='Closing Price')
+    if _has(vwap):
+        ax.plot(dates, vwap, marker='s', linestyle='-', label='VWAP')
+    if _has(open_prices):
+        ax.plot(dates, open_prices, marker='^', label='Open Price')
+    if _has(high_prices):
+        ax.plot(dates, high_prices, marker='>', linestyle=':', label='High Price')
+    if _has(low_prices):
+        ax.plot(dates, low_prices, marker='<', linestyle='-.', label='Low Price')
+    _finish_axes(ax, f'{company_name} Stock Prices Over Time', 'Price ($)', xlabel)
+
+def _draw_volume(ax, company_name, dates, volume, xlabel='Date'):
+    ax.plot(dates, volume, marker='x', linestyle='--', label='Volume')
+    _finish_axes(ax, f'{company_name} Volume Over Time', 'Volume', xlabel)
+
+def _draw_trades(ax, company_name, dates, num_trades, xlabel='Date'):
+    ax.plot(dates, num_trades, marker='*', linestyle='-', label='Number of Trades')
+    _finish_axes(ax, f'{company_name} Number of Trades Over Time', 'Number of Trades', xlabel)
 
+# Plot Stock Prices (Closing, VWAP, Open, High, Low)
+def plot_stock_data(company_name, dates, closing_prices, vwap=None, open_prices=None, high_prices=None, low_prices=None,
+                    output_dir='output'):
+    figure, (ax,) = _new_figure()
+    _draw_prices(ax, company_name, dates, closing_prices, vwap, open_prices, high_prices, low_prices)
+    return _save(figure, os.path.join(output_dir, f'{_clean_name(company_name)}_Stock_Price_Over_Time.png'))
 
 # Plot Volume Over Time
-def plot_volume(company_name, dates, volume):
-    plt.figure(figsize=(12, 6))
-
-    # Plot Volume
-    plt.plot(dates, volume, marker='x', linestyle='--', label='Volume')
-
-    # Customize the plot
-    plt.title(f'{company_name} Volume Over Time')
-    plt.xlabel('Date')
-    plt.ylabel('Volume')
-    plt.xticks(rotation=45)
-    plt.grid(True)
-
-    # Show the legend
-    plt.legend(loc='best')
-
-    # Ensure everything fits without overlap
-    plt.tight_layout()
-
-    # Clean and truncate company name for the filename
-    cleaned_company_name = company_name.replace('.', '').replace(',', '').replace(' ', '')[:10]
-    output_path = f'output/{cleaned_company_name}_Volume_Over_Time.png'
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    plt.savefig(output_path)
-
-    plt.close()  # Close the plot after saving
-
+def plot_volume(company_name, dates, volume, output_dir='output'):
+    figure, (ax,) = _new_figure()
+    _draw_volume(ax, company_name, dates, volume)
+    return _save(figure, os.path.join(output_dir, f'{_clean_name(company_name)}_Volume_Over_Time.png'))
 
 # Plot Number of Trades Over Time
-def plot_number_of_trades(company_name, dates, num_trades):
-    plt.figure(figsize=(12, 6))
-
-    # Plot Number of Trades
-    plt.plot(dates, num_trades, marker='*', linestyle='-', label='Number of Trades')
-
-    # Customize the plot
-    plt.title(f'{company_name} Number of Trades Over Time')
-    plt.xlabel('Date')
-    plt.ylabel('Number of Trades')
-    plt.xticks(rotation=45)
-    plt.grid(True)
-
-    # Show the legend
-    plt.legend(loc='best')
-
-    # Ensure everything fits without overlap
-    plt.tight_layout()
-
-    # Clean and truncate company name for the filename
-    cleaned_company_name = company_name.replace('.', '').replace(',', '').replace(' ', '')[:10]
-    output_path = f'output/{cleaned_company_name}_Number_of_Trades_Over_Time.png'
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    plt.savefig(output_path)
-
-    plt.close()  # Close the plot after saving
+def plot_number_of_trades(company_name, dates, num_trades, output_dir='output'):
+    figure, (ax,) = _new_figure()
+    _draw_trades(ax, company_name, dates, num_trades)
+    return _save(figure, os.path.join(output_dir, f'{_clean_name(company_name)}_Number_of_Trades_Over_Time.png'))
+
+# Price, volume and trades stacked in one figure that shares the date axis
+def plot_stock_overview(company_name, dates, closing_prices, volume, num_trades, vwap=None, open_prices=None,
+                        high_prices=None, low_prices=None, output_dir='output'):
+    figure, (ax_price, ax_volume, ax_trades) = _new_figure(OVERVIEW_FIGURE_SIZE, panels=3)
+    _draw_prices(ax_price, company_name, dates, closing_prices, vwap, open_prices, high_prices, low_prices, xlabel=None)
+    _draw_volume(ax_volume, company_name, dates, volume, xlabel=None)
+    _draw_trades(ax_trades, company_name, dates, num_trades)
+    return _save(figure, os.path.join(output_dir, f'{_clean_name(company_name)}_Stock_Overview.png'))
+
+def _render_company(company_name, stock_data, multi_panel, output_dir):
+    """Renders one company's charts (runs inside a worker). Returns a timing record per chart."""
+    series = lambda key: stock_data.get(key)
+    dates = stock_data['dates']
+
+    if multi_panel:
+        charts = [("overview", lambda: plot_stock_overview(
+            company_name, dates, series('closing_prices'), series('volume'), series('stock_trades'),
+            series('vwaps'), series('opening_prices'), series('stock_highs'), series('stock_lows'), output_dir))]
+    else:
+        charts = [
+            ("price", lambda: plot_stock_data(company_name, dates, series('closing_prices'), series('vwaps'),
+                                              series('opening_prices'), series('stock_highs'),
+                                              series('stock_lows'), output_dir)),
+            ("volume", lambda: plot_volume(company_name, dates, series('volume'), output_dir)),
+            ("trades", lambda: plot_number_of_trades(company_name, dates, series('stock_trades'), output_dir)),
+        ]
+
+    records = []
+    for chart, render in charts:
+        started = time.perf_counter()
+        try:
+            path, error = render(), None
+        except Exception as e:
+            path, error = None, str(e)
+        records.append({"company": company_name, "chart": chart, "path": path,
+                        "seconds": time.perf_counter() - started, "error": error})
+    return records
+
+def render_charts(companies, multi_panel=False, max_workers=None, output_dir='output'):
+    """
+    Render charts for many companies across a process pool.
+
+    companies is an iterable of (company_name, stock_data) pairs, where stock_data holds the
+    series produced by test_polygon_api.process_stock_data ('dates', 'closing_prices',
+    'volume', 'stock_trades', ...). With multi_panel=True each company gets one stacked
+    price/volume/trades figure instead of three separate charts.
+
+    Returns one record per chart: company, chart, path, seconds (render time) and error.
+    """
+    companies = list(companies)
+    workers = max_workers or min(len(companies), os.cpu_count() or 1)
+
+    records = []
+    started = time.perf_counter()
+    if workers <= 1:
+        # Not worth starting a pool for a single worker
+        for company_name, stock_data in companies:
+            records.extend(_render_company(company_name, stock_data, multi_panel, output_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_render_company, company_name, stock_data, multi_panel, output_dir): company_name
+                       for company_name, stock_data in companies}
+            for future in as_completed(futures):
+                try:
+                    records.extend(future.result())
+                except Exception as e:
+                    records.append({"company": futures[future], "chart": None, "path": None,
+                                    "seconds": 0.0, "error": str(e)})
+
+    elapsed = time.perf_counter() - started
+    records.sort(key=lambda record: (record["company"], record["chart"] or ""))
+    print_render_report(records, elapsed, workers)
+    return records
+
+def print_render_report(records, elapsed, workers):
+    rendered = [record for record in records if record["error"] is None]
+    for record in records:
+        if record["error"] is None:
+            print(f"{record['company']:<20} {record['chart']:<10} {record['seconds']:>7.2f}s  {record['path']}")
+        else:
+            print(f"[!!] {record['company']} {record['chart'] or ''}: {record['error']}")
+
+    render_seconds = sum(record["seconds"] for record in rendered)
+    print(f"\nRendered {len(rendered)} of {len(records)} charts in {elapsed:.2f}s "
+          f"({render_seconds:.2f}s of render time across {workers} worker(s)).")